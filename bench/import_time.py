@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Check that the GitHub Action entry point starts fast.
+
+The action runs `python3 -m src.deploy` on the runner's own Python without
+installing packages, so importing src.deploy must stay cheap and must not
+pull in third-party or optional modules. This imports it in a fresh
+interpreter with `-X importtime` (using the standard-library HTTP transport,
+as the action does on runners without requests) and fails when the cumulative import time of src.deploy
+exceeds the budget or a forbidden module gets imported.
+
+Usage:
+    python bench/import_time.py                  # best of 5 runs, 100 ms budget
+    python bench/import_time.py --budget-ms 50 --runs 10 --verbose
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Must never be imported on the action path: third-party packages (not
+# installed there) and modules that are only needed for optional features
+FORBIDDEN = (
+    'requests',
+    'urllib3',
+    'yaml',
+    'aiohttp',
+    'src.config',
+    'src.cli',
+    'src.history_store',
+    'src.log_stream',
+    'concurrent.futures',
+    'tempfile',
+)
+
+
+def measure() -> Tuple[int, Dict[str, int]]:
+    """Import src.deploy once; return its cumulative import time and self times (us)."""
+    env = dict(os.environ, DOKDEPLOY_HTTP='stdlib')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.deploy'],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines are in completion order: whatever `site` imports at startup comes
+    # first, then the `src` package, then everything src.deploy pulls in
+    total = 0
+    modules: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if name == 'src':
+            modules.clear()
+        modules[name] = int(self_us)
+        if name == 'src.deploy':
+            total = int(cumulative_us)
+    return total, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Check the import time of the action entry point')
+    parser.add_argument('--budget-ms', type=float, default=100, help='Max import time of src.deploy (default: 100)')
+    parser.add_argument('--runs', type=int, default=5, help='Runs; the fastest counts (default: 5)')
+    parser.add_argument('--verbose', action='store_true', help='List the slowest modules')
+    args = parser.parse_args()
+
+    runs: List[Tuple[int, Dict[str, int]]] = [measure() for _ in range(args.runs)]
+    total, modules = min(runs, key=lambda run: run[0])
+    total_ms = total / 1000
+
+    print(f"src.deploy import time: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    if args.verbose:
+        for name, self_us in sorted(modules.items(), key=lambda item: -item[1])[:15]:
+            print(f"  {self_us / 1000:6.1f} ms  {name}")
+
+    failed = False
+    imported = [name for name in FORBIDDEN if name in modules]
+    if imported:
+        print(f"FAIL: imported on the action path: {', '.join(imported)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Stand-in Dokploy API server for benchmarks and local testing.
+
+Implements the endpoints dokdeploy uses (application.*, compose.*,
+deployment.all, deployment.allByCompose) on the standard library, with
+scriptable API latency, queue delay and build durations. Any application or
+compose ID is accepted; services are created on first use.
+
+Deployments go idle -> running -> done (or error) like on a real server, one
+build at a time per service. Every deployment also records when a client
+first listed it and when a client first saw its final status, which the
+benchmark runner reads from GET /api/_stats to measure detection latency.
+
+Usage:
+    python bench/mock_dokploy.py --port 3000 --build 20:40 --queue-delay 1
+    # then point dokploy.url at http://127.0.0.1:3000
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+FINAL_STATUSES = ('done', 'error', 'cancelled')
+
+
+def parse_range(value: str) -> Tuple[float, float]:
+    """Parse '5' or '5:10' into a (low, high) range of seconds."""
+    low, _, high = value.partition(':')
+    return float(low), float(high or low)
+
+
+def _iso(moment: float) -> str:
+    """Epoch seconds to a Dokploy-style timestamp (2025-10-30T12:40:03.127Z)."""
+    return datetime.fromtimestamp(moment, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+class _Deployment:
+    def __init__(self, service_id: str, title: Optional[str], description: Optional[str]):
+        self.id = uuid.uuid4().hex[:21]
+        self.service_id = service_id
+        self.title = title
+        self.description = description
+        self.status = 'idle'
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error_message: Optional[str] = None
+        self.log_path: Optional[str] = None
+        self.cancel = threading.Event()
+        # Pre-populated history, not part of the benchmark
+        self.seeded = False
+        # Ground truth for benchmarks
+        self.first_seen: Optional[float] = None
+        self.first_seen_final: Optional[float] = None
+
+    def to_api(self) -> Dict[str, Any]:
+        return {
+            'deploymentId': self.id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status,
+            'logPath': self.log_path,
+            'createdAt': _iso(self.created),
+            'startedAt': _iso(self.started) if self.started else None,
+            'finishedAt': _iso(self.finished) if self.finished else None,
+            'errorMessage': self.error_message,
+        }
+
+    def to_stats(self) -> Dict[str, Any]:
+        return {
+            'deploymentId': self.id,
+            'serviceId': self.service_id,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'firstSeen': self.first_seen,
+            'firstSeenFinal': self.first_seen_final,
+        }
+
+
+class _Service:
+    def __init__(self, service_id: str, service_type: str):
+        self.id = service_id
+        self.type = service_type
+        self.status = 'done'
+        self.deployments: List[_Deployment] = []  # newest first
+        self.queue: List[_Deployment] = []
+        self.building = False
+
+
+class MockDokploy:
+    """
+    In-memory Dokploy API.
+
+    Args:
+        host, port: Address to listen on (port 0 picks a free port)
+        latency: (low, high) seconds added to every API response
+        queue_delay: (low, high) seconds a deployment stays idle before building
+        build_time: (low, high) seconds a build runs
+        fail_rate: Fraction of builds that end in 'error'
+        history: Finished deployments each new service starts with
+        log_dir: If set, builds write a log file there (logPath), one line per 0.1s
+        start_delay: Seconds between application.start and status 'done'
+        lost_triggers: Deploy requests that create the deployment but then
+            answer 502, like a response lost on the way back
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: Tuple[float, float] = (0.0, 0.0),
+        queue_delay: Tuple[float, float] = (0.5, 0.5),
+        build_time: Tuple[float, float] = (5.0, 5.0),
+        fail_rate: float = 0.0,
+        history: int = 0,
+        log_dir: Optional[str] = None,
+        start_delay: float = 1.0,
+        seed: Optional[int] = None,
+        lost_triggers: int = 0
+    ):
+        self.latency = latency
+        self.queue_delay = queue_delay
+        self.build_time = build_time
+        self.fail_rate = fail_rate
+        self.history = history
+        self.log_dir = log_dir
+        self.start_delay = start_delay
+        self.lost_triggers = lost_triggers
+        self.random = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.services: Dict[str, _Service] = {}
+        self.requests: Counter = Counter()
+        self.bytes_sent = 0
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockDokploy':
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self.server.serve_forever()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    # State
+
+    def _service(self, service_id: str, service_type: str) -> _Service:
+        service = self.services.get(service_id)
+        if service is None:
+            service = _Service(service_id, service_type)
+            now = time.time()
+            for i in range(self.history, 0, -1):
+                old = _Deployment(service_id, f"Deployment {i}", None)
+                old.created = now - i * 600
+                old.started = old.created + 1
+                old.finished = old.started + self.random.uniform(*self.build_time)
+                old.status = 'done'
+                old.seeded = True
+                old.first_seen = old.first_seen_final = old.created
+                service.deployments.insert(0, old)
+            self.services[service_id] = service
+        return service
+
+    def _deploy(self, service: _Service, title: Optional[str], description: Optional[str]) -> None:
+        deployment = _Deployment(service.id, title, description)
+        if self.log_dir:
+            deployment.log_path = os.path.join(self.log_dir, f"{deployment.id}.log")
+        service.deployments.insert(0, deployment)
+        service.queue.append(deployment)
+        if not service.building:
+            service.building = True
+            threading.Thread(target=self._build_queue, args=(service,), daemon=True).start()
+
+    def _build_queue(self, service: _Service) -> None:
+        """Run a service's queued deployments one after the other."""
+        while True:
+            with self.lock:
+                if not service.queue:
+                    service.building = False
+                    return
+                deployment = service.queue.pop(0)
+
+            if deployment.cancel.wait(self.random.uniform(*self.queue_delay)):
+                continue
+
+            with self.lock:
+                if deployment.status != 'idle':
+                    continue
+                deployment.status = 'running'
+                deployment.started = time.time()
+                service.status = 'running'
+
+            cancelled = self._run_build(deployment)
+
+            with self.lock:
+                if cancelled or deployment.status == 'cancelled':
+                    continue
+                failed = self.random.random() < self.fail_rate
+                deployment.status = 'error' if failed else 'done'
+                deployment.error_message = 'Build failed (simulated)' if failed else None
+                deployment.finished = time.time()
+                service.status = deployment.status
+
+    def _run_build(self, deployment: _Deployment) -> bool:
+        """Sleep for the build time, writing the log if enabled. True if cancelled."""
+        duration = self.random.uniform(*self.build_time)
+        if not deployment.log_path:
+            return deployment.cancel.wait(duration)
+
+        end = time.time() + duration
+        with open(deployment.log_path, 'w') as log:
+            step = 0
+            while time.time() < end:
+                step += 1
+                log.write(f"#{step} building {deployment.service_id}\n")
+                log.flush()
+                if deployment.cancel.wait(min(0.1, max(0.0, end - time.time()))):
+                    return True
+        return False
+
+    def _cancel(self, service: _Service, running: bool = True, queued: bool = True) -> int:
+        count = 0
+        now = time.time()
+        for deployment in service.deployments:
+            if (running and deployment.status == 'running') or (queued and deployment.status == 'idle'):
+                deployment.status = 'cancelled'
+                deployment.finished = now
+                deployment.cancel.set()
+                count += 1
+        if queued:
+            service.queue.clear()
+        return count
+
+    def _list(self, service: _Service) -> List[Dict[str, Any]]:
+        now = time.time()
+        result = []
+        for deployment in service.deployments:
+            if deployment.first_seen is None:
+                deployment.first_seen = now
+            if deployment.status in FINAL_STATUSES and deployment.first_seen_final is None:
+                deployment.first_seen_final = now
+            result.append(deployment.to_api())
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'requests': dict(self.requests),
+                'bytesSent': self.bytes_sent,
+                'deployments': [
+                    d.to_stats()
+                    for service in self.services.values()
+                    for d in service.deployments
+                    if not d.seeded
+                ],
+            }
+
+    def reset(self) -> None:
+        with self.lock:
+            for service in self.services.values():
+                self._cancel(service)
+            self.services.clear()
+            self.requests.clear()
+            self.bytes_sent = 0
+
+    # HTTP
+
+    def _handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]):
+        """Return (status code, JSON-serializable body)."""
+        endpoint = path.rsplit('/api/', 1)[-1]
+
+        if endpoint == '_stats':
+            return 200, self.stats()
+        if endpoint == '_reset':
+            self.reset()
+            return 200, True
+
+        with self.lock:
+            self.requests[endpoint] += 1
+
+        low, high = self.latency
+        if high > 0:
+            time.sleep(self.random.uniform(low, high))
+
+        kind, _, action = endpoint.partition('.')
+        service_type = 'compose' if kind == 'compose' or endpoint == 'deployment.allByCompose' else 'application'
+        id_field = 'composeId' if service_type == 'compose' else 'applicationId'
+        service_id = query.get(id_field) or body.get(id_field)
+        if not service_id:
+            return 400, {'message': f"Missing {id_field}"}
+
+        with self.lock:
+            service = self._service(service_id, service_type)
+
+            if method == 'GET':
+                if endpoint in ('deployment.all', 'deployment.allByCompose'):
+                    return 200, self._list(service)
+                if action == 'one':
+                    return 200, {
+                        id_field: service.id,
+                        f'{service_type}Status': service.status,
+                        'name': service.id,
+                    }
+                return 404, {'message': f"Unknown endpoint {endpoint}"}
+
+            if action == 'deploy' or action == 'redeploy':
+                self._deploy(service, body.get('title'), body.get('description'))
+                if self.lost_triggers > 0:
+                    self.lost_triggers -= 1
+                    return 502, {'message': 'Bad Gateway'}
+                return 200, True
+            if action == 'stop':
+                service.status = 'idle'
+                return 200, True
+            if action in ('start', 'reload'):
+                service.status = 'running'
+                timer = threading.Timer(self.start_delay, self._set_status, (service, 'done'))
+                timer.daemon = True
+                timer.start()
+                return 200, True
+            if action in ('cancelDeployment', 'killBuild'):
+                self._cancel(service, running=True, queued=False)
+                return 200, True
+            if action == 'cleanQueues':
+                self._cancel(service, running=False, queued=True)
+                return 200, True
+
+        return 404, {'message': f"Unknown endpoint {endpoint}"}
+
+    def _set_status(self, service: _Service, status: str) -> None:
+        with self.lock:
+            if service.status == 'running':
+                service.status = status
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, method: str) -> None:
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+
+                if not self.headers.get('x-api-key') and not parts.path.endswith(('_stats', '_reset')):
+                    status, payload = 401, {'message': 'Unauthorized'}
+                else:
+                    try:
+                        body = json.loads(raw) if raw else {}
+                        status, payload = mock._handle(method, parts.path, query, body)
+                    except json.JSONDecodeError:
+                        status, payload = 400, {'message': 'Invalid JSON body'}
+
+                data = json.dumps(payload).encode()
+                with mock.lock:
+                    mock.bytes_sent += len(data)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Mock Dokploy API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--latency', type=parse_range, default='0', help='API latency in seconds, e.g. 0.05 or 0.02:0.2')
+    parser.add_argument('--queue-delay', type=parse_range, default='0.5', help='Seconds idle before a build starts')
+    parser.add_argument('--build', type=parse_range, default='5', help='Build duration in seconds, e.g. 30 or 20:60')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of builds that fail')
+    parser.add_argument('--history', type=int, default=0, help='Finished deployments per new service')
+    parser.add_argument('--start-delay', type=float, default=1.0, help="Seconds from application.start to status 'done'")
+    parser.add_argument('--log-dir', help='Write build logs to this directory')
+    parser.add_argument('--seed', type=int, help='Random seed')
+    parser.add_argument(
+        '--lost-triggers', type=int, default=0,
+        help='Deploy requests that queue a build but answer 502 (duplicate-trigger testing)'
+    )
+    args = parser.parse_args()
+
+    if args.log_dir:
+        os.makedirs(args.log_dir, exist_ok=True)
+
+    mock = MockDokploy(
+        args.host,
+        args.port,
+        latency=args.latency,
+        queue_delay=args.queue_delay,
+        build_time=args.build,
+        fail_rate=args.fail_rate,
+        history=args.history,
+        log_dir=args.log_dir,
+        start_delay=args.start_delay,
+        seed=args.seed,
+        lost_triggers=args.lost_triggers
+    )
+    print(f"Mock Dokploy listening on {mock.url}", flush=True)
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark dokdeploy against the mock Dokploy server.
+
+For each scenario size N, starts a fresh mock server, configures N apps and
+runs `dokdeploy deploy --all --wait --parallel N` as a subprocess, exactly as
+a user would. It then reports:
+
+- detection latency: trigger until the tracker first listed the new deployment
+- completion lag: build finished until the tracker first saw the final status
+- requests per deployment (all endpoints, baseline and trigger included)
+- CPU time and peak RSS of the dokdeploy process, and wall time
+
+Latencies are measured by the mock server itself, so they hold for any
+client implementation.
+
+Usage:
+    python bench/run_benchmarks.py                      # 1, 10 and 100 deployments
+    python bench/run_benchmarks.py --sizes 10 --build 20:40 --latency 0.05
+    python bench/run_benchmarks.py --json bench_output.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 10) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Mock server did not start on port {port}")
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summary(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        'p50': _percentile(values, 50),
+        'p95': _percentile(values, 95),
+        'max': max(values) if values else None,
+    }
+
+
+def _write_config(directory: str, url: str, count: int) -> str:
+    lines = [
+        'dokploy:',
+        f'  url: {url}',
+        '  auth_token: bench-token',
+        'defaults:',
+        '  wait_for_completion: true',
+        'apps:',
+    ]
+    for i in range(count):
+        lines.append(f'  app{i}: {{id: bench-app-{i}, name: app{i}}}')
+    path = os.path.join(directory, 'deploy.yaml')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def run_scenario(count: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one benchmark scenario with `count` concurrent deployments."""
+    port = _free_port()
+    mock_cmd = [
+        sys.executable, str(BENCH_DIR / 'mock_dokploy.py'),
+        '--port', str(port),
+        '--latency', args.latency,
+        '--queue-delay', args.queue_delay,
+        '--build', args.build,
+        '--history', str(args.history),
+    ]
+    if args.seed is not None:
+        mock_cmd += ['--seed', str(args.seed)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mock = subprocess.Popen(mock_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_for_port(port)
+            url = f'http://127.0.0.1:{port}'
+            config_path = _write_config(tmp, url, count)
+
+            started = time.time()
+            client = subprocess.Popen(
+                [
+                    sys.executable, '-m', 'src.cli',
+                    '--config', config_path,
+                    'deploy', '--all', '--wait', '--parallel', str(count),
+                ],
+                cwd=REPO_ROOT,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            _, status, usage = os.wait4(client.pid, 0)
+            client.returncode = os.waitstatus_to_exitcode(status)
+            wall = time.time() - started
+
+            with urllib.request.urlopen(f'{url}/api/_stats') as response:
+                stats = json.load(response)
+        finally:
+            mock.terminate()
+            mock.wait()
+
+    deployments = stats['deployments']
+    detection = [
+        d['firstSeen'] - d['created'] for d in deployments if d['firstSeen'] is not None
+    ]
+    lag = [
+        d['firstSeenFinal'] - d['finished']
+        for d in deployments
+        if d['firstSeenFinal'] is not None and d['finished'] is not None
+    ]
+    total_requests = sum(stats['requests'].values())
+
+    return {
+        'deployments': count,
+        'exit_code': client.returncode,
+        'completed': len(lag),
+        'wall_s': wall,
+        'detection_latency_s': _summary(detection),
+        'completion_lag_s': _summary(lag),
+        'requests_total': total_requests,
+        'requests_per_deployment': total_requests / count,
+        'requests_by_endpoint': stats['requests'],
+        'bytes_received': stats['bytesSent'],
+        'cpu_s': usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is in kilobytes on Linux
+        'max_rss_mb': usage.ru_maxrss / 1024,
+    }
+
+
+def _fmt(value: Optional[float], digits: int = 2) -> str:
+    return '-' if value is None else f'{value:.{digits}f}'
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = (
+        f"{'N':>4} {'ok':>4} {'wall s':>7} {'detect p50/p95':>15} "
+        f"{'lag p50/p95/max':>18} {'req/dep':>8} {'cpu s':>6} {'rss MB':>7}"
+    )
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        detect = r['detection_latency_s']
+        lag = r['completion_lag_s']
+        print(
+            f"{r['deployments']:>4} {r['completed']:>4} {r['wall_s']:>7.1f} "
+            f"{_fmt(detect['p50']) + '/' + _fmt(detect['p95']):>15} "
+            f"{_fmt(lag['p50']) + '/' + _fmt(lag['p95']) + '/' + _fmt(lag['max']):>18} "
+            f"{r['requests_per_deployment']:>8.1f} {r['cpu_s']:>6.2f} {r['max_rss_mb']:>7.1f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark dokdeploy against a mock Dokploy server')
+    parser.add_argument('--sizes', default='1,10,100', help='Comma-separated deployment counts (default: 1,10,100)')
+    parser.add_argument('--build', default='10:20', help='Build duration range in seconds (default: 10:20)')
+    parser.add_argument('--queue-delay', default='0.5:2', help='Queue delay range in seconds (default: 0.5:2)')
+    parser.add_argument('--latency', default='0.01:0.05', help='API latency range in seconds (default: 0.01:0.05)')
+    parser.add_argument('--history', type=int, default=20, help='Past deployments per app (default: 20)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the mock server')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(',')):
+        print(f"Running {size} concurrent deployment(s)...", file=sys.stderr, flush=True)
+        results.append(run_scenario(size, args))
+
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 0 if all(r['exit_code'] == 0 for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
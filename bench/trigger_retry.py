@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Check that a failed deploy trigger is not retried into a duplicate build.
+
+Starts the mock Dokploy server in-process with deploy requests that queue a
+build but answer 502 (the response was lost), triggers one deployment per
+service type and fails when more than one build was queued or more than one
+deploy request was sent. Then checks that a later trigger still queues a
+new build, so the known deployment IDs do not swallow it.
+
+Usage:
+    python bench/trigger_retry.py
+"""
+
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from mock_dokploy import MockDokploy  # noqa: E402
+from src.dokploy_client import DokployAPIError, DokployClient  # noqa: E402
+from src.logger import DeployLogger  # noqa: E402
+
+
+def check(name: str, ok: bool, detail: str) -> bool:
+    print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+    return ok
+
+
+def main() -> int:
+    mock = MockDokploy(queue_delay=(30, 30), lost_triggers=2).start()
+    logger = DeployLogger()
+    client = DokployClient(mock.url, 'bench-token', logger, max_retries=3, backoff_base=0.05)
+    passed = True
+
+    try:
+        for deployment_type, service_id, trigger, listing in (
+            ('application', 'retry-app', client.deploy, client.get_deployments),
+            ('compose', 'retry-compose', client.deploy_compose, client.get_compose_deployments),
+        ):
+            # Baseline first, as deploy_app and the action do
+            listing(service_id, limit=20)
+            posts_before = mock.requests[f'{deployment_type}.deploy']
+            try:
+                trigger(service_id)
+                outcome = 'returned'
+            except DokployAPIError as e:
+                outcome = f'raised {e}'
+            builds = len(listing(service_id, refresh=True))
+            posts = mock.requests[f'{deployment_type}.deploy'] - posts_before
+            passed &= check(
+                f'{deployment_type} trigger lost after accept',
+                builds == 1 and posts == 1 and outcome == 'returned',
+                f'{builds} build(s) queued, {posts} deploy request(s), trigger {outcome}'
+            )
+
+        # The mock answers normally now: a retry after a failure that queued
+        # nothing still has to go through
+        mock.lost_triggers = 0
+        client.deploy('retry-app')
+        builds = len(client.get_deployments('retry-app', refresh=True))
+        passed &= check('second trigger', builds == 2, f'{builds} build(s) queued')
+    finally:
+        mock.reset()
+        mock.stop()
+
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
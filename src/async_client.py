@@ -0,0 +1,623 @@
+"""
+Asyncio Dokploy API client and deployment tracker.
+
+Mirrors DokployClient and DeploymentTracker on top of aiohttp so a single event
+loop can drive hundreds of trigger/poll cycles without a thread per deployment.
+aiohttp is an optional dependency: pip install 'dokdeploy[async]'.
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional, Any
+
+from .logger import DeployLogger
+from .dokploy_client import (
+    CircuitOpenError,
+    DokployAPIError,
+    RETRYABLE_STATUS_CODES,
+    _deploy_payload,
+    get_circuit_breaker,
+    get_rate_limiter,
+    parse_retry_after,
+)
+from .deployment_tracker import (
+    BaseDeploymentTracker,
+    BuildDurations,
+    DeploymentBaseline,
+    BASELINE_SIZE,
+    CREATION_TIMEOUT,
+    RESTART_TIMEOUT,
+    completion_timeout,
+    get_poll_interval,
+    get_restart_poll_interval,
+)
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+class AsyncDokployClient:
+    """
+    Async client for interacting with Dokploy API.
+
+    GET requests are retried as in DokployClient; deploy triggers are not.
+    The circuit breaker and rate limiter are shared with the sync clients of
+    the same instance.
+
+    Use as an async context manager, or call close() when done:
+
+        async with AsyncDokployClient(url, token, logger) as client:
+            await client.deploy(application_id)
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        logger: DeployLogger,
+        session: Optional['aiohttp.ClientSession'] = None,
+        max_connections: int = 100,
+        timeout: float = 30,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 20.0
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncDokployClient requires aiohttp. "
+                "Install it with: pip install 'dokdeploy[async]'"
+            )
+
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.logger = logger
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Same process-wide breaker and limiter as the sync clients of this instance
+        self.breaker = get_circuit_breaker(self.base_url)
+        self.limiter = get_rate_limiter(self.base_url)
+        self._owns_session = session is None
+        self.session = session or aiohttp.ClientSession(
+            headers={
+                'accept': 'application/json',
+                'Content-Type': 'application/json',
+                'x-api-key': api_key
+            },
+            connector=aiohttp.TCPConnector(limit=max_connections),
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        )
+
+    async def __aenter__(self) -> 'AsyncDokployClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the underlying session if this client created it."""
+        if self._owns_session and not self.session.closed:
+            await self.session.close()
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for the given attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _acquire(self) -> None:
+        """Same as RateLimiter.acquire, without blocking the event loop."""
+        while True:
+            reserved_at = time.monotonic()
+            delay = self.limiter.reserve()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+            if self.limiter.held_at < reserved_at:
+                return
+
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        retry: Optional[bool] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Make HTTP request to Dokploy API and return the decoded JSON body.
+
+        Transient failures are retried like DokployClient._make_request:
+        GET requests by default, with jittered exponential backoff, through
+        the instance's shared circuit breaker.
+
+        Raises:
+            DokployAPIError: If the request fails (after retries, if enabled)
+            CircuitOpenError: If the server's circuit breaker is open
+        """
+        url = f"{self.base_url}{endpoint}"
+        if retry is None:
+            retry = method == 'GET'
+        attempts = self.max_retries + 1 if retry else 1
+
+        self.logger.debug("%s %s", method, url)
+        if 'json' in kwargs:
+            self.logger.debug("Request body: %s", kwargs['json'])
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"Circuit breaker open for {self.base_url} after repeated failures, "
+                    f"not sending {method} {endpoint} (retry in {self.breaker.retry_after():.0f}s)"
+                )
+
+            await self._acquire()
+
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    text = await response.text()
+
+                    self.logger.debug("Response status: %s", response.status)
+                    if text:
+                        self.logger.debug("Response body: %.500s", text)
+
+                    if response.status < 400:
+                        self.breaker.record_success()
+                        if not text:
+                            return None
+                        return await response.json(content_type=None)
+
+                    cause = None
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    error_msg = f"API request failed: {response.status} {response.reason} for url: {url}"
+                    if text:
+                        error_msg += f" - {text}"
+                    error = DokployAPIError(
+                        error_msg,
+                        status_code=response.status,
+                        retryable=response.status in RETRYABLE_STATUS_CODES
+                    )
+                    if error.retryable:
+                        self.breaker.record_failure()
+                    else:
+                        # The server answered; it is up even if the request was wrong
+                        self.breaker.record_success()
+                    if response.status == 429 or retry_after is not None:
+                        # Pause every client of this instance, sync ones included
+                        pause = retry_after if retry_after is not None else self._backoff(attempt)
+                        self.limiter.hold(pause)
+                        self.logger.debug("Server asked to slow down, pausing requests for %.1fs", pause)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                cause = e
+                error = DokployAPIError(f"Network error: {e!r}", retryable=True)
+                self.breaker.record_failure()
+
+            if error.retryable and attempt + 1 < attempts:
+                # The limiter is held after a 429/Retry-After, so the next
+                # attempt waits for the pause on its own
+                paused = self.limiter.paused_for()
+                delay = paused or self._backoff(attempt)
+                # Only the final failure is worth an annotation
+                self.logger.info(
+                    "%s %s failed (%s), retrying in %.1fs (attempt %d/%d)",
+                    method, endpoint, error, delay, attempt + 2, attempts
+                )
+                if not paused:
+                    await asyncio.sleep(delay)
+                continue
+
+            if error.retryable:
+                self.logger.warning(str(error))
+            else:
+                self.logger.error(str(error))
+            raise error from cause
+
+    async def deploy(
+        self,
+        application_id: str,
+        title: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> None:
+        """Trigger deployment for an application. See DokployClient.deploy."""
+        self.logger.info("Triggering deployment for application: %s", application_id)
+        await self._make_request(
+            'POST',
+            '/api/application.deploy',
+            json=_deploy_payload({'applicationId': application_id}, title, description)
+        )
+        self.logger.info("Deployment triggered successfully")
+
+    async def deploy_compose(
+        self,
+        compose_id: str,
+        title: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> None:
+        """Trigger deployment for a compose service. See DokployClient.deploy_compose."""
+        self.logger.info("Triggering deployment for compose: %s", compose_id)
+        await self._make_request(
+            'POST',
+            '/api/compose.deploy',
+            json=_deploy_payload({'composeId': compose_id}, title, description)
+        )
+        self.logger.info("Compose deployment triggered successfully")
+
+    async def get_deployments(self, application_id: str) -> List[Dict[str, Any]]:
+        """Get all deployments for an application (newest first)."""
+        self.logger.debug("Fetching deployments for application: %s", application_id)
+        deployments = await self._make_request(
+            'GET',
+            f'/api/deployment.all?applicationId={application_id}'
+        )
+        deployments = deployments or []
+        self.logger.debug("Found %d deployments", len(deployments))
+        return deployments
+
+    async def get_compose_deployments(self, compose_id: str) -> List[Dict[str, Any]]:
+        """Get all deployments for a compose service (newest first)."""
+        self.logger.debug("Fetching deployments for compose: %s", compose_id)
+        deployments = await self._make_request(
+            'GET',
+            f'/api/deployment.allByCompose?composeId={compose_id}'
+        )
+        deployments = deployments or []
+        self.logger.debug("Found %d compose deployments", len(deployments))
+        return deployments
+
+    async def get_application(self, application_id: str) -> Dict[str, Any]:
+        """Get application details."""
+        self.logger.debug("Fetching application details: %s", application_id)
+        return await self._make_request(
+            'GET',
+            f'/api/application.one?applicationId={application_id}'
+        )
+
+    async def get_compose(self, compose_id: str) -> Dict[str, Any]:
+        """Get compose service details."""
+        self.logger.debug("Fetching compose details: %s", compose_id)
+        return await self._make_request(
+            'GET',
+            f'/api/compose.one?composeId={compose_id}'
+        )
+
+    async def reload(self, application_id: str, app_name: str) -> None:
+        """Reload an application."""
+        self.logger.info("Triggering reload for application: %s", app_name)
+        await self._make_request(
+            'POST',
+            '/api/application.reload',
+            json={
+                'applicationId': application_id,
+                'appName': app_name
+            }
+        )
+        self.logger.info("Reload triggered successfully")
+
+    async def stop(self, application_id: str) -> None:
+        """Stop an application."""
+        self.logger.info("Stopping application: %s", application_id)
+        await self._make_request(
+            'POST',
+            '/api/application.stop',
+            json={'applicationId': application_id}
+        )
+        self.logger.info("Application stopped successfully")
+
+    async def start(self, application_id: str) -> None:
+        """Start an application."""
+        self.logger.info("Starting application: %s", application_id)
+        await self._make_request(
+            'POST',
+            '/api/application.start',
+            json={'applicationId': application_id}
+        )
+        self.logger.info("Application started successfully")
+
+    async def stop_compose(self, compose_id: str) -> None:
+        """Stop a compose service."""
+        self.logger.info("Stopping compose: %s", compose_id)
+        await self._make_request(
+            'POST',
+            '/api/compose.stop',
+            json={'composeId': compose_id}
+        )
+        self.logger.info("Compose stopped successfully")
+
+    async def start_compose(self, compose_id: str) -> None:
+        """Start a compose service."""
+        self.logger.info("Starting compose: %s", compose_id)
+        await self._make_request(
+            'POST',
+            '/api/compose.start',
+            json={'composeId': compose_id}
+        )
+        self.logger.info("Compose started successfully")
+
+    async def cancel_deployment(self, application_id: str) -> None:
+        """See DokployClient.cancel_deployment."""
+        self.logger.info("Cancelling deployment of application: %s", application_id)
+        await self._make_request(
+            'POST',
+            '/api/application.cancelDeployment',
+            json={'applicationId': application_id}
+        )
+        self.logger.info("Deployment cancelled")
+
+    async def cancel_compose_deployment(self, compose_id: str) -> None:
+        """See DokployClient.cancel_compose_deployment."""
+        self.logger.info("Cancelling deployment of compose: %s", compose_id)
+        await self._make_request(
+            'POST',
+            '/api/compose.cancelDeployment',
+            json={'composeId': compose_id}
+        )
+        self.logger.info("Compose deployment cancelled")
+
+    async def kill_build(self, application_id: str) -> None:
+        """See DokployClient.kill_build."""
+        self.logger.info("Killing build of application: %s", application_id)
+        await self._make_request(
+            'POST',
+            '/api/application.killBuild',
+            json={'applicationId': application_id}
+        )
+        self.logger.info("Build killed")
+
+    async def kill_compose_build(self, compose_id: str) -> None:
+        """See DokployClient.kill_compose_build."""
+        self.logger.info("Killing build of compose: %s", compose_id)
+        await self._make_request(
+            'POST',
+            '/api/compose.killBuild',
+            json={'composeId': compose_id}
+        )
+        self.logger.info("Compose build killed")
+
+    async def clean_queues(self, application_id: str) -> None:
+        """See DokployClient.clean_queues."""
+        self.logger.info("Clearing deployment queue of application: %s", application_id)
+        await self._make_request(
+            'POST',
+            '/api/application.cleanQueues',
+            json={'applicationId': application_id}
+        )
+        self.logger.info("Deployment queue cleared")
+
+    async def clean_compose_queues(self, compose_id: str) -> None:
+        """See DokployClient.clean_compose_queues."""
+        self.logger.info("Clearing deployment queue of compose: %s", compose_id)
+        await self._make_request(
+            'POST',
+            '/api/compose.cleanQueues',
+            json={'composeId': compose_id}
+        )
+        self.logger.info("Compose deployment queue cleared")
+
+
+class AsyncDeploymentTracker(BaseDeploymentTracker):
+    """
+    Async counterpart of DeploymentTracker.
+
+    Shares the detection and status rules of DeploymentTracker (both build on
+    BaseDeploymentTracker), but waits with asyncio.sleep so each tracked
+    deployment is a coroutine rather than a thread. Run many at once with
+    asyncio.gather().
+    """
+
+    def __init__(self, client: AsyncDokployClient, logger: DeployLogger):
+        super().__init__(client, logger)
+
+    async def take_baseline(self, service_id: str, deployment_type: str) -> DeploymentBaseline:
+        """Snapshot the newest deployments of a service before triggering."""
+        if deployment_type == 'compose':
+            deployments = await self.client.get_compose_deployments(service_id)
+        else:
+            deployments = await self.client.get_deployments(service_id)
+        return self.baseline_from(deployments[:BASELINE_SIZE])
+
+    async def _poll(self, service_id: str, deployment_type: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch deployments for one poll, tolerating transient API failures.
+
+        Returns None when the poll failed with a retryable error, like
+        DeploymentTracker._poll.
+        """
+        try:
+            if deployment_type == 'compose':
+                return await self.client.get_compose_deployments(service_id)
+            return await self.client.get_deployments(service_id)
+        except DokployAPIError as e:
+            if not e.retryable:
+                raise
+            self.logger.warning("Poll failed, will try again: %s", e)
+            return None
+
+    async def wait_for_new_deployment(
+        self,
+        service_id: str,
+        deployment_type: str,
+        baseline: Optional[DeploymentBaseline],
+        timeout: int = CREATION_TIMEOUT
+    ) -> Dict[str, Any]:
+        """Wait for a new deployment to appear after triggering."""
+        self.logger.info("Waiting for deployment to be created...")
+        self.logger.debug("Baseline: %s", baseline)
+
+        start_time = time.time()
+        poll_interval = get_poll_interval(0)
+        deployments: List[Dict[str, Any]] = []
+
+        while time.time() - start_time < timeout:
+            elapsed = int(time.time() - start_time)
+
+            polled = await self._poll(service_id, deployment_type)
+            if polled is not None:
+                deployments = polled
+                new_deployment = self._report_new_deployment(deployments, baseline, elapsed, poll_interval)
+                if new_deployment:
+                    return new_deployment
+            await asyncio.sleep(poll_interval)
+
+        raise self._not_found_error(timeout, baseline, deployments)
+
+    async def wait_for_completion(
+        self,
+        service_id: str,
+        deployment_type: str,
+        deployment_id: str,
+        timeout: int = 600,
+        durations: Optional[BuildDurations] = None
+    ) -> Dict[str, Any]:
+        """Wait for a specific deployment to complete."""
+        start_time = time.time()
+        progress = self._start_completion(deployment_id, timeout)
+
+        while True:
+            elapsed = int(time.time() - start_time)
+            if elapsed >= timeout:
+                raise self._completion_timeout_error(progress, timeout)
+
+            deployments = await self._poll(service_id, deployment_type)
+            if deployments is not None:
+                deployment = self._check_completion(deployments, progress, elapsed)
+                if deployment:
+                    return deployment
+
+            await asyncio.sleep(self._completion_wait(progress, durations, elapsed))
+
+    async def track_deployment(
+        self,
+        service_id: str,
+        deployment_type: str,
+        baseline: Optional[DeploymentBaseline],
+        timeout: int = 600
+    ) -> Dict[str, Any]:
+        """Complete deployment tracking: wait for creation, then wait for completion."""
+        new_deployment = await self.wait_for_new_deployment(
+            service_id,
+            deployment_type,
+            baseline,
+            timeout=CREATION_TIMEOUT,
+        )
+
+        return await self.wait_for_completion(
+            service_id,
+            deployment_type,
+            new_deployment['deploymentId'],
+            timeout=completion_timeout(timeout),
+            durations=baseline.durations if baseline else None
+        )
+
+    async def service_status(self, service_id: str, deployment_type: str) -> str:
+        """Current applicationStatus/composeStatus of a service."""
+        if deployment_type == 'compose':
+            service = await self.client.get_compose(service_id)
+        else:
+            service = await self.client.get_application(service_id)
+        return self._status_of(service, deployment_type)
+
+    async def wait_for_service_status(
+        self,
+        service_id: str,
+        deployment_type: str,
+        targets: tuple,
+        timeout: float = RESTART_TIMEOUT
+    ) -> str:
+        """Poll the service until its status is one of `targets`. See DeploymentTracker."""
+        deadline = time.monotonic() + timeout
+        status = 'unknown'
+        count = 0
+
+        while True:
+            try:
+                status = await self.service_status(service_id, deployment_type)
+            except DokployAPIError as e:
+                if not e.retryable:
+                    raise
+                self.logger.warning("Status check failed, will try again: %s", e)
+            else:
+                if self._service_status_reached(service_id, status, targets):
+                    return status
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._service_timeout_error(service_id, targets, timeout, status)
+            await asyncio.sleep(min(get_restart_poll_interval(count), remaining))
+            count += 1
+
+    async def restart_service(
+        self,
+        service_id: str,
+        deployment_type: str,
+        timeout: float = RESTART_TIMEOUT
+    ) -> str:
+        """Stop and start a service, waiting for each step. See DeploymentTracker."""
+        started = time.monotonic()
+
+        if deployment_type == 'compose':
+            await self.client.stop_compose(service_id)
+        else:
+            await self.client.stop(service_id)
+        await self.wait_for_service_status(service_id, deployment_type, ('idle',), timeout)
+        self.logger.info("Service stopped after %.1fs", time.monotonic() - started)
+
+        if deployment_type == 'compose':
+            await self.client.start_compose(service_id)
+        else:
+            await self.client.start(service_id)
+        status = await self.wait_for_service_status(service_id, deployment_type, ('done',), timeout)
+        self.logger.info("Service started after %.1fs", time.monotonic() - started)
+        return status
+
+    async def cancel_build(
+        self,
+        service_id: str,
+        deployment_type: str,
+        baseline: Optional[DeploymentBaseline] = None,
+        deployment_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Stop a deployment we gave up on. See DeploymentTracker.cancel_build.
+
+        Returns:
+            'cancelled', 'killed', 'dequeued', or None if nothing was done
+        """
+        compose = deployment_type == 'compose'
+        try:
+            if compose:
+                deployments = await self.client.get_compose_deployments(service_id)
+            else:
+                deployments = await self.client.get_deployments(service_id)
+            deployment, queued = self._cancel_target(service_id, deployments, baseline, deployment_id)
+            step = self._cancel_step(service_id, deployment, queued)
+
+            if step == 'cancel':
+                try:
+                    if compose:
+                        await self.client.cancel_compose_deployment(service_id)
+                    else:
+                        await self.client.cancel_deployment(service_id)
+                    return 'cancelled'
+                except DokployAPIError as e:
+                    if e.retryable:
+                        raise
+                    self.logger.debug("cancelDeployment failed (%s), killing the build instead", e)
+                if compose:
+                    await self.client.kill_compose_build(service_id)
+                else:
+                    await self.client.kill_build(service_id)
+                return 'killed'
+
+            if step == 'dequeue':
+                if compose:
+                    await self.client.clean_compose_queues(service_id)
+                else:
+                    await self.client.clean_queues(service_id)
+                return 'dequeued'
+
+            return None
+
+        except DokployAPIError as e:
+            self.logger.warning("Could not cancel the deployment: %s", e)
+            return None
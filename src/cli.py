@@ -4,20 +4,89 @@ CLI commands for dokdeploy tool.
 
 import sys
 import argparse
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 
 from .config import DokployConfig, ConfigError, load_config
-from .logger import DeployLogger
-from .dokploy_client import DokployClient, DokployAPIError
+from .logger import DeployLogger, LOG_FORMATS
+from .dokploy_client import DokployClientFactory, DokployAPIError
+from .metrics import Metrics
 from .deployment_tracker import (
     DeploymentTracker,
+    MultiDeploymentTracker,
     DeploymentNotFoundError,
     DeploymentFailedError,
-    DeploymentTimeoutError
+    DeploymentTimeoutError,
+    RESTART_TIMEOUT,
+    deployment_description,
+    deployment_title
 )
 
 
+def _client_factory(
+    config: DokployConfig,
+    pool_size: int = 1,
+    metrics: Optional[Metrics] = None
+) -> DokployClientFactory:
+    """Create the shared client factory for one CLI invocation."""
+    return DokployClientFactory(
+        config.dokploy_url,
+        config.auth_token,
+        pool_size=pool_size,
+        max_retries=config.max_retries,
+        cache_ttl=config.cache_ttl,
+        metrics=metrics,
+        rate_limit=config.rate_limit,
+        rate_burst=config.rate_burst
+    )
+
+
+def _add_selection_args(parser: argparse.ArgumentParser, verb: str) -> None:
+    """App selectors shared by deploy, status and history."""
+    parser.add_argument(
+        'apps', nargs='*', metavar='APP',
+        help=f'Application name(s) or glob(s) to {verb}, e.g. \'api-*\''
+    )
+    parser.add_argument('-a', '--all', action='store_true', help=f'{verb.capitalize()} all applications')
+    parser.add_argument(
+        '-t', '--tag', action='append', metavar='TAG',
+        help='Only apps with this tag (repeatable; apps must have all of them)'
+    )
+    parser.add_argument(
+        '--any-tag', action='append', metavar='TAG',
+        help='Only apps with at least one of these tags (repeatable)'
+    )
+    parser.add_argument(
+        '-x', '--exclude', action='append', metavar='APP',
+        help='Skip apps matching this name or glob (repeatable)'
+    )
+    parser.add_argument(
+        '--exclude-tag', action='append', metavar='TAG',
+        help='Skip apps with this tag (repeatable)'
+    )
+
+
+def _select_apps(config: DokployConfig, args) -> List[str]:
+    """
+    App names chosen by the selection arguments, in config order.
+
+    Raises ConfigError when nothing was specified or nothing matched.
+    """
+    if not (args.all or args.apps or args.tag or args.any_tag):
+        raise ConfigError("Specify app names, globs or --tag, or use --all")
+    app_names = config.select(
+        patterns=None if args.all else args.apps,
+        tags=args.tag,
+        any_tags=args.any_tag,
+        exclude=args.exclude,
+        exclude_tags=args.exclude_tag
+    )
+    if not app_names:
+        raise ConfigError("No apps match the selection")
+    return app_names
+
+
 def cmd_init(args) -> int:
     """Initialize config file."""
     config_path = Path(args.config) if args.config else DokployConfig.DEFAULT_CONFIG_PATH
@@ -53,10 +122,16 @@ def cmd_list(args) -> int:
 
         for name, app in config.apps.items():
             print(f"  {name}")
+            if app.type == 'compose':
+                print(f"    Type:    compose")
             print(f"    ID:      {app.id}")
             print(f"    Name:    {app.app_name}")
             print(f"    Wait:    {app.wait_for_completion}")
             print(f"    Restart: {app.restart}")
+            if app.depends_on:
+                print(f"    Depends: {', '.join(app.depends_on)}")
+            if app.tags:
+                print(f"    Tags:    {', '.join(app.tags)}")
             print()
 
         return 0
@@ -70,88 +145,320 @@ def cmd_deploy(args) -> int:
     """Deploy one or more applications."""
     try:
         config = load_config(args.config)
-        logger = DeployLogger(debug=args.debug)
+        logger = DeployLogger(debug=args.debug, json_output=args.log_format == 'json')
+        return deploy_selected(config, args, logger)
 
-        # Determine which apps to deploy
-        if args.all:
-            app_names = config.list_apps()
-        else:
-            app_names = args.apps
+    except ConfigError as e:
+        print(f"Config error: {e}", file=sys.stderr)
+        return 1
 
-        if not app_names:
-            print("Error: Specify app names or use --all", file=sys.stderr)
-            return 1
 
-        # Validate all apps exist before deploying
-        for app_name in app_names:
-            try:
-                config.get_app(app_name)
-            except ConfigError as e:
-                print(f"Error: {e}", file=sys.stderr)
-                return 1
+def deploy_selected(
+    config: DokployConfig,
+    args,
+    logger: DeployLogger,
+    clients: Optional[DokployClientFactory] = None,
+    multi_tracker: Optional[MultiDeploymentTracker] = None
+) -> int:
+    """
+    Deploy the apps selected by `args` and print the summary.
+
+    Without `clients` a connection pool (and for parallel runs a shared poll
+    loop) is created for this run and closed at the end. `dokdeploy serve`
+    passes its long-lived ones instead.
+    """
+    # Determine which apps to deploy; unknown names fail before deploying
+    try:
+        app_names = _select_apps(config, args)
+    except ConfigError as e:
+        print(f"Error: {e}", file=logger.stderr or sys.stderr)
+        return 1
 
-        # Deploy each app
-        failed = []
-        succeeded = []
+    if args.with_deps:
+        app_names = config.with_dependencies(app_names)
 
-        for app_name in app_names:
-            app = config.get_app(app_name)
+    # Only dependencies that are part of this run are waited on; the rest
+    # are assumed to be deployed already
+    dependencies = {
+        name: [dep for dep in config.get_app(name).depends_on if dep in app_names]
+        for name in app_names
+    }
+    has_dependents = {dep for deps in dependencies.values() for dep in deps}
 
-            # Override with CLI flags if provided
-            wait = args.wait if args.wait is not None else app.wait_for_completion
-            no_wait = args.no_wait if args.no_wait else False
-            if no_wait:
-                wait = False
+    parallel = args.parallel or 1
+    if parallel < 1:
+        print("Error: --parallel must be at least 1", file=logger.stderr or sys.stderr)
+        return 1
 
-            restart = args.restart if args.restart else app.restart
-            debug = args.debug if args.debug else app.debug
+    owns_clients = clients is None
+    if owns_clients:
+        # In parallel mode every app shares one poll loop instead of
+        # running its own
+        use_multi_tracker = parallel > 1 and len(app_names) > 1
+
+        # One connection per worker, plus the shared poll loop's fetchers
+        pool_size = parallel
+        if use_multi_tracker:
+            pool_size += MultiDeploymentTracker.FETCH_WORKERS
+        metrics = Metrics()
+        clients = _client_factory(config, pool_size, metrics)
+
+        if use_multi_tracker:
+            multi_tracker = MultiDeploymentTracker(
+                clients.client(logger),
+                logger,
+                stream_logs=args.logs
+            )
 
-            logger.debug_mode = debug
+    # Cleanup of each app still being tracked (cancel on abort), so an
+    # interrupted run can free the build slots it leaves behind
+    in_flight: Dict[str, Callable[[], None]] = {}
+
+    def run_one(app_name: str, app_logger: DeployLogger) -> int:
+        app = config.get_app(app_name)
+
+        # Override with CLI flags if provided
+        wait = args.wait if args.wait is not None else app.wait_for_completion
+        no_wait = args.no_wait if args.no_wait else False
+        if no_wait:
+            wait = False
+
+        # Dependents must not start before this app's build really finished
+        if app_name in has_dependents and not wait:
+            app_logger.info("Other apps in this run depend on this one, waiting for completion")
+            wait = True
+
+        restart = args.restart if args.restart else app.restart
+        restart_timeout = args.restart_timeout or app.restart_timeout
+        coalesce_window = args.coalesce if args.coalesce is not None else app.coalesce_window
+        cancel_on_abort = args.cancel_on_abort or app.cancel_on_abort
+        debug = args.debug if args.debug else app.debug
+
+        app_logger.debug_mode = debug
+
+        return deploy_app(
+            config=config,
+            app=app,
+            wait_for_completion=wait,
+            restart=restart,
+            restart_timeout=restart_timeout,
+            coalesce_window=coalesce_window,
+            commit_sha=args.sha,
+            force=args.force,
+            cancel_on_abort=cancel_on_abort,
+            in_flight=in_flight,
+            logger=app_logger,
+            clients=clients,
+            multi_tracker=multi_tracker,
+            stream_logs=args.logs
+        )
 
-            print(f"\n{'='*60}")
-            print(f"Deploying: {app_name}")
-            print(f"{'='*60}")
+    try:
+        succeeded, failed, skipped, cancelled = _deploy_plan(
+            app_names, dependencies, parallel, run_one, logger
+        )
+        # Only a run cut short by Ctrl-C leaves apps that are still tracking
+        for abandon in list(in_flight.values()):
+            abandon()
+    finally:
+        if owns_clients:
+            if multi_tracker:
+                multi_tracker.close()
+            clients.log_pool_stats(logger)
+            clients.close()
+            _write_metrics(metrics, args, logger)
+
+    return _print_summary(logger, succeeded, failed, skipped, cancelled)
+
+
+def _print_summary(
+    logger: DeployLogger,
+    succeeded: List[str],
+    failed: List[str],
+    skipped: List[str],
+    cancelled: Optional[List[str]] = None
+) -> int:
+    """
+    Print the end-of-run summary; returns the exit code.
+
+    A run interrupted with Ctrl-C (some apps `cancelled`) exits with 130,
+    like the action and main() do.
+    """
+    cancelled = cancelled or []
+    if cancelled:
+        exit_code = 130
+    else:
+        exit_code = 0 if not failed and not skipped else 1
+
+    if logger.json_output:
+        logger.info(
+            "Deployment summary",
+            succeeded=succeeded, failed=failed, skipped=skipped, cancelled=cancelled
+        )
+        return exit_code
+
+    logger.echo(f"\n{'='*60}")
+    logger.echo("Deployment Summary")
+    logger.echo(f"{'='*60}")
+    logger.echo(f"✓ Succeeded: {len(succeeded)}")
+    for name in succeeded:
+        logger.echo(f"  - {name}")
+    logger.echo(f"✗ Failed: {len(failed)}")
+    for name in failed:
+        logger.echo(f"  - {name}")
+    if skipped:
+        logger.echo(f"⊘ Skipped (dependency failed): {len(skipped)}")
+        for name in skipped:
+            logger.echo(f"  - {name}")
+    if cancelled:
+        logger.echo(f"⊘ Cancelled (not finished): {len(cancelled)}")
+        for name in cancelled:
+            logger.echo(f"  - {name}")
+
+    return exit_code
+
+
+def _deploy_plan(
+    app_names: List[str],
+    dependencies: Dict[str, List[str]],
+    parallel: int,
+    run_one,
+    logger: DeployLogger
+):
+    """
+    Deploy apps as a dependency graph with at most `parallel` in flight.
+
+    An app starts as soon as every app it depends on has succeeded, so
+    independent apps run side by side and the total time follows the critical
+    path. When an app fails, everything downstream of it is skipped. Without
+    dependencies this is a plain bounded worker pool; with `parallel` 1 apps
+    deploy one after another in dependency order.
+
+    With more than one worker each app logs through its own prefixed logger so
+    interleaved output stays attributable. Workers are daemon threads so
+    Ctrl-C returns immediately instead of waiting for builds.
+
+    Ctrl-C stops handing out work; apps that had not finished by then are
+    returned as cancelled rather than failed.
+
+    Returns:
+        (succeeded, failed, skipped, cancelled) app name lists, in the original order
+    """
+    import queue
+    import threading
+
+    workers = min(parallel, len(app_names))
+    if workers > 1 and not logger.json_output:
+        logger.echo(f"\n{'='*60}")
+        logger.echo(f"Deploying {len(app_names)} apps ({workers} in parallel)")
+        logger.echo(f"{'='*60}")
+
+    tasks: 'queue.Queue[Optional[str]]' = queue.Queue()
+    finished: 'queue.Queue' = queue.Queue()
+
+    def worker() -> None:
+        while True:
+            app_name = tasks.get()
+            if app_name is None:
+                return
+
+            if workers > 1:
+                app_logger = logger.child(app_name)
+            else:
+                app_logger = logger.bind(app=app_name)
+                if not logger.json_output:
+                    logger.echo(f"\n{'='*60}")
+                    logger.echo(f"Deploying: {app_name}")
+                    logger.echo(f"{'='*60}")
 
             try:
-                result = deploy_app(
-                    config=config,
-                    app=app,
-                    wait_for_completion=wait,
-                    restart=restart,
-                    logger=logger
-                )
-                if result == 0:
-                    succeeded.append(app_name)
-                else:
-                    failed.append(app_name)
+                ok = run_one(app_name, app_logger) == 0
+            except Exception as e:
+                app_logger.error(f"Unexpected error deploying {app_name}: {e}")
+                ok = False
+            finished.put((app_name, ok))
+
+    threads = [
+        threading.Thread(target=worker, name=f'dokdeploy-{i}', daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    waiting_on = {name: set(deps) for name, deps in dependencies.items()}
+    dependents: Dict[str, List[str]] = {name: [] for name in app_names}
+    for name, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].append(name)
+
+    results: Dict[str, bool] = {}
+    skipped: set = set()
+    in_flight = 0
+
+    for name in app_names:
+        if not waiting_on[name]:
+            tasks.put(name)
+            in_flight += 1
 
-            except KeyboardInterrupt:
-                logger.warning(f"\nDeployment of {app_name} cancelled by user")
-                failed.append(app_name)
-                break
+    try:
+        while in_flight:
+            app_name, ok = finished.get()
+            in_flight -= 1
+            results[app_name] = ok
+
+            if ok:
+                for dependent in dependents[app_name]:
+                    waiting_on[dependent].discard(app_name)
+                    if not waiting_on[dependent] and dependent not in skipped:
+                        tasks.put(dependent)
+                        in_flight += 1
+                continue
+
+            # Skip the whole downstream subtree
+            stack = list(dependents[app_name])
+            while stack:
+                dependent = stack.pop()
+                if dependent in skipped:
+                    continue
+                skipped.add(dependent)
+                logger.warning(f"Skipping {dependent}: dependency {app_name} failed")
+                stack.extend(dependents[dependent])
+
+    except KeyboardInterrupt:
+        cancelled = [name for name in app_names if name not in results and name not in skipped]
+        logger.warning(
+            f"\nDeployment cancelled by user "
+            f"({len(cancelled)} app(s) not finished)"
+        )
+        # Do not hand out any more work
+        while not tasks.empty():
+            tasks.get_nowait()
+    else:
+        cancelled = []
 
-            except Exception as e:
-                logger.error(f"Unexpected error deploying {app_name}: {e}")
-                failed.append(app_name)
-
-        # Summary
-        print(f"\n{'='*60}")
-        print("Deployment Summary")
-        print(f"{'='*60}")
-        print(f"✓ Succeeded: {len(succeeded)}")
-        if succeeded:
-            for name in succeeded:
-                print(f"  - {name}")
-        print(f"✗ Failed: {len(failed)}")
-        if failed:
-            for name in failed:
-                print(f"  - {name}")
-
-        return 0 if not failed else 1
+    for _ in threads:
+        tasks.put(None)
 
-    except ConfigError as e:
-        print(f"Config error: {e}", file=sys.stderr)
-        return 1
+    succeeded = [name for name in app_names if results.get(name)]
+    failed = [
+        name for name in app_names
+        if not results.get(name) and name not in skipped and name not in cancelled
+    ]
+    skipped_names = [name for name in app_names if name in skipped]
+    return succeeded, failed, skipped_names, cancelled
+
+
+def _write_metrics(metrics: Metrics, args, logger: DeployLogger) -> None:
+    """Export metrics to the files given with --metrics-json / --metrics-prom."""
+    try:
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+            logger.info(f"Metrics written to {args.metrics_json}")
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+            logger.info(f"Prometheus metrics written to {args.metrics_prom}")
+    except OSError as e:
+        logger.warning(f"Could not write metrics: {e}")
 
 
 def deploy_app(
@@ -159,58 +466,147 @@ def deploy_app(
     app,
     wait_for_completion: bool,
     restart: bool,
-    logger: DeployLogger
+    logger: DeployLogger,
+    clients: Optional[DokployClientFactory] = None,
+    multi_tracker: Optional[MultiDeploymentTracker] = None,
+    stream_logs: bool = False,
+    restart_timeout: int = RESTART_TIMEOUT,
+    coalesce_window: float = 0,
+    commit_sha: Optional[str] = None,
+    force: bool = False,
+    cancel_on_abort: bool = False,
+    in_flight: Optional[Dict[str, Callable[[], None]]] = None
 ) -> int:
-    """Deploy a single application."""
+    """
+    Deploy a single application or compose service (`app.type`).
+
+    Requests go through the shared connection pool of `clients` when given.
+    When a MultiDeploymentTracker is given, tracking is handed to its shared
+    poll loop instead of polling from the calling thread. With stream_logs,
+    the build log is printed while the deployment runs. With a
+    coalesce_window, a deployment queued within that many seconds that has
+    not started building is tracked instead of triggering another one.
+    With a commit_sha, nothing is deployed when the latest successful
+    deployment already built that commit (unless `force`). With
+    cancel_on_abort, a deployment that times out is cancelled (or its build
+    killed); while it is tracked its cleanup is kept in `in_flight[app.name]`
+    for the caller to run when the whole run is interrupted.
+    """
     try:
-        logger.info(f"Application: {app.app_name} ({app.id})")
+        logger.info(f"{app.kind}: {app.app_name} ({app.id})")
         logger.info(f"Wait for completion: {wait_for_completion}")
         logger.info(f"Restart after deploy: {restart}")
 
         # Initialize client and tracker
-        client = DokployClient(config.dokploy_url, config.auth_token, logger)
-        tracker = DeploymentTracker(client, logger)
+        clients = clients or _client_factory(config)
+        client = clients.client(logger)
+        tracker = DeploymentTracker(client, logger, stream_logs=stream_logs)
+        metrics = clients.metrics or Metrics()
+        app_name = app.name
 
         # Get baseline deployment
         logger.info("Getting current deployment state...")
-        deployments = client.get_deployments(app.id)
-
-        baseline_timestamp = None
-        if deployments:
-            latest = deployments[0]
-            baseline_timestamp = latest.get('createdAt')
+        with metrics.phase('baseline', app_name), logger.phase('baseline'):
+            baseline = tracker.take_baseline(app.id, app.type)
+        if baseline.latest:
+            latest = baseline.latest
             logger.info(
                 f"Latest deployment: {latest['deploymentId']} "
-                f"(status: {latest['status']}, created: {baseline_timestamp})"
+                f"(status: {latest['status']}, created: {latest.get('createdAt')})"
             )
         else:
             logger.info("No previous deployments found")
 
-        # Trigger deployment
-        client.deploy(app.id)
+        live = None if force else baseline.live_deployment(commit_sha)
+        if live:
+            logger.success(
+                "Commit %s is already live (deployment %s, finished %s), skipping. "
+                "Use --force to deploy anyway.",
+                commit_sha[:12], live['deploymentId'], live.get('finishedAt'),
+                deployment_id=live['deploymentId'], skipped=True
+            )
+            return 0
+
+        # Trigger deployment, unless a queued one will build the latest commit
+        queued = tracker.queued_deployment(baseline, coalesce_window)
+        if queued:
+            queued_id = queued['deploymentId']
+            logger.info(
+                "Deployment %s is still queued (created %s) and will build the latest commit, "
+                "not triggering another build",
+                queued_id, queued.get('createdAt'),
+                deployment_id=queued_id, coalesced=True
+            )
+            baseline = baseline.without(queued_id)
+        else:
+            trigger = client.deploy_compose if app.type == 'compose' else client.deploy
+            with metrics.phase('trigger', app_name), logger.phase('trigger'):
+                trigger(
+                    app.id,
+                    title=deployment_title(commit_sha) if commit_sha else None,
+                    description=deployment_description(commit_sha) if commit_sha else None
+                )
 
         # If not waiting, exit now
         if not wait_for_completion:
-            logger.info("Deployment triggered. Not waiting for completion.")
+            logger.info("Deployment %s. Not waiting for completion.", 'queued' if queued else 'triggered')
             logger.warning(
                 "⚠️  Not verifying deployment succeeded. "
                 "Use --wait or set wait_for_completion: true in config."
             )
             return 0
 
-        # Track deployment to completion
-        with logger.group("Tracking deployment progress"):
-            try:
-                final_deployment = tracker.track_deployment(
-                    application_id=app.id,
-                    baseline_timestamp=baseline_timestamp,
+        def abandon(deployment_id: Optional[str] = None) -> None:
+            """Free the build slot of the deployment we stop waiting for."""
+            if in_flight is not None and in_flight.pop(app_name, None) is None:
+                # Already run by the caller when the whole run was interrupted
+                return
+            if queued:
+                # Another run triggered it and may still be waiting for it
+                logger.info(f"Not cancelling deployment {queued['deploymentId']}: it was not triggered by this run")
+                return
+            # Interrupted tracking raises no ID, but the tracker saw it
+            if not deployment_id:
+                deployment_id = (
+                    multi_tracker.tracked_deployment_id(app.id, app.type) if multi_tracker
+                    else tracker.deployment_id
                 )
+            outcome = tracker.cancel_build(app.id, app.type, baseline, deployment_id)
+            if outcome:
+                logger.warning(f"Deployment {outcome} (cancel on abort)")
+
+        if cancel_on_abort and in_flight is not None:
+            in_flight[app_name] = abandon
+
+        # Track deployment to completion. Build logs are printed as groups of
+        # their own, and GitHub Actions groups cannot be nested.
+        tracking_group = nullcontext() if stream_logs else logger.group("Tracking deployment progress")
+        with tracking_group:
+            try:
+                with metrics.phase('track', app_name), logger.phase('track'):
+                    if multi_tracker:
+                        final_deployment = multi_tracker.track_deployment(
+                            service_id=app.id,
+                            deployment_type=app.type,
+                            baseline=baseline,
+                            logger=logger,
+                            stream_logs=stream_logs,
+                        )
+                    else:
+                        final_deployment = tracker.track_deployment(
+                            service_id=app.id,
+                            deployment_type=app.type,
+                            baseline=baseline,
+                        )
+                metrics.record_deployment(final_deployment, app_name)
 
                 deployment_id = final_deployment['deploymentId']
                 logger.success(f"Deployment verified: {deployment_id}")
 
             except DeploymentNotFoundError as e:
                 logger.error(str(e))
+                if cancel_on_abort:
+                    abandon()
                 return 1
 
             except DeploymentFailedError as e:
@@ -219,34 +615,30 @@ def deploy_app(
 
             except DeploymentTimeoutError as e:
                 logger.error(str(e))
+                if cancel_on_abort:
+                    abandon(e.deployment_id)
                 return 1
 
+            finally:
+                if in_flight is not None:
+                    in_flight.pop(app_name, None)
+
         # Optional restart
         if restart:
-            logger.info("Restart requested, stopping and starting application...")
+            logger.info(f"Restart requested, stopping and starting {app.kind.lower()}...")
 
-            with logger.group("Restarting application"):
+            with logger.group(f"Restarting {app.kind.lower()}"), \
+                    metrics.phase('restart', app_name), logger.phase('restart'):
                 try:
-                    import time
-
-                    client.stop(app.id)
-                    logger.info("Waiting 5 seconds for clean shutdown...")
-                    time.sleep(5)
+                    app_status = tracker.restart_service(app.id, app.type, timeout=restart_timeout)
+                    logger.success(f"{app.kind} restarted successfully (status: {app_status})")
 
-                    client.start(app.id)
-                    logger.info("Waiting 10 seconds for application to start...")
-                    time.sleep(10)
+                except DeploymentTimeoutError as e:
+                    logger.warning(f"{e}. Please verify manually.")
 
-                    application = client.get_application(app.id)
-                    app_status = application.get('applicationStatus', 'unknown')
-
-                    if app_status in ('done', 'running'):
-                        logger.success(f"Application restarted successfully (status: {app_status})")
-                    else:
-                        logger.warning(
-                            f"Application restarted but status is '{app_status}'. "
-                            "Please verify manually."
-                        )
+                except DeploymentFailedError as e:
+                    logger.error(f"Restart failed: {e}")
+                    return 1
 
                 except DokployAPIError as e:
                     logger.error(f"Restart failed: {e}")
@@ -265,85 +657,231 @@ def cmd_status(args) -> int:
     try:
         config = load_config(args.config)
         logger = DeployLogger(debug=args.debug)
+        try:
+            app_names = _select_apps(config, args)
+        except ConfigError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
 
-        for app_name in args.apps:
-            app = config.get_app(app_name)
+        clients = _client_factory(config)
+        try:
+            show_status(config, app_names, clients.client(logger))
+            clients.log_pool_stats(logger)
+            return 0
+        finally:
+            clients.close()
 
-            print(f"\n{app_name} ({app.app_name}):")
-            print(f"  ID: {app.id}")
+    except ConfigError as e:
+        print(f"Config error: {e}", file=sys.stderr)
+        return 1
 
-            try:
-                client = DokployClient(config.dokploy_url, config.auth_token, logger)
-                application = client.get_application(app.id)
-
-                status = application.get('applicationStatus', 'unknown')
-                print(f"  Status: {status}")
-
-                # Show recent deployments
-                deployments = client.get_deployments(app.id)
-                if deployments:
-                    latest = deployments[0]
-                    print(f"  Latest deployment:")
-                    print(f"    ID:       {latest['deploymentId']}")
-                    print(f"    Status:   {latest['status']}")
-                    print(f"    Created:  {latest['createdAt']}")
-                    if latest.get('finishedAt'):
-                        print(f"    Finished: {latest['finishedAt']}")
-
-            except DokployAPIError as e:
-                print(f"  Error: {e}")
 
-        return 0
+def show_status(config: DokployConfig, app_names: List[str], client, out=None) -> None:
+    """Print each app's status and latest deployment to `out` (default: stdout)."""
+    for app_name in app_names:
+        app = config.get_app(app_name)
+
+        print(f"\n{app_name} ({app.app_name}):", file=out)
+        print(f"  ID: {app.id}", file=out)
+
+        try:
+            if app.type == 'compose':
+                status = client.get_compose(app.id).get('composeStatus', 'unknown')
+            else:
+                status = client.get_application(app.id).get('applicationStatus', 'unknown')
+            print(f"  Status: {status}", file=out)
+
+            # Show the latest deployment
+            if app.type == 'compose':
+                deployments = client.get_compose_deployments(app.id, limit=1)
+            else:
+                deployments = client.get_deployments(app.id, limit=1)
+            if deployments:
+                latest = deployments[0]
+                print(f"  Latest deployment:", file=out)
+                print(f"    ID:       {latest['deploymentId']}", file=out)
+                print(f"    Status:   {latest['status']}", file=out)
+                print(f"    Created:  {latest['createdAt']}", file=out)
+                if latest.get('finishedAt'):
+                    print(f"    Finished: {latest['finishedAt']}", file=out)
+
+        except DokployAPIError as e:
+            print(f"  Error: {e}", file=out)
+
+    if out is not None:
+        out.flush()
+
+
+def cmd_track(args) -> int:
+    """Follow the latest deployment of each selected app until it finishes."""
+    try:
+        config = load_config(args.config)
+        logger = DeployLogger(debug=args.debug, json_output=args.log_format == 'json')
+        try:
+            app_names = _select_apps(config, args)
+        except ConfigError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+        clients = _client_factory(config, MultiDeploymentTracker.FETCH_WORKERS)
+        multi_tracker = MultiDeploymentTracker(clients.client(logger), logger)
+        try:
+            return track_apps(config, app_names, logger, multi_tracker, stream_logs=args.logs)
+        finally:
+            multi_tracker.close()
+            clients.close()
 
     except ConfigError as e:
         print(f"Config error: {e}", file=sys.stderr)
         return 1
 
 
+def track_apps(
+    config: DokployConfig,
+    app_names: List[str],
+    logger: DeployLogger,
+    multi_tracker: MultiDeploymentTracker,
+    stream_logs: bool = False
+) -> int:
+    """
+    Wait for the newest deployment of every app through the shared poll loop.
+
+    Useful after `deploy --no-wait`, or for deployments triggered elsewhere
+    (a webhook, the dashboard). A deployment that already finished is reported
+    right away.
+    """
+    futures = {}
+    for app_name in app_names:
+        app = config.get_app(app_name)
+        app_logger = logger.child(app_name) if len(app_names) > 1 else logger.bind(app=app_name)
+        futures[app_name] = (app_logger, multi_tracker.track(
+            service_id=app.id,
+            deployment_type=app.type,
+            baseline=None,
+            logger=app_logger,
+            stream_logs=stream_logs
+        ))
+
+    succeeded, failed = [], []
+    for app_name, (app_logger, future) in futures.items():
+        try:
+            deployment = future.result()
+            app_logger.success(f"Deployment verified: {deployment['deploymentId']}")
+            succeeded.append(app_name)
+        except (DeploymentNotFoundError, DeploymentFailedError, DeploymentTimeoutError, DokployAPIError) as e:
+            app_logger.error(str(e))
+            failed.append(app_name)
+
+    return _print_summary(logger, succeeded, failed, [])
+
+
 def cmd_history(args) -> int:
-    """Show deployment history."""
+    """Show deployment history from the local history database."""
+    from .history_store import HistoryStore, parse_time_filter
+
     try:
         config = load_config(args.config)
         logger = DeployLogger(debug=args.debug)
 
-        app = config.get_app(args.app)
+        try:
+            app_names = _select_apps(config, args)
+        except ConfigError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
 
-        print(f"\nDeployment history for {args.app} ({app.app_name}):")
+        try:
+            since = parse_time_filter(args.since) if args.since else None
+            until = parse_time_filter(args.until) if args.until else None
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        statuses = args.status or None
+        limit = args.limit or 10
 
+        clients = None if args.offline else _client_factory(config)
+        client = clients.client(logger) if clients is not None else None
+        exit_code = 0
         try:
-            client = DokployClient(config.dokploy_url, config.auth_token, logger)
-            deployments = client.get_deployments(app.id)
-
-            if not deployments:
-                print("  No deployments found")
-                return 0
-
-            # Show last N deployments
-            limit = args.limit or 10
-            for i, dep in enumerate(deployments[:limit]):
-                print(f"\n  [{i+1}] {dep['deploymentId']}")
-                print(f"      Status:   {dep['status']}")
-                print(f"      Created:  {dep['createdAt']}")
-                if dep.get('startedAt'):
-                    print(f"      Started:  {dep['startedAt']}")
-                if dep.get('finishedAt'):
-                    print(f"      Finished: {dep['finishedAt']}")
-                if dep.get('errorMessage'):
-                    print(f"      Error:    {dep['errorMessage']}")
-
-            if len(deployments) > limit:
-                print(f"\n  ... and {len(deployments) - limit} more")
-                print(f"  Use --limit to see more")
+            with HistoryStore(config.history_path) as store:
+                for app_name in app_names:
+                    app = config.get_app(app_name)
+                    print(f"\nDeployment history for {app_name} ({app.app_name}):")
+                    if not _show_history(store, client, app.id, app.type, since, until, statuses, limit, logger):
+                        exit_code = 1
+        finally:
+            if clients is not None:
+                clients.close()
+
+        return exit_code
 
+    except ConfigError as e:
+        print(f"Config error: {e}", file=sys.stderr)
+        return 1
+
+
+def _show_history(
+    store, client, app_id: str, deployment_type: str,
+    since, until, statuses, limit: int, logger: DeployLogger
+) -> bool:
+    """Sync (unless offline) and print one app's history; False if none is available."""
+    if client is None:
+        synced_at = store.last_synced(app_id)
+        if not synced_at:
+            print("  No local history yet, run without --offline first")
+            return False
+        print(f"  (offline, last synced {synced_at})")
+    else:
+        try:
+            new_count = store.sync(client, app_id, deployment_type)
+            logger.debug("Synced %d new deployment(s) to %s", new_count, store.path)
         except DokployAPIError as e:
-            print(f"Error: {e}", file=sys.stderr)
-            return 1
+            synced_at = store.last_synced(app_id)
+            if not synced_at:
+                print(f"Error: {e}", file=sys.stderr)
+                return False
+            print(f"  Warning: could not sync ({e}), showing history from {synced_at}")
+
+    # Show last N deployments
+    deployments = store.query(app_id, since, until, statuses, limit=limit)
+    total = store.count(app_id, since, until, statuses)
+
+    if not deployments:
+        print("  No deployments found")
+        return True
+
+    for i, dep in enumerate(deployments):
+        print(f"\n  [{i+1}] {dep['deploymentId']}")
+        print(f"      Status:   {dep['status']}")
+        print(f"      Created:  {dep['createdAt']}")
+        if dep.get('startedAt'):
+            print(f"      Started:  {dep['startedAt']}")
+        if dep.get('finishedAt'):
+            print(f"      Finished: {dep['finishedAt']}")
+        if dep.get('errorMessage'):
+            print(f"      Error:    {dep['errorMessage']}")
+
+    if total > limit:
+        print(f"\n  ... and {total - limit} more")
+        print(f"  Use --limit to see more")
+
+    return True
 
-        return 0
 
+def cmd_serve(args) -> int:
+    """Run the dokdeploy daemon, or stop / query a running one."""
+    from .daemon import serve, stop, ping
+
+    if args.stop:
+        return stop(args.config)
+    if args.status:
+        return ping(args.config)
+
+    try:
+        config = load_config(args.config)
     except ConfigError as e:
         print(f"Config error: {e}", file=sys.stderr)
         return 1
+    return serve(config, pool_size=args.pool_size, debug=args.debug)
 
 
 def cmd_config(args) -> int:
@@ -426,22 +964,78 @@ def main() -> int:
 
     # deploy command
     deploy_parser = subparsers.add_parser('deploy', help='Deploy application(s)')
-    deploy_parser.add_argument('apps', nargs='*', help='Application name(s) to deploy')
-    deploy_parser.add_argument('-a', '--all', action='store_true', help='Deploy all applications')
+    _add_selection_args(deploy_parser, 'deploy')
     deploy_parser.add_argument('--wait', action='store_true', help='Wait for deployment to complete')
     deploy_parser.add_argument('--no-wait', action='store_true', help='Do not wait for deployment')
     deploy_parser.add_argument('--restart', action='store_true', help='Restart after deployment')
+    deploy_parser.add_argument(
+        '--restart-timeout', type=int, metavar='SECONDS',
+        help='Max seconds to wait for the app to stop and to start again when restarting'
+    )
     deploy_parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    deploy_parser.add_argument('--logs', action='store_true', help='Print build logs while waiting')
+    deploy_parser.add_argument(
+        '--log-format', choices=LOG_FORMATS, default='text',
+        help='Output format: text (default) or json (one JSON object per line)'
+    )
+    deploy_parser.add_argument('--metrics-json', metavar='PATH', help='Write a JSON metrics report to PATH')
+    deploy_parser.add_argument(
+        '--metrics-prom', metavar='PATH',
+        help='Write metrics in Prometheus textfile format to PATH'
+    )
+    deploy_parser.add_argument(
+        '-p', '--parallel', type=int, metavar='N',
+        help='Deploy up to N apps at the same time (default: 1, sequential)'
+    )
+    deploy_parser.add_argument(
+        '--with-deps', action='store_true',
+        help='Also deploy the apps listed in depends_on of the selected apps'
+    )
+    deploy_parser.add_argument(
+        '--coalesce', type=float, metavar='SECONDS',
+        help='Join a deployment queued within SECONDS that has not started building, '
+             'instead of triggering another build (default: coalesce_window from config, 0)'
+    )
+    deploy_parser.add_argument(
+        '--sha', metavar='COMMIT',
+        help='Commit being deployed: recorded in the deployment, and apps whose '
+             'latest successful deployment already built it are skipped'
+    )
+    deploy_parser.add_argument('--force', action='store_true', help='Deploy even if --sha is already live')
+    deploy_parser.add_argument(
+        '--cancel-on-abort', action='store_true',
+        help='On timeout or Ctrl-C, cancel the queued deployment or kill its build'
+    )
+    deploy_parser.add_argument('--no-daemon', action='store_true', help='Do not use a running `dokdeploy serve`')
 
     # status command
     status_parser = subparsers.add_parser('status', help='Show application status')
-    status_parser.add_argument('apps', nargs='+', help='Application name(s)')
+    _add_selection_args(status_parser, 'show')
     status_parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    status_parser.add_argument('--no-daemon', action='store_true', help='Do not use a running `dokdeploy serve`')
+
+    # track command
+    track_parser = subparsers.add_parser('track', help='Wait for the latest deployment of application(s)')
+    _add_selection_args(track_parser, 'track')
+    track_parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    track_parser.add_argument('--logs', action='store_true', help='Print build logs while waiting')
+    track_parser.add_argument(
+        '--log-format', choices=LOG_FORMATS, default='text',
+        help='Output format: text (default) or json (one JSON object per line)'
+    )
+    track_parser.add_argument('--no-daemon', action='store_true', help='Do not use a running `dokdeploy serve`')
 
     # history command
     history_parser = subparsers.add_parser('history', help='Show deployment history')
-    history_parser.add_argument('app', help='Application name')
+    _add_selection_args(history_parser, 'show')
     history_parser.add_argument('-n', '--limit', type=int, help='Number of deployments to show (default: 10)')
+    history_parser.add_argument('--since', help='Only deployments created since (2024-05-01, 2024-05-01T12:00, 12h, 7d)')
+    history_parser.add_argument('--until', help='Only deployments created before (same formats as --since)')
+    history_parser.add_argument(
+        '--status', action='append', choices=['idle', 'running', 'done', 'error', 'cancelled'],
+        help='Only deployments with this status (repeatable)'
+    )
+    history_parser.add_argument('--offline', action='store_true', help='Do not sync, use local history only')
     history_parser.add_argument('--debug', action='store_true', help='Enable debug logging')
 
     # config command
@@ -450,6 +1044,18 @@ def main() -> int:
     config_subparsers.add_parser('show', help='Show configuration')
     config_subparsers.add_parser('validate', help='Validate configuration')
 
+    # serve command
+    serve_parser = subparsers.add_parser(
+        'serve', help='Run a daemon that keeps connections warm and tracks deployments'
+    )
+    serve_parser.add_argument('--stop', action='store_true', help='Stop the running daemon')
+    serve_parser.add_argument('--status', action='store_true', help='Show whether a daemon is running')
+    serve_parser.add_argument(
+        '--pool-size', type=int, default=16, metavar='N',
+        help='Connections kept open to Dokploy (default: 16)'
+    )
+    serve_parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+
     args = parser.parse_args()
 
     if not args.command:
@@ -462,13 +1068,22 @@ def main() -> int:
         'list': cmd_list,
         'deploy': cmd_deploy,
         'status': cmd_status,
+        'track': cmd_track,
         'history': cmd_history,
         'config': cmd_config,
+        'serve': cmd_serve,
     }
 
     handler = commands.get(args.command)
     if handler:
         try:
+            # Hand the command to `dokdeploy serve` when one is running
+            if args.command in ('deploy', 'status', 'track') and not args.no_daemon:
+                from .daemon import route
+
+                exit_code = route(args)
+                if exit_code is not None:
+                    return exit_code
             return handler(args)
         except KeyboardInterrupt:
             print("\n\nCancelled by user", file=sys.stderr)
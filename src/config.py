@@ -3,11 +3,16 @@ Configuration file management for Dokploy CLI.
 Handles loading and validating ~/.dokploy/deploy.yaml
 """
 
+import fnmatch
+import hashlib
+import json
 import os
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-import yaml
+from typing import Dict, Any, Iterator, Mapping, Optional, List, Tuple
+
+# Bump when the cached data layout changes, so old cache files are ignored
+CONFIG_CACHE_VERSION = 3
 
 
 class ConfigError(Exception):
@@ -15,27 +20,143 @@ class ConfigError(Exception):
     pass
 
 
+# Kinds of Dokploy service an app entry can deploy
+APP_TYPES = ('application', 'compose')
+
+
 class AppConfig:
-    """Configuration for a single application."""
+    """Configuration for a single application or compose service."""
+
+    __slots__ = (
+        'name', 'id', 'app_name', 'type', 'wait_for_completion', 'restart',
+        'restart_timeout', 'debug', 'depends_on', 'tags', 'coalesce_window',
+        'cancel_on_abort',
+    )
 
     def __init__(self, name: str, data: Dict[str, Any], defaults: Dict[str, Any]):
         self.name = name
         self.id = data.get('id')
         self.app_name = data.get('name')
+        # 'application' or 'compose': which Dokploy endpoints deploy it
+        self.type = data.get('type', defaults.get('type', 'application'))
 
         # Merge with defaults
         self.wait_for_completion = data.get('wait_for_completion', defaults.get('wait_for_completion', True))
         self.restart = data.get('restart', defaults.get('restart', False))
+        # Max seconds a restart waits for the app to stop, and again to start
+        self.restart_timeout = _seconds(
+            name, 'restart_timeout', data.get('restart_timeout', defaults.get('restart_timeout', 60)), int
+        )
         self.debug = data.get('debug', defaults.get('debug', False))
+        # Join a deployment queued at most this many seconds ago instead of
+        # triggering another build (0: always trigger)
+        self.coalesce_window = _seconds(
+            name, 'coalesce_window', data.get('coalesce_window', defaults.get('coalesce_window', 0)), float
+        )
+        # Cancel the deployment (or kill its build) on timeout or Ctrl-C
+        self.cancel_on_abort = data.get('cancel_on_abort', defaults.get('cancel_on_abort', False))
+
+        # Apps that must deploy successfully before this one starts
+        self.depends_on: List[str] = _depends_on(data)
+
+        # Labels used to select a slice of the fleet (--tag)
+        self.tags: List[str] = _tags(name, data)
 
         # Validate
         if not self.id:
             raise ConfigError(f"App '{name}' missing required field: 'id'")
         if not self.app_name:
             raise ConfigError(f"App '{name}' missing required field: 'name'")
+        if self.type not in APP_TYPES:
+            raise ConfigError(
+                f"App '{name}' has invalid type: {self.type!r} (expected 'application' or 'compose')"
+            )
+
+    @property
+    def kind(self) -> str:
+        """'Application' or 'Compose', for messages."""
+        return 'Compose' if self.type == 'compose' else 'Application'
 
     def __repr__(self):
-        return f"AppConfig(name={self.name}, id={self.id}, app_name={self.app_name})"
+        return f"AppConfig(name={self.name}, type={self.type}, id={self.id}, app_name={self.app_name})"
+
+
+def _depends_on(data: Dict[str, Any]) -> List[str]:
+    """The depends_on list of raw app data (a single name is allowed)."""
+    depends_on = data.get('depends_on') or []
+    if isinstance(depends_on, str):
+        return [depends_on]
+    return list(depends_on)
+
+
+def _seconds(name: str, field: str, value: Any, convert: type) -> Any:
+    """A duration setting of an app, converted with `convert`; quoted numbers are accepted."""
+    try:
+        # YAML booleans would otherwise pass as 0 and 1
+        seconds = None if isinstance(value, bool) else convert(value)
+    except (TypeError, ValueError):
+        seconds = None
+    if seconds is None or seconds < 0:
+        expected = 'whole number' if convert is int else 'number'
+        raise ConfigError(
+            f"App '{name}' has invalid {field}: {value!r} (expected a non-negative {expected} of seconds)"
+        )
+    return seconds
+
+
+def _tags(name: str, data: Dict[str, Any]) -> List[str]:
+    """The tags list of raw app data (a single tag is allowed)."""
+    tags = data.get('tags') or []
+    if isinstance(tags, (str, int, float)):
+        tags = [tags]
+    if not isinstance(tags, list):
+        raise ConfigError(f"App '{name}' has invalid tags: expected a list")
+    return [str(tag) for tag in tags]
+
+
+def _tag_index(apps_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Map each tag to the names of the apps carrying it, in config order."""
+    index: Dict[str, List[str]] = {}
+    for name, data in apps_data.items():
+        for tag in _tags(name, data or {}):
+            names = index.setdefault(tag, [])
+            if not names or names[-1] != name:
+                names.append(name)
+    return index
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(char in pattern for char in '*?[')
+
+
+class AppTable(Mapping):
+    """
+    Read-only mapping of app name to AppConfig, built on first access.
+
+    Iterating only yields names, so `dokdeploy deploy one-app` builds a
+    single AppConfig however many apps the config file has.
+    """
+
+    def __init__(self, apps_data: Dict[str, Any], defaults: Dict[str, Any]):
+        self._data = apps_data
+        self._defaults = defaults
+        self._built: Dict[str, AppConfig] = {}
+
+    def __getitem__(self, name: str) -> AppConfig:
+        app = self._built.get(name)
+        if app is None:
+            app = AppConfig(name, self._data[name] or {}, self._defaults)
+            self._built[name] = app
+        return app
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
 
 
 class DokployConfig:
@@ -47,8 +168,16 @@ class DokployConfig:
         self.config_path = config_path or self.DEFAULT_CONFIG_PATH
         self.dokploy_url: Optional[str] = None
         self.auth_token: Optional[str] = None
+        self.max_retries: int = 3
+        self.cache_ttl: float = 0
+        # Client-side request rate limit (requests/second, 0 = unlimited) and
+        # burst; None keeps the client defaults
+        self.rate_limit: Optional[float] = None
+        self.rate_burst: Optional[int] = None
         self.defaults: Dict[str, Any] = {}
-        self.apps: Dict[str, AppConfig] = {}
+        self.apps: AppTable = AppTable({}, {})
+        # Tag -> app names (config order), built with the parsed-config cache
+        self.tag_index: Dict[str, List[str]] = {}
 
         if self.config_path.exists():
             self._load()
@@ -58,11 +187,19 @@ class DokployConfig:
                 f"Run 'dokdeploy init' to create it."
             )
 
+    @property
+    def history_path(self) -> Path:
+        """Local deployment history database, kept next to the config file."""
+        return self.config_path.parent / 'history.db'
+
     def _load(self):
-        """Load and parse YAML config file."""
+        """Load the config file, from the parsed-config cache when it is current."""
         try:
-            with open(self.config_path, 'r') as f:
-                data = yaml.safe_load(f)
+            stat = self.config_path.stat()
+            key = (str(self.config_path.resolve()), stat.st_mtime_ns, stat.st_size)
+            entry = _read_cache(key)
+            cached = entry is not None
+            data = entry['data'] if cached else self._parse()
 
             if not data:
                 raise ConfigError("Config file is empty")
@@ -71,6 +208,12 @@ class DokployConfig:
             dokploy = data.get('dokploy', {})
             self.dokploy_url = dokploy.get('url')
             self.auth_token = dokploy.get('auth_token')
+            self.max_retries = int(dokploy.get('max_retries', 3))
+            self.cache_ttl = float(dokploy.get('cache_ttl', 0))
+            if dokploy.get('rate_limit') is not None:
+                self.rate_limit = float(dokploy['rate_limit'])
+            if dokploy.get('rate_burst') is not None:
+                self.rate_burst = int(dokploy['rate_burst'])
 
             # Support environment variable expansion
             if self.auth_token and self.auth_token.startswith('$'):
@@ -85,23 +228,148 @@ class DokployConfig:
                 raise ConfigError("Missing required field: dokploy.auth_token")
 
             # Load defaults
-            self.defaults = data.get('defaults', {})
+            self.defaults = data.get('defaults') or {}
 
-            # Load apps
+            # Load apps; AppConfig objects are only built when an app is used
             apps_data = data.get('apps', {})
             if not apps_data:
                 raise ConfigError("No apps defined in config file")
+            self.apps = AppTable(apps_data, self.defaults)
+
+            # A cached file already passed these checks when it was parsed.
+            # Checking dependencies builds every AppConfig, which also
+            # reports apps with missing fields.
+            if cached:
+                self.tag_index = entry['tags']
+            else:
+                self._check_dependencies()
+                self.tag_index = _tag_index(apps_data)
+                _write_cache(key, data, self.tag_index)
 
-            for app_name, app_data in apps_data.items():
-                self.apps[app_name] = AppConfig(app_name, app_data, self.defaults)
-
-        except yaml.YAMLError as e:
-            raise ConfigError(f"Invalid YAML in config file: {e}")
         except FileNotFoundError:
             raise ConfigError(f"Config file not found: {self.config_path}")
         except Exception as e:
             raise ConfigError(f"Failed to load config: {e}")
 
+    def _parse(self) -> Any:
+        """Parse the YAML file (yaml is only imported on a cache miss)."""
+        import yaml
+
+        # The C loader (when PyYAML was built with libyaml) is many times faster
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        try:
+            with open(self.config_path, 'r') as f:
+                return yaml.load(f, Loader=loader)
+        except yaml.YAMLError as e:
+            raise ConfigError(f"Invalid YAML in config file: {e}")
+
+    def _check_dependencies(self):
+        """Ensure depends_on only references known apps and has no cycles."""
+        for name, app in self.apps.items():
+            for dep in app.depends_on:
+                if dep not in self.apps:
+                    raise ConfigError(f"App '{name}' depends on unknown app '{dep}'")
+                if dep == name:
+                    raise ConfigError(f"App '{name}' depends on itself")
+
+        # Depth-first search; a node seen again while still on the stack is a cycle
+        visiting, done = set(), set()
+
+        def visit(name: str, path: List[str]):
+            if name in done:
+                return
+            if name in visiting:
+                cycle = ' -> '.join(path[path.index(name):] + [name])
+                raise ConfigError(f"Dependency cycle in depends_on: {cycle}")
+            visiting.add(name)
+            for dep in self.apps[name].depends_on:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.apps:
+            visit(name, [])
+
+    def with_dependencies(self, names: List[str]) -> List[str]:
+        """Expand app names with all their transitive dependencies (config order)."""
+        selected = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in selected:
+                continue
+            selected.add(name)
+            stack.extend(self.get_app(name).depends_on)
+        return [name for name in self.apps if name in selected]
+
+    def select(
+        self,
+        patterns: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        any_tags: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        exclude_tags: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Select app names (config order) by name, glob and tag.
+
+        patterns: app names or globs ('api-*'); an app matching any of them
+        is selected. Without patterns every app is a candidate.
+        tags: the app must carry all of these tags.
+        any_tags: the app must carry at least one of these tags.
+        exclude / exclude_tags: drop apps matching any of these names, globs
+        or tags.
+
+        An unknown app name or tag, or a glob that matches nothing, raises
+        ConfigError; a combination that selects nothing returns [].
+        """
+        selected: Optional[set] = None
+        if patterns:
+            selected = set()
+            for pattern in patterns:
+                selected.update(self._match(pattern))
+
+        for tag in tags or []:
+            tagged = set(self._tagged(tag))
+            selected = tagged if selected is None else selected & tagged
+
+        if any_tags:
+            tagged = set()
+            for tag in any_tags:
+                tagged.update(self._tagged(tag))
+            selected = tagged if selected is None else selected & tagged
+
+        if selected is None:
+            selected = set(self.apps)
+
+        for pattern in exclude or []:
+            selected.difference_update(self._match(pattern))
+        for tag in exclude_tags or []:
+            selected.difference_update(self._tagged(tag))
+
+        return [name for name in self.apps if name in selected]
+
+    def _match(self, pattern: str) -> List[str]:
+        """App names matching a name or glob."""
+        if not _is_glob(pattern):
+            self.get_app(pattern)
+            return [pattern]
+        names = fnmatch.filter(self.apps, pattern)
+        if not names:
+            raise ConfigError(f"No apps match '{pattern}'")
+        return names
+
+    def _tagged(self, tag: str) -> List[str]:
+        """App names carrying a tag."""
+        names = self.tag_index.get(tag)
+        if not names:
+            available = ', '.join(sorted(self.tag_index)) or '(none)'
+            raise ConfigError(
+                f"No apps tagged '{tag}'.\n"
+                f"Available tags: {available}"
+            )
+        return names
+
     def get_app(self, name: str) -> AppConfig:
         """Get app config by name."""
         if name not in self.apps:
@@ -133,10 +401,27 @@ dokploy:
   # Can be literal value or environment variable reference
   auth_token: $DOKPLOY_AUTH_TOKEN  # or put token directly here
 
+  # Retries for transient API errors (network errors, 429/502/503/504)
+  # max_retries: 3
+
+  # Reuse read responses (app details, deployment lists) for this many seconds
+  # within one run; deploy/stop/start invalidate them (default: 0, disabled)
+  # cache_ttl: 10
+
+  # Max requests per second sent to this instance by one dokdeploy process,
+  # however many apps it tracks (default: 0, unlimited); rate_burst requests
+  # may go out at once. A 429 or Retry-After from the server pauses all of
+  # them either way.
+  # rate_limit: 20
+  # rate_burst: 40
+
 # Default settings applied to all apps (can be overridden per-app)
 defaults:
   wait_for_completion: true  # Wait for deployment to finish
   restart: false             # Restart app after deployment
+  restart_timeout: 60        # Max seconds to wait for stop, and again for start
+  coalesce_window: 0         # Join a deployment queued within this many seconds instead of triggering
+  cancel_on_abort: false     # On timeout or Ctrl-C, cancel the deployment / kill its build
   debug: false               # Enable debug logging
 
 # Your applications
@@ -154,11 +439,17 @@ apps:
   #   id: abc123
   #   name: my-api
   #   restart: true
+  #   tags: [backend, eu]    # Select with: dokdeploy deploy --tag backend
   #
   # worker:
   #   id: def456
   #   name: my-worker
-  #   wait_for_completion: false
+  #   depends_on: [api]      # Deploy only after api finished successfully
+  #
+  # stack:
+  #   type: compose          # A compose service (default: application)
+  #   id: ghi789             # Compose ID
+  #   name: my-stack         # Compose name
 """
 
         with open(path, 'w') as f:
@@ -193,3 +484,76 @@ apps:
 def load_config(config_path: Optional[Path] = None) -> DokployConfig:
     """Load configuration from file."""
     return DokployConfig(config_path)
+
+
+def _cache_dir() -> Path:
+    base = os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'dokdeploy'
+
+
+def _cache_file(path: str) -> Path:
+    digest = hashlib.sha256(path.encode('utf-8')).hexdigest()[:16]
+    return _cache_dir() / f'config-{digest}.json'
+
+
+def _read_cache(key: Tuple[str, int, int]) -> Optional[Dict[str, Any]]:
+    """
+    Parsed config data ('data') and tag index ('tags') cached for this exact
+    file version, if any.
+
+    The cache is keyed on the file's resolved path, modification time and
+    size; any edit makes it stale and the YAML is parsed again.
+    """
+    try:
+        with open(_cache_file(key[0]), 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('version') != CONFIG_CACHE_VERSION or cached.get('key') != list(key):
+        return None
+    if 'data' not in cached or not isinstance(cached.get('tags'), dict):
+        return None
+    return cached
+
+
+def _write_cache(key: Tuple[str, int, int], data: Dict[str, Any], tag_index: Dict[str, List[str]]) -> None:
+    """
+    Cache parsed config data; failures are ignored (the cache is optional).
+
+    Only data that survives a JSON round trip unchanged is cached, so YAML
+    values such as dates or non-string keys never come back altered. A
+    config with a literal auth_token (rather than a $ENV reference) is not
+    cached, so the token is never copied out of the file, and an older
+    cache file of it is removed.
+    """
+    import tempfile
+
+    path = _cache_file(key[0])
+    token = (data.get('dokploy') or {}).get('auth_token') if isinstance(data, dict) else None
+    if isinstance(token, str) and not token.startswith('$'):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return
+
+    try:
+        text = json.dumps({'version': CONFIG_CACHE_VERSION, 'key': list(key), 'data': data, 'tags': tag_index})
+        if json.loads(text)['data'] != data:
+            return
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # mkdir leaves the mode of an existing directory alone
+        os.chmod(path.parent, 0o700)
+        # mkstemp creates the file readable by the owner only
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.config-', suffix='.tmp')
+    except (OSError, TypeError, ValueError):
+        return
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
@@ -0,0 +1,427 @@
+"""
+Long-running dokdeploy daemon (`dokdeploy serve`) and its thin client.
+
+The daemon loads the config once, keeps one connection pool to Dokploy and
+one MultiDeploymentTracker poll loop, and serves `deploy`, `status` and
+`track` for CLI invocations over a Unix socket next to the config file
+(~/.dokploy/dokdeploy.sock). A CLI command that finds the socket hands its
+parsed arguments to the daemon instead of parsing the config, opening new
+connections and polling on its own; many terminals tracking deployments then
+cost one process and one poll loop.
+
+Protocol: one connection per command, JSON objects, one per line.
+
+    -> {"command": "deploy", "config": "/home/me/.dokploy/deploy.yaml", "args": {...}}
+    <- {"out": "[INFO] Application: api (abc123)\\n"}
+    <- {"err": "[WARNING] ...\\n"}
+    <- {"exit": 0}
+
+The daemon answers {"fallback": "<reason>"} for a command it cannot serve
+(e.g. another config file), and the CLI then runs it locally. Other commands:
+"ping" (daemon status) and "shutdown".
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Commands served by the daemon; the rest always run in the CLI process
+DAEMON_COMMANDS = ('deploy', 'status', 'track')
+
+# Seconds to wait for a daemon to accept the connection before running locally
+CONNECT_TIMEOUT = 1.0
+
+SOCKET_NAME = 'dokdeploy.sock'
+
+
+def socket_path(config_path: Optional[Path] = None) -> Path:
+    """The daemon socket for a config file: next to it, like the history database."""
+    from .config import DokployConfig
+
+    path = Path(config_path) if config_path else DokployConfig.DEFAULT_CONFIG_PATH
+    return path.parent / SOCKET_NAME
+
+
+def _config_path(config_path: Optional[Path] = None) -> str:
+    from .config import DokployConfig
+
+    return str((Path(config_path) if config_path else DokployConfig.DEFAULT_CONFIG_PATH).resolve())
+
+
+# -- Client ------------------------------------------------------------------
+
+
+def _connect(path: Path) -> Optional[socket.socket]:
+    """Connect to the daemon socket, or None when no daemon is listening."""
+    if not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def _request(sock: socket.socket, message: Dict[str, Any]):
+    """Send one request and yield the daemon's reply objects."""
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+    with sock.makefile('r', encoding='utf-8') as reader:
+        for line in reader:
+            yield json.loads(line)
+
+
+def route(args: argparse.Namespace) -> Optional[int]:
+    """
+    Run a CLI command through the daemon.
+
+    Returns the command's exit code, or None when it has to run locally: no
+    daemon is listening, the daemon serves another config file, or the
+    command writes local files (--metrics-json / --metrics-prom), or Ctrl-C
+    has to cancel its builds (--cancel-on-abort) rather than detach.
+    """
+    if args.command not in DAEMON_COMMANDS:
+        return None
+    if getattr(args, 'metrics_json', None) or getattr(args, 'metrics_prom', None):
+        return None
+    if getattr(args, 'cancel_on_abort', False):
+        return None
+
+    sock = _connect(socket_path(args.config))
+    if sock is None:
+        return None
+
+    options = {
+        key: value for key, value in vars(args).items()
+        if key not in ('config', 'command', 'no_daemon')
+    }
+    message = {'command': args.command, 'config': _config_path(args.config), 'args': options}
+
+    try:
+        with sock:
+            for reply in _request(sock, message):
+                if 'out' in reply:
+                    sys.stdout.write(reply['out'])
+                    sys.stdout.flush()
+                elif 'err' in reply:
+                    sys.stderr.write(reply['err'])
+                    sys.stderr.flush()
+                elif 'fallback' in reply:
+                    if getattr(args, 'debug', False):
+                        print(f"[DEBUG] Not using dokdeploy serve: {reply['fallback']}", file=sys.stderr)
+                    return None
+                elif 'exit' in reply:
+                    return reply['exit']
+    except KeyboardInterrupt:
+        if args.command == 'deploy':
+            print(
+                "\nDetached. Triggered deployments keep being tracked by dokdeploy serve; "
+                "follow them with `dokdeploy track`.",
+                file=sys.stderr
+            )
+        return 130
+    except BrokenPipeError:
+        # Our own output was closed (e.g. piped into head)
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"Error: lost connection to dokdeploy serve: {e}", file=sys.stderr)
+        return 1
+
+    print("Error: dokdeploy serve closed the connection", file=sys.stderr)
+    return 1
+
+
+def ping(config_path: Optional[Path] = None) -> int:
+    """Print the status of the daemon for this config (`dokdeploy serve --status`)."""
+    path = socket_path(config_path)
+    sock = _connect(path)
+    if sock is None:
+        print(f"No dokdeploy serve running ({path})")
+        return 1
+    with sock:
+        try:
+            replies = list(_request(sock, {'command': 'ping'}))
+        except OSError:
+            replies = []
+        for reply in replies:
+            print(f"dokdeploy serve running (pid {reply['pid']}, up {reply['uptime']:.0f}s)")
+            print(f"  Socket:   {path}")
+            print(f"  Config:   {reply['config']}")
+            print(f"  Requests: {reply['requests']}")
+            print(f"  Tracking: {reply['tracking']} deployment(s)")
+            return 0
+    print(f"dokdeploy serve is not answering ({path})")
+    return 1
+
+
+def stop(config_path: Optional[Path] = None) -> int:
+    """Ask the daemon for this config to exit (`dokdeploy serve --stop`)."""
+    path = socket_path(config_path)
+    sock = _connect(path)
+    if sock is None:
+        print(f"No dokdeploy serve running ({path})")
+        return 1
+    with sock:
+        for _ in _request(sock, {'command': 'shutdown'}):
+            pass
+    # The socket is removed once the daemon has closed its connections
+    deadline = time.monotonic() + 10
+    while path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    print("✓ Stopped dokdeploy serve")
+    return 0
+
+
+# -- Server ------------------------------------------------------------------
+
+
+class _Connection:
+    """Reply channel of one client; a client that went away is ignored."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def send(self, message: Dict[str, Any]) -> None:
+        data = json.dumps(message, default=str).encode('utf-8') + b'\n'
+        with self.lock:
+            if self.closed:
+                return
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                # The command keeps running (a deploy stays tracked) even
+                # if nobody is listening any more
+                self.closed = True
+
+
+class _ClientStream:
+    """Text stream that forwards everything written to it as {key: text} replies."""
+
+    def __init__(self, connection: _Connection, key: str):
+        self.connection = connection
+        self.key = key
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._buffer.append(text)
+        return len(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            text = ''.join(self._buffer)
+            self._buffer.clear()
+        if text:
+            self.connection.send({self.key: text})
+
+
+class DokployDaemon:
+    """
+    Shared state of `dokdeploy serve`: config, connection pool and poll loop.
+
+    The config is reloaded when the file changes. Changing the Dokploy URL
+    or token needs a restart; until then commands fall back to running in
+    the CLI process so they never use stale credentials.
+    """
+
+    def __init__(self, config, pool_size: int = 16, debug: bool = False):
+        from .cli import _client_factory
+        from .deployment_tracker import MultiDeploymentTracker
+        from .logger import DeployLogger
+        from .metrics import Metrics
+
+        self.config = config
+        self.config_path = str(config.config_path.resolve())
+        self.logger = DeployLogger(debug=debug)
+        self.metrics = Metrics()
+        self.clients = _client_factory(config, pool_size, self.metrics)
+        self.multi_tracker = MultiDeploymentTracker(self.clients.client(self.logger), self.logger)
+        self.started_at = time.time()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._config_key = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def current_config(self):
+        """The config, reloaded if the file changed; None if it can no longer be served."""
+        from .config import ConfigError, load_config
+
+        with self._lock:
+            key = self._stat()
+            if key == self._config_key:
+                return self.config
+            try:
+                config = load_config(Path(self.config_path))
+            except ConfigError as e:
+                self.logger.warning("Could not reload %s: %s", self.config_path, e)
+                return None
+            self._config_key = key
+            if (config.dokploy_url, config.auth_token) != (self.config.dokploy_url, self.config.auth_token):
+                self.logger.warning("Dokploy URL or token changed, restart dokdeploy serve to use them")
+                return None
+            self.logger.info("Reloaded %s", self.config_path)
+            self.clients.set_rate_limit(config.rate_limit, config.rate_burst)
+            self.config = config
+            return config
+
+    def handle(self, message: Dict[str, Any], connection: _Connection) -> None:
+        """Run one client request, streaming its output back."""
+        from .cli import deploy_selected, show_status, track_apps, _select_apps
+        from .config import ConfigError
+        from .logger import DeployLogger
+
+        command = message.get('command')
+        if command == 'ping':
+            connection.send({
+                'pid': os.getpid(),
+                'config': self.config_path,
+                'uptime': time.time() - self.started_at,
+                'requests': self.requests,
+                'tracking': self.multi_tracker.active_count,
+                'exit': 0,
+            })
+            return
+        if command not in DAEMON_COMMANDS:
+            connection.send({'err': f"Unknown command: {command}\n", 'exit': 1})
+            return
+        if message.get('config') != self.config_path:
+            connection.send({'fallback': f"serving {self.config_path}, not {message.get('config')}"})
+            return
+        config = self.current_config()
+        if config is None:
+            connection.send({'fallback': 'config changed, daemon needs a restart'})
+            return
+
+        with self._lock:
+            self.requests += 1
+        args = argparse.Namespace(**message.get('args', {}))
+        out = _ClientStream(connection, 'out')
+        err = _ClientStream(connection, 'err')
+        logger = DeployLogger(
+            debug=getattr(args, 'debug', False),
+            json_output=getattr(args, 'log_format', 'text') == 'json',
+            stdout=out,
+            stderr=err
+        )
+        self.logger.debug("%s %s", command, message.get('args'))
+
+        try:
+            if command == 'deploy':
+                exit_code = deploy_selected(
+                    config, args, logger,
+                    clients=self.clients,
+                    multi_tracker=self.multi_tracker
+                )
+            else:
+                try:
+                    app_names = _select_apps(config, args)
+                except ConfigError as e:
+                    print(f"Error: {e}", file=err, flush=True)
+                    exit_code = 1
+                else:
+                    if command == 'status':
+                        show_status(config, app_names, self.clients.client(logger), out)
+                        exit_code = 0
+                    else:
+                        exit_code = track_apps(
+                            config, app_names, logger, self.multi_tracker,
+                            stream_logs=args.logs
+                        )
+        except Exception as e:
+            logger.error(f"dokdeploy serve: {command} failed: {e}")
+            exit_code = 1
+
+        out.flush()
+        err.flush()
+        connection.send({'exit': exit_code})
+
+    def close(self) -> None:
+        self.multi_tracker.close()
+        self.clients.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        connection = _Connection(self.request)
+        try:
+            message = json.loads(line)
+        except ValueError:
+            connection.send({'err': "Invalid request\n", 'exit': 1})
+            return
+
+        if message.get('command') == 'shutdown':
+            connection.send({'exit': 0})
+            # shutdown() waits for serve_forever() to return, so not from here
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        self.server.dokdeploy.handle(message, connection)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, dokdeploy: DokployDaemon):
+        self.dokdeploy = dokdeploy
+        # The socket gives access to the Dokploy token: owner only
+        umask = os.umask(0o077)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(umask)
+
+
+def serve(config, pool_size: int = 16, debug: bool = False) -> int:
+    """Run `dokdeploy serve` in the foreground until stopped (Ctrl-C, SIGTERM, --stop)."""
+    path = socket_path(config.config_path)
+    if _connect(path) is not None:
+        print(f"Error: dokdeploy serve is already running ({path})", file=sys.stderr)
+        return 1
+    # Left behind by a daemon that did not exit cleanly
+    if path.exists():
+        path.unlink()
+
+    daemon = DokployDaemon(config, pool_size=pool_size, debug=debug)
+    server = _Server(str(path), daemon)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+
+    daemon.logger.info(f"dokdeploy serve listening on {path} (pid {os.getpid()})")
+    daemon.logger.info(f"Config: {daemon.config_path} ({len(config.apps)} apps)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        daemon.clients.log_pool_stats(daemon.logger)
+        daemon.close()
+        daemon.logger.info("dokdeploy serve stopped")
+
+    return 0
@@ -8,16 +8,20 @@ to avoid race conditions and ensure deployments actually complete.
 
 import os
 import sys
-import time
+from contextlib import nullcontext
 from typing import Optional
 
-from .logger import create_logger
+from .logger import DeployLogger, create_logger
 from .dokploy_client import DokployClient, DokployAPIError
+from .metrics import Metrics
 from .deployment_tracker import (
     DeploymentTracker,
     DeploymentNotFoundError,
     DeploymentFailedError,
-    DeploymentTimeoutError
+    DeploymentTimeoutError,
+    RESTART_TIMEOUT,
+    deployment_description,
+    deployment_title
 )
 
 
@@ -35,11 +39,51 @@ def str_to_bool(value: str) -> bool:
     return value.lower() in ('true', '1', 'yes')
 
 
+def set_output(name: str, value: str) -> None:
+    """Set a step output (no-op outside GitHub Actions)."""
+    path = os.getenv('GITHUB_OUTPUT')
+    if path:
+        with open(path, 'a') as f:
+            f.write(f"{name}={value}\n")
+
+
+def workspace_path(path: Optional[str]) -> Optional[str]:
+    """Resolve a relative path against the workflow workspace, not the action directory."""
+    if not path or os.path.isabs(path):
+        return path
+    return os.path.join(os.getenv('GITHUB_WORKSPACE', os.getcwd()), path)
+
+
+def write_metrics(metrics: Metrics, logger: DeployLogger) -> None:
+    """Export metrics to the files requested through the action inputs."""
+    json_path = workspace_path(get_env('INPUT_METRICS_FILE', required=False))
+    prometheus_path = workspace_path(get_env('INPUT_METRICS_TEXTFILE', required=False))
+    try:
+        if json_path:
+            metrics.write_json(json_path)
+            logger.info(f"Metrics written to {json_path}")
+        if prometheus_path:
+            metrics.write_prometheus(prometheus_path)
+            logger.info(f"Prometheus metrics written to {prometheus_path}")
+    except OSError as e:
+        logger.warning(f"Could not write metrics: {e}")
+
+
 def main() -> int:
     """Main deployment orchestration."""
 
     # Create logger
     logger = create_logger()
+    metrics = Metrics()
+
+    try:
+        return deploy(logger, metrics)
+    finally:
+        write_metrics(metrics, logger)
+
+
+def deploy(logger: DeployLogger, metrics: Metrics) -> int:
+    """Run one deployment, recording phase timings in `metrics`."""
 
     try:
         # Read configuration from environment (set by GitHub Action)
@@ -51,6 +95,18 @@ def main() -> int:
         restart = str_to_bool(get_env('INPUT_RESTART', required=False) or 'false')
         skip_deploy = str_to_bool(get_env('INPUT_SKIP_DEPLOY', required=False) or 'false')
         deployment_type = (get_env('INPUT_DEPLOYMENT_TYPE', required=False) or 'application').lower()
+        max_retries = int(get_env('INPUT_MAX_RETRIES', required=False) or '3')
+        stream_logs = str_to_bool(get_env('INPUT_STREAM_LOGS', required=False) or 'false')
+        restart_timeout = int(get_env('INPUT_RESTART_TIMEOUT', required=False) or str(RESTART_TIMEOUT))
+        coalesce_window = float(get_env('INPUT_COALESCE_WINDOW', required=False) or '0')
+        commit_sha = get_env('INPUT_COMMIT_SHA', required=False)
+        skip_if_live = str_to_bool(get_env('INPUT_SKIP_IF_LIVE', required=False) or 'false')
+        if skip_if_live and not commit_sha:
+            # Only skip_if_live needs a commit; without it the trigger stays
+            # a plain deploy call with no title or description
+            commit_sha = get_env('GITHUB_SHA', required=False)
+        force = str_to_bool(get_env('INPUT_FORCE', required=False) or 'false')
+        cancel_on_abort = str_to_bool(get_env('INPUT_CANCEL_ON_ABORT', required=False) or 'false')
 
         # Validate deployment type
         if deployment_type not in ('application', 'compose'):
@@ -80,8 +136,8 @@ def main() -> int:
         logger.info(f"Restart after deploy: {restart}")
 
         # Initialize client and tracker
-        client = DokployClient(dokploy_url, auth_token, logger)
-        tracker = DeploymentTracker(client, logger)
+        client = DokployClient(dokploy_url, auth_token, logger, max_retries=max_retries, metrics=metrics)
+        tracker = DeploymentTracker(client, logger, stream_logs=stream_logs)
 
         # Skip deployment if requested
         if skip_deploy:
@@ -91,33 +147,60 @@ def main() -> int:
         # PHASE 1: Get baseline deployment (before triggering)
         # This is critical to identify which deployment we triggered
         logger.info("Getting current deployment state...")
-        if deployment_type == 'application':
-            deployments = client.get_deployments(service_id)
-        elif deployment_type == 'compose':
-            deployments = client.get_compose_deployments(service_id)
-
-        baseline_timestamp = None
-        if deployments:
-            latest = deployments[0]
-            baseline_timestamp = latest.get('createdAt')
+        with metrics.phase('baseline', service_name), logger.phase('baseline'):
+            baseline = tracker.take_baseline(service_id, deployment_type)
+        if baseline.latest:
+            latest = baseline.latest
             logger.info(
                 f"Latest deployment: {latest['deploymentId']} "
-                f"(status: {latest['status']}, created: {baseline_timestamp})"
+                f"(status: {latest['status']}, created: {latest.get('createdAt')})"
             )
         else:
             logger.info("No previous deployments found")
 
-        # PHASE 2: Trigger new deployment
-        if deployment_type == 'application':
-            client.deploy(service_id)
-        elif deployment_type == 'compose':
-            client.deploy_compose(service_id)
+        # Re-runs of a workflow for a commit that is already live need no build
+        live = baseline.live_deployment(commit_sha) if skip_if_live and not force else None
+        set_output('skipped', 'true' if live else 'false')
+        if live:
+            set_output('deployment_id', live['deploymentId'])
+            logger.success(
+                "Commit %s is already live (deployment %s, finished %s), skipping the build. "
+                "Set force: true to deploy anyway.",
+                commit_sha[:12], live['deploymentId'], live.get('finishedAt'),
+                deployment_id=live['deploymentId'], skipped=True
+            )
+            return 0
+
+        # PHASE 2: Trigger new deployment, unless one that has not started
+        # building yet will pick up this commit anyway
+        queued = tracker.queued_deployment(baseline, coalesce_window)
+        set_output('coalesced', 'true' if queued else 'false')
+        if queued:
+            queued_id = queued['deploymentId']
+            logger.info(
+                "Deployment %s is still queued (created %s) and will build the latest commit, "
+                "not triggering another build",
+                queued_id, queued.get('createdAt'),
+                deployment_id=queued_id, coalesced=True
+            )
+            set_output('deployment_id', queued_id)
+            baseline = baseline.without(queued_id)
+        else:
+            # The commit goes into the deployment's title and description, so
+            # later runs (and people looking at Dokploy) can tell what it built
+            title = deployment_title(commit_sha) if commit_sha else None
+            description = deployment_description(commit_sha) if commit_sha else None
+            with metrics.phase('trigger', service_name), logger.phase('trigger'):
+                if deployment_type == 'application':
+                    client.deploy(service_id, title=title, description=description)
+                elif deployment_type == 'compose':
+                    client.deploy_compose(service_id, title=title, description=description)
 
         # If not waiting for completion, exit now
         if not wait_for_completion:
             logger.info(
-                "Deployment triggered. Not waiting for completion "
-                "(wait_for_completion=false)"
+                "Deployment %s. Not waiting for completion (wait_for_completion=false)",
+                'queued' if queued else 'triggered'
             )
             logger.warning(
                 "⚠️  Action will exit without verifying deployment succeeded. "
@@ -125,17 +208,37 @@ def main() -> int:
             )
             return 0
 
+        def abandon(deployment_id: Optional[str] = None) -> None:
+            """With cancel_on_abort, free the build slot of the deployment we stop waiting for."""
+            if not cancel_on_abort:
+                return
+            if queued:
+                # Another run triggered it and may still be waiting for it
+                logger.info(f"Not cancelling deployment {queued['deploymentId']}: it was not triggered by this run")
+                return
+            # Interrupted tracking raises no ID, but the tracker saw it
+            outcome = tracker.cancel_build(
+                service_id, deployment_type, baseline, deployment_id or tracker.deployment_id
+            )
+            if outcome:
+                logger.warning(f"Deployment {outcome} (cancel_on_abort)")
+
         # PHASE 3: Track deployment to completion
-        with logger.group("Tracking deployment progress"):
+        # Build logs are printed as groups of their own, and groups cannot nest
+        tracking_group = nullcontext() if stream_logs else logger.group("Tracking deployment progress")
+        with tracking_group:
             try:
-                final_deployment = tracker.track_deployment(
-                    service_id=service_id,
-                    deployment_type=deployment_type,
-                    baseline_timestamp=baseline_timestamp,
-                    # timeout=600  # 10 minutes default for builds
-                )
+                with metrics.phase('track', service_name), logger.phase('track'):
+                    final_deployment = tracker.track_deployment(
+                        service_id=service_id,
+                        deployment_type=deployment_type,
+                        baseline=baseline,
+                        # timeout=600  # 10 minutes default for builds
+                    )
+                metrics.record_deployment(final_deployment, service_name)
 
                 deployment_id = final_deployment['deploymentId']
+                set_output('deployment_id', deployment_id)
                 logger.success(f"Deployment verified: {deployment_id}")
 
             except DeploymentNotFoundError as e:
@@ -147,6 +250,7 @@ def main() -> int:
                     "  2. Dokploy is experiencing issues\n"
                     "  3. The deployment was queued but hasn't started"
                 )
+                abandon()
                 return 1
 
             except DeploymentFailedError as e:
@@ -167,51 +271,33 @@ def main() -> int:
                     "  2. The deployment is stuck\n"
                     "  3. Dokploy is experiencing issues"
                 )
+                abandon(e.deployment_id)
                 return 1
 
+            except KeyboardInterrupt:
+                # Also what cancelling the workflow run sends
+                logger.warning("Deployment cancelled by user")
+                abandon()
+                return 130
+
         # PHASE 4: Optional restart
         # Only restart if explicitly requested AND deployment succeeded
         if restart:
             logger.info("Restart requested, stopping and starting service...")
 
-            with logger.group("Restarting service"):
+            with logger.group("Restarting service"), \
+                    metrics.phase('restart', service_name), logger.phase('restart'):
                 try:
-                    # Stop service
-                    if deployment_type == 'application':
-                        client.stop(service_id)
-                    elif deployment_type == 'compose':
-                        client.stop_compose(service_id)
-
-                    # Brief pause to ensure clean stop
-                    logger.info("Waiting 5 seconds for clean shutdown...")
-                    time.sleep(5)
-
-                    # Start with new version
-                    if deployment_type == 'application':
-                        client.start(service_id)
-                    elif deployment_type == 'compose':
-                        client.start_compose(service_id)
-
-                    # Verify service is running
-                    logger.info("Waiting 10 seconds for service to start...")
-                    time.sleep(10)
-
-                    if deployment_type == 'application':
-                        svc = client.get_application(service_id)
-                        status_key = 'applicationStatus'
-                    elif deployment_type == 'compose':
-                        svc = client.get_compose(service_id)
-                        status_key = 'composeStatus'
-
-                    svc_status = svc.get(status_key, 'unknown')
-
-                    if svc_status in ('done', 'running'):
-                        logger.success(f"Service restarted successfully (status: {svc_status})")
-                    else:
-                        logger.warning(
-                            f"Service restarted but status is '{svc_status}'. "
-                            "Please verify manually."
-                        )
+                    svc_status = tracker.restart_service(service_id, deployment_type, timeout=restart_timeout)
+                    logger.success(f"Service restarted successfully (status: {svc_status})")
+
+                except DeploymentTimeoutError as e:
+                    logger.warning(f"{e}. Please verify manually.")
+
+                except DeploymentFailedError as e:
+                    logger.error(f"Restart failed: {e}")
+                    logger.error("Deployment succeeded but the service did not come back up.")
+                    return 1
 
                 except DokployAPIError as e:
                     logger.error(f"Restart failed: {e}")
@@ -3,12 +3,19 @@ Deployment tracker for monitoring and verifying Dokploy deployments.
 Handles the critical logic of finding the triggered deployment and tracking it to completion.
 """
 
+import heapq
+import re
+import threading
 import time
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Any
 from .dokploy_client import DokployClient, DokployAPIError
 from .logger import DeployLogger
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from .log_stream import LogStreamer
+
 
 class DeploymentNotFoundError(Exception):
     """Raised when the triggered deployment cannot be found."""
@@ -25,27 +32,240 @@ class DeploymentFailedError(Exception):
 
 class DeploymentTimeoutError(Exception):
     """Raised when deployment times out."""
-    pass
+
+    def __init__(self, message: str, deployment_id: Optional[str] = None):
+        super().__init__(message)
+        # The deployment that was still in progress, if one was being tracked
+        self.deployment_id = deployment_id
+
+
+# Max seconds to wait for a triggered deployment to show up in the API
+CREATION_TIMEOUT = 240
+
+# Deployments read for a baseline snapshot. New deployments are listed first,
+# so only the newest entries matter; older history is never compared against.
+BASELINE_SIZE = 20
+
+
+# Default max seconds a restart waits for each of stop and start to settle
+RESTART_TIMEOUT = 60
+
+
+# Abbreviated or full commit hashes in a deployment's title or description
+_COMMIT_HASH = re.compile(r'\b[0-9a-f]{7,40}\b')
 
 
-class DeploymentTracker:
+def deployment_title(commit_sha: str) -> str:
+    """Title given to deployments triggered for a commit."""
+    return f"Deploy {commit_sha[:7]}"
+
+
+def deployment_description(commit_sha: str) -> str:
+    """Description given to deployments triggered for a commit; matched by carries_commit()."""
+    return f"Commit: {commit_sha}"
+
+
+def carries_commit(deployment: Dict[str, Any], commit_sha: str) -> bool:
     """
-    Tracks Dokploy deployments from trigger to completion.
+    Whether a deployment was made for commit_sha.
 
-    This class solves the race condition where the action would check applicationStatus
-    (which might be "done" from a previous deployment) instead of tracking the specific
-    deployment that was just triggered.
+    Matches a full or abbreviated (7+ characters) hash in the title or
+    description: ours carry "Commit: <sha>", and Dokploy's own git-triggered
+    deployments mention the commit there as well.
+    """
+    commit_sha = commit_sha.lower()
+    text = f"{deployment.get('title') or ''} {deployment.get('description') or ''}".lower()
+    return any(commit_sha.startswith(found) for found in _COMMIT_HASH.findall(text))
+
+
+def completion_timeout(total_timeout: int) -> int:
+    """Time left for the build once the deployment exists (at least 5 minutes)."""
+    return max(total_timeout - CREATION_TIMEOUT, 300)
+
+
+def get_poll_interval(count: int) -> int:
+    """Exponential backoff: 3s, 5s, 5s, 10s, 10s, 15s, 15s, 20s, 20s..."""
+    if count < 2:
+        return 3
+    elif count < 4:
+        return 5
+    elif count < 6:
+        return 10
+    elif count < 8:
+        return 15
+    else:
+        return 20
+
+
+def get_restart_poll_interval(count: int) -> float:
+    """Service status polls during a restart: 0.5s, 0.5s, 1s, 1s, 2s, 2s, then 5s."""
+    if count < 2:
+        return 0.5
+    elif count < 4:
+        return 1
+    elif count < 6:
+        return 2
+    else:
+        return 5
+
+
+class DeploymentProgress:
+    """Mutable per-deployment state while waiting for completion."""
+
+    def __init__(self, deployment_id: str):
+        self.deployment_id = deployment_id
+        self.last_status: Optional[str] = None
+        self.seen_running = False
+        self.poll_count = 0
+        # Local time the deployment was first seen running
+        self.running_since: Optional[float] = None
+        self.log_streamer: Optional['LogStreamer'] = None
+
+
+class BuildDurations:
+    """
+    How long an app's builds usually take, learned from past deployments.
 
-    Strategy:
-    1. Capture timestamp of latest deployment before triggering
-    2. Trigger new deployment
-    3. Poll for NEW deployment created after the baseline timestamp
-    4. Track that specific deployment by ID until completion
+    Used to schedule completion polls: sparse while the build cannot be done
+    yet, dense inside the window where past builds finished, and backing off
+    again if the build overruns. With too little history the fixed
+    get_poll_interval ladder is used instead.
+    """
+
+    # Finished builds needed before the history is trusted
+    MIN_SAMPLES = 3
+    # Poll interval bounds (seconds)
+    DENSE_MIN = 2
+    DENSE_MAX = 5
+    SPARSE_MAX = 30
+
+    def __init__(self, samples: List[float]):
+        self.samples = sorted(samples)
+
+    @classmethod
+    def from_deployments(
+        cls,
+        deployments: List[Dict[str, Any]],
+        parse: Callable[[Dict[str, Any], str], Optional[datetime]]
+    ) -> 'BuildDurations':
+        """Collect startedAt -> finishedAt of successful deployments."""
+        samples = []
+        for deployment in deployments:
+            if deployment.get('status') != 'done':
+                continue
+            started = parse(deployment, 'startedAt')
+            finished = parse(deployment, 'finishedAt')
+            if started and finished and finished > started:
+                samples.append((finished - started).total_seconds())
+        return cls(samples)
+
+    @property
+    def usable(self) -> bool:
+        return len(self.samples) >= self.MIN_SAMPLES
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile (q in 0..100)."""
+        index = max(0, min(len(self.samples) - 1, round(q / 100 * len(self.samples)) - 1))
+        return self.samples[index]
+
+    @property
+    def window(self) -> tuple:
+        """Seconds after start during which the build is expected to finish."""
+        return self.percentile(10) * 0.9, self.percentile(90) * 1.1
+
+    def poll_interval(self, running_for: float) -> float:
+        """Seconds until the next poll for a build that has run for running_for seconds."""
+        start, end = self.window
+        if running_for < start:
+            # Cannot be done yet: sleep towards the window, but still check
+            # now and then so an early failure is noticed
+            return max(self.DENSE_MIN, min(start - running_for, self.SPARSE_MAX))
+        if running_for <= end:
+            return max(self.DENSE_MIN, min((end - start) / 10, self.DENSE_MAX))
+        # Overrunning: back off gradually, like the fixed ladder does
+        return max(self.DENSE_MAX, min((running_for - end) / 2, 20))
+
+    def __str__(self) -> str:
+        if not self.usable:
+            return f"{len(self.samples)} past build(s), using default poll intervals"
+        start, end = self.window
+        return (
+            f"{len(self.samples)} past builds, median {self.percentile(50):.0f}s, "
+            f"expected to finish {start:.0f}-{end:.0f}s after start"
+        )
+
+
+class DeploymentBaseline:
+    """
+    Snapshot of the deployments that existed before a trigger.
+
+    Any deployment whose ID is not in the snapshot was created afterwards. This
+    does not depend on timestamps, so clock skew between the runner and the
+    Dokploy host cannot hide (or fake) a new deployment.
+    """
+
+    def __init__(
+        self,
+        deployments: List[Dict[str, Any]],
+        durations: Optional[BuildDurations] = None
+    ):
+        self.ids = frozenset(d['deploymentId'] for d in deployments)
+        self.latest: Optional[Dict[str, Any]] = deployments[0] if deployments else None
+        # What is live: the newest deployment that finished successfully
+        self.latest_done: Optional[Dict[str, Any]] = next(
+            (d for d in deployments if d.get('status') == 'done'), None
+        )
+        self.durations = durations
+
+    def __contains__(self, deployment_id: str) -> bool:
+        return deployment_id in self.ids
+
+    def without(self, deployment_id: str) -> 'DeploymentBaseline':
+        """Copy of the snapshot in which deployment_id counts as new, so it gets tracked."""
+        baseline = DeploymentBaseline([], self.durations)
+        baseline.ids = self.ids - {deployment_id}
+        baseline.latest = self.latest
+        baseline.latest_done = self.latest_done
+        return baseline
+
+    def live_deployment(self, commit_sha: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The latest successful deployment, if it was made for commit_sha."""
+        if commit_sha and self.latest_done and carries_commit(self.latest_done, commit_sha):
+            return self.latest_done
+        return None
+
+    def __str__(self) -> str:
+        if not self.latest:
+            return "no previous deployments"
+        return (
+            f"{len(self.ids)} known deployment(s), latest {self.latest['deploymentId']} "
+            f"(created: {self.latest.get('createdAt')})"
+        )
+
+
+class BaseDeploymentTracker:
+    """
+    Client-agnostic rules shared by DeploymentTracker and AsyncDeploymentTracker.
+
+    Decides what a poll result means (new deployment found, progress, success,
+    failure, what to cancel) without doing any I/O itself; the subclasses
+    fetch, sleep and call the client, blocking or with asyncio.
     """
 
-    def __init__(self, client: DokployClient, logger: DeployLogger):
+    def __init__(self, client: Any, logger: DeployLogger, stream_logs: bool = False):
+        # A DokployClient, or an AsyncDokployClient for the async tracker
         self.client = client
         self.logger = logger
+        self.stream_logs = stream_logs
+        # Finish printing the build log before reporting the result. The shared
+        # poll loop turns this off so one app's log does not hold up the others.
+        self.wait_for_logs = True
+        # The deployment this tracker last started tracking; cancel_build
+        # needs it when tracking was interrupted before returning it
+        self.deployment_id: Optional[str] = None
+        # Parsed timestamps per (deployment ID, field); deployment lists are
+        # re-fetched on every poll but each timestamp only needs parsing once
+        self._timestamps: Dict[tuple, Optional[datetime]] = {}
 
     def _parse_timestamp(self, timestamp: Optional[str]) -> Optional[datetime]:
         """Parse ISO timestamp string to datetime."""
@@ -57,45 +277,489 @@ class DeploymentTracker:
         except (ValueError, AttributeError):
             return None
 
+    def deployment_time(self, deployment: Dict[str, Any], field: str = 'createdAt') -> Optional[datetime]:
+        """Parsed timestamp field of a deployment, cached per deployment ID."""
+        key = (deployment['deploymentId'], field)
+        value = deployment.get(field)
+        if key not in self._timestamps and value:
+            self._timestamps[key] = self._parse_timestamp(value)
+        return self._timestamps.get(key)
+
+    def queued_deployment(self, baseline: DeploymentBaseline, window: float) -> Optional[Dict[str, Any]]:
+        """
+        The newest deployment, if it is still queued and at most `window` seconds old.
+
+        A queued ('idle') deployment has not cloned the repository yet, so it
+        will build the branch as it is when it starts, commits pushed since it
+        was queued included. Triggering another build would only repeat it;
+        the caller can track this one instead (see DeploymentBaseline.without).
+        The age is measured against the server's createdAt, so clock skew
+        between the two machines shifts the window.
+        """
+        latest = baseline.latest
+        if window <= 0 or not latest or latest.get('status') != 'idle':
+            return None
+        created = self.deployment_time(latest)
+        if created is None:
+            return None
+        age = (datetime.now(timezone.utc) - created).total_seconds()
+        return latest if age <= window else None
+
+    def baseline_from(self, deployments: List[Dict[str, Any]]) -> DeploymentBaseline:
+        """Build a baseline, including build durations, from already fetched deployments."""
+        durations = BuildDurations.from_deployments(deployments, self.deployment_time)
+        self.logger.debug("Build history: %s", durations)
+        return DeploymentBaseline(deployments, durations)
+
+    def next_poll_interval(
+        self,
+        progress: DeploymentProgress,
+        durations: Optional[BuildDurations] = None
+    ) -> float:
+        """
+        Seconds to wait before the next completion poll.
+
+        Follows the app's build history once the deployment is running and
+        enough history exists, otherwise the fixed get_poll_interval ladder.
+        """
+        if durations is None or not durations.usable or progress.running_since is None:
+            return get_poll_interval(progress.poll_count)
+        return durations.poll_interval(time.time() - progress.running_since)
+
+    def _start_logs(self, deployment: Dict[str, Any], progress: DeploymentProgress) -> None:
+        """Start printing the deployment's build log, if enabled and available."""
+        if not self.stream_logs or progress.log_streamer is not None:
+            return
+        log_path = deployment.get('logPath')
+        if not log_path:
+            return
+
+        # Imported here: the websocket client is only needed with stream_logs
+        from .log_stream import LogStreamer, open_log_source
+
+        self.logger.debug("Streaming build log: %s", log_path)
+        source = open_log_source(
+            self.client.base_url,
+            self.client.api_key,
+            log_path,
+            server_id=deployment.get('serverId')
+        )
+        progress.log_streamer = LogStreamer(
+            source,
+            self.logger,
+            f"Build log {progress.deployment_id}"
+        ).start()
+
+    def _stop_logs(self, progress: Optional[DeploymentProgress]) -> None:
+        """Stop the build log stream, printing what is left of it."""
+        if progress is not None and progress.log_streamer is not None:
+            progress.log_streamer.stop(wait=self.wait_for_logs)
+
+    def _check_progress(
+        self,
+        deployment: Optional[Dict[str, Any]],
+        progress: DeploymentProgress,
+        elapsed: int
+    ) -> bool:
+        """
+        Evaluate one poll result for the tracked deployment.
+
+        Args:
+            deployment: The tracked deployment as found in the latest poll
+            progress: State carried between polls
+            elapsed: Seconds since tracking started
+
+        Returns:
+            True if the deployment finished successfully, False if still in progress
+
+        Raises:
+            DeploymentNotFoundError: If the deployment disappeared
+            DeploymentFailedError: If deployment failed or was cancelled
+        """
+        deployment_id = progress.deployment_id
+
+        if not deployment:
+            raise DeploymentNotFoundError(
+                f"Deployment {deployment_id} disappeared from deployment list"
+            )
+
+        status = deployment['status']
+        error_message = deployment.get('errorMessage')
+
+        # Log status change
+        if status != progress.last_status:
+            self.logger.info(
+                "[%ds] Status: %s", elapsed, status,
+                deployment_id=deployment_id, status=status
+            )
+            progress.last_status = status
+
+        # Track if we've seen the deployment actually running
+        if status == 'running':
+            progress.seen_running = True
+            if progress.running_since is None:
+                progress.running_since = time.time()
+
+        if status != 'idle':
+            self._start_logs(deployment, progress)
+            if status in ('done', 'error', 'cancelled'):
+                self._stop_logs(progress)
+
+        # Check for terminal states
+        if status == 'done':
+            # CRITICAL FIX: Detect race condition
+            # If deployment shows "done" very quickly without ever being "running",
+            # we might be looking at a stale status from before the deployment started
+            if elapsed < 5 and not progress.seen_running:
+                self.logger.warning(
+                    f"Deployment marked 'done' after only {elapsed}s without "
+                    "entering 'running' state. This might be a race condition."
+                )
+
+            finished_at = deployment.get('finishedAt')
+            self.logger.success(
+                "Deployment completed successfully in %ds (finished: %s)", elapsed, finished_at,
+                deployment_id=deployment_id, status=status
+            )
+            return True
+
+        elif status == 'error':
+            error_detail = f": {error_message}" if error_message else ""
+            raise DeploymentFailedError(
+                f"Deployment {deployment_id} failed{error_detail}",
+                deployment=deployment
+            )
+
+        elif status == 'cancelled':
+            raise DeploymentFailedError(
+                f"Deployment {deployment_id} was cancelled",
+                deployment=deployment
+            )
+
+        # Check for stuck states
+        if status == 'idle' and elapsed > 120:
+            self.logger.warning(
+                f"Deployment stuck in 'idle' state for {elapsed}s. "
+                "It might be queued behind other deployments."
+            )
+
+        return False
+
     def _find_deployment_after(
         self,
         deployments: List[Dict[str, Any]],
-        baseline_timestamp: Optional[str]
+        baseline: Optional[DeploymentBaseline]
     ) -> Optional[Dict[str, Any]]:
         """
-        Find the first deployment created after the baseline timestamp.
+        Find the newest deployment that is not part of the baseline snapshot.
+
+        Deployments are listed newest first, so the scan stops at the first ID
+        already in the baseline: each poll costs O(new deployments), not
+        O(history).
 
         Args:
             deployments: List of deployments (newest first)
-            baseline_timestamp: ISO timestamp to compare against
+            baseline: Snapshot taken before the trigger
 
         Returns:
-            The newest deployment created after baseline, or None if not found
+            The newest new deployment, or None if not found
         """
-        if not deployments:
-            return None
+        for deployment in deployments:
+            if baseline is not None and deployment['deploymentId'] in baseline:
+                break
+            # Newest first: the first unknown ID is the newest new deployment
+            return deployment
 
-        # If no baseline, return the newest deployment
-        if not baseline_timestamp:
-            return deployments[0]
+        return None
 
-        baseline_dt = self._parse_timestamp(baseline_timestamp)
-        if not baseline_dt:
-            return deployments[0]
+    def _not_found_error(
+        self,
+        timeout: int,
+        baseline: Optional[DeploymentBaseline],
+        deployments: List[Dict[str, Any]]
+    ) -> DeploymentNotFoundError:
+        """Build the error raised when no new deployment shows up in time."""
+        error_msg = (
+            f"No new deployment appeared within {timeout} seconds. "
+            f"Baseline: {baseline or 'none'}"
+        )
 
-        # Find first deployment created after baseline
-        for deployment in deployments:
-            created_at = self._parse_timestamp(deployment.get('createdAt'))
-            if created_at and created_at > baseline_dt:
-                return deployment
+        if deployments:
+            latest = deployments[0]
+            error_msg += (
+                f"\n  Latest deployment in API: {latest['deploymentId']} "
+                f"(created: {latest.get('createdAt')})"
+            )
+
+        error_msg += (
+            "\n\nPossible causes:"
+            "\n  1. Deployment is queued and taking longer than expected"
+            "\n  2. Dokploy is under heavy load"
+            "\n  3. Application ID might be incorrect"
+        )
+
+        return DeploymentNotFoundError(error_msg)
+
+    def _report_new_deployment(
+        self,
+        deployments: List[Dict[str, Any]],
+        baseline: Optional[DeploymentBaseline],
+        elapsed: int,
+        poll_interval: float
+    ) -> Optional[Dict[str, Any]]:
+        """Evaluate one creation poll: the new deployment if it showed up, else None."""
+        new_deployment = self._find_deployment_after(deployments, baseline)
+        if new_deployment:
+            deployment_id = new_deployment['deploymentId']
+            self.logger.info(
+                "✓ Found new deployment: %s (detected after %ds)", deployment_id, elapsed,
+                deployment_id=deployment_id
+            )
+        else:
+            self.logger.debug("[%ds] No new deployment yet, waiting %ds...", elapsed, poll_interval)
+        return new_deployment
+
+    def _start_completion(self, deployment_id: str, timeout: int) -> DeploymentProgress:
+        """Announce tracking of a deployment and return its progress state."""
+        self.deployment_id = deployment_id
+        self.logger.info("Tracking deployment: %s", deployment_id, deployment_id=deployment_id)
+        self.logger.info("Timeout: %ds (~%d minutes)", timeout, timeout // 60)
+        return DeploymentProgress(deployment_id)
+
+    def _completion_timeout_error(self, progress: DeploymentProgress, timeout: int) -> DeploymentTimeoutError:
+        """Build the error raised when a tracked deployment does not finish in time."""
+        return DeploymentTimeoutError(
+            f"Deployment {progress.deployment_id} timed out after {timeout}s. "
+            f"Last status: {progress.last_status}",
+            deployment_id=progress.deployment_id
+        )
+
+    def _check_completion(
+        self,
+        deployments: List[Dict[str, Any]],
+        progress: DeploymentProgress,
+        elapsed: int
+    ) -> Optional[Dict[str, Any]]:
+        """Evaluate one completion poll: the deployment if it finished successfully, else None."""
+        deployment = next(
+            (d for d in deployments if d['deploymentId'] == progress.deployment_id),
+            None
+        )
+        return deployment if self._check_progress(deployment, progress, elapsed) else None
+
+    def _completion_wait(
+        self,
+        progress: DeploymentProgress,
+        durations: Optional[BuildDurations],
+        elapsed: int
+    ) -> float:
+        """Count a completion poll and return the seconds to wait before the next one."""
+        progress.poll_count += 1
+        interval = self.next_poll_interval(progress, durations)
+        self.logger.debug(
+            "[%ds] Status: %s, next poll in %.0fs", elapsed, progress.last_status, interval
+        )
+        return interval
+
+    def _status_of(self, service: Dict[str, Any], deployment_type: str) -> str:
+        """applicationStatus/composeStatus from a service's details."""
+        if deployment_type == 'compose':
+            return service.get('composeStatus', 'unknown')
+        return service.get('applicationStatus', 'unknown')
+
+    def _service_status_reached(self, service_id: str, status: str, targets: tuple) -> bool:
+        """
+        Evaluate one service status poll: True once `status` is one of `targets`.
 
+        Raises:
+            DeploymentFailedError: If the service status is 'error'
+        """
+        self.logger.debug("Service status: %s", status, status=status)
+        if status in targets:
+            return True
+        if status == 'error':
+            raise DeploymentFailedError(f"Service {service_id} status is 'error'")
+        return False
+
+    def _service_timeout_error(
+        self,
+        service_id: str,
+        targets: tuple,
+        timeout: float,
+        status: str
+    ) -> DeploymentTimeoutError:
+        """Build the error raised when a service does not settle in time."""
+        return DeploymentTimeoutError(
+            f"Service {service_id} did not reach '{'/'.join(targets)}' "
+            f"within {timeout:.0f}s. Last status: {status}"
+        )
+
+    def _cancel_target(
+        self,
+        service_id: str,
+        deployments: List[Dict[str, Any]],
+        baseline: Optional[DeploymentBaseline],
+        deployment_id: Optional[str]
+    ) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Find the deployment to cancel, and the other deployments queued around it.
+
+        The deployment is `deployment_id`, or else the only one not in
+        `baseline`. When several are missing from the baseline, other runs
+        triggered the rest and there is no telling which is ours, so nothing
+        is picked. The others are the queued ('idle') deployments listed
+        before it and the queue that continues after it, which ends at the
+        first deployment that started. When nothing is picked the reason is
+        logged.
+
+        Returns:
+            (deployment or None, list of other queued deployments)
+        """
+        if deployment_id:
+            index = next(
+                (i for i, d in enumerate(deployments) if d['deploymentId'] == deployment_id),
+                None
+            )
+        else:
+            new = 0
+            for deployment in deployments:
+                if baseline is not None and deployment['deploymentId'] in baseline:
+                    break
+                new += 1
+            if new > 1:
+                self.logger.warning(
+                    "Not cancelling: %d deployments of %s were created after the baseline "
+                    "and it is not known which one is ours", new, service_id
+                )
+                return None, []
+            index = 0 if new else None
+        if index is None:
+            self.logger.warning(
+                "Deployment of %s not found, leaving its queue alone", service_id
+            )
+            return None, []
+
+        queued = [d for d in deployments[:index] if d.get('status') == 'idle']
+        for deployment in deployments[index + 1:]:
+            if deployment.get('status') != 'idle':
+                break
+            queued.append(deployment)
+        return deployments[index], queued
+
+    def _cancel_step(
+        self,
+        service_id: str,
+        deployment: Optional[Dict[str, Any]],
+        queued: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """
+        What cancel_build should do with `deployment`: 'cancel', 'dequeue' or None.
+
+        cleanQueues empties the service's whole queue, so a queued deployment
+        is only dropped while it is the only one queued; builds other runs are
+        waiting for are never touched. When nothing is done the reason is
+        logged (by _cancel_target if there is no deployment).
+        """
+        if deployment is None:
+            return None
+
+        status = deployment.get('status')
+        if status == 'running':
+            return 'cancel'
+        if status == 'idle':
+            if queued:
+                self.logger.warning(
+                    "Not clearing the queue of %s: %d other deployment(s) are queued besides %s",
+                    service_id, len(queued), deployment['deploymentId']
+                )
+                return None
+            return 'dequeue'
+
+        self.logger.info(
+            "Deployment %s already finished (status: %s), nothing to cancel",
+            deployment['deploymentId'], status
+        )
         return None
 
+
+class DeploymentTracker(BaseDeploymentTracker):
+    """
+    Tracks Dokploy deployments from trigger to completion.
+
+    This class solves the race condition where the action would check applicationStatus
+    (which might be "done" from a previous deployment) instead of tracking the specific
+    deployment that was just triggered.
+
+    Strategy:
+    1. Snapshot the IDs of existing deployments before triggering (DeploymentBaseline)
+    2. Trigger new deployment
+    3. Poll for a deployment whose ID is not in the snapshot
+    4. Track that specific deployment by ID until completion
+    """
+
+    def take_baseline(self, service_id: str, deployment_type: str) -> DeploymentBaseline:
+        """
+        Snapshot the newest deployments of a service before triggering.
+
+        The same entries provide the build durations used to schedule polls.
+        """
+        if deployment_type == 'compose':
+            deployments = self.client.get_compose_deployments(service_id, limit=BASELINE_SIZE)
+        else:
+            deployments = self.client.get_deployments(service_id, limit=BASELINE_SIZE)
+        return self.baseline_from(deployments)
+
+    def _fetch_deployments(
+        self,
+        service_id: str,
+        deployment_type: str,
+        until: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get deployments using the correct endpoint for the deployment type.
+
+        The list is streamed, newest first, and reading stops right after the
+        first deployment for which until() returns True. Polls always bypass
+        the client's response cache.
+        """
+        deployments: List[Dict[str, Any]] = []
+        stream = self.client.iter_deployments(service_id, deployment_type)
+        try:
+            for deployment in stream:
+                deployments.append(deployment)
+                if until is not None and until(deployment):
+                    break
+        finally:
+            stream.close()
+        return deployments
+
+    def _poll(
+        self,
+        service_id: str,
+        deployment_type: str,
+        until: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch deployments for one poll, tolerating transient API failures.
+
+        Returns None when the poll failed with a retryable error (network error,
+        429/5xx after the client's own retries, or an open circuit breaker), so
+        the caller skips this poll instead of failing the whole tracking phase.
+        Timeouts still apply, so a server that stays down ends in a timeout.
+        """
+        try:
+            return self._fetch_deployments(service_id, deployment_type, until)
+        except DokployAPIError as e:
+            if not e.retryable:
+                raise
+            self.logger.warning("Poll failed, will try again: %s", e)
+            return None
+
     def wait_for_new_deployment(
         self,
         service_id: str,
         deployment_type: str,
-        baseline_timestamp: Optional[str],
+        baseline: Optional[DeploymentBaseline],
         timeout: int = 240
     ) -> Dict[str, Any]:
         """
@@ -107,7 +771,7 @@ class DeploymentTracker:
         Args:
             service_id: Application ID or Compose ID
             deployment_type: "application" or "compose"
-            baseline_timestamp: Timestamp of latest deployment before trigger
+            baseline: Deployments that existed before the trigger
             timeout: Max seconds to wait for deployment to appear (default 240s)
 
         Returns:
@@ -117,7 +781,7 @@ class DeploymentTracker:
             DeploymentNotFoundError: If no new deployment appears within timeout
         """
         self.logger.info("Waiting for deployment to be created...")
-        self.logger.debug(f"Baseline timestamp: {baseline_timestamp}")
+        self.logger.debug("Baseline: %s", baseline)
 
         start_time = time.time()
         poll_interval = 3  # Start with 3 second polls
@@ -128,71 +792,45 @@ class DeploymentTracker:
         while time.time() - start_time < timeout:
             elapsed = int(time.time() - start_time)
 
-            # Get deployments based on type
-            if deployment_type == 'application':
-                deployments = self.client.get_deployments(service_id)
-            elif deployment_type == 'compose':
-                deployments = self.client.get_compose_deployments(service_id)
+            # Newest first, so the first entry is either new or in the baseline
+            polled = self._poll(service_id, deployment_type, until=lambda d: True)
+            if polled is None:
+                time.sleep(poll_interval)
+                continue
+            deployments = polled
 
             # Debug: show latest deployment on first check and every 15s
             if elapsed - last_check_time >= 15 or last_check_time == 0:
                 if deployments:
                     latest = deployments[0]
                     self.logger.debug(
-                        f"[{elapsed}s] Latest deployment in API: {latest['deploymentId']} "
-                        f"(created: {latest.get('createdAt')}, status: {latest.get('status')})"
+                        "[%ds] Latest deployment in API: %s (created: %s, status: %s)",
+                        elapsed, latest['deploymentId'], latest.get('createdAt'), latest.get('status')
                     )
                 else:
-                    self.logger.debug(f"[{elapsed}s] No deployments found in API")
+                    self.logger.debug("[%ds] No deployments found in API", elapsed)
                 last_check_time = elapsed
 
-            new_deployment = self._find_deployment_after(deployments, baseline_timestamp)
-
+            new_deployment = self._report_new_deployment(deployments, baseline, elapsed, poll_interval)
             if new_deployment:
-                deployment_id = new_deployment['deploymentId']
-                self.logger.info(
-                    f"✓ Found new deployment: {deployment_id} (detected after {elapsed}s)"
-                )
                 return new_deployment
-
-            self.logger.debug(f"[{elapsed}s] No new deployment yet, waiting {poll_interval}s...")
             time.sleep(poll_interval)
 
-        # Timeout - provide more context
-        elapsed = int(time.time() - start_time)
-        error_msg = (
-            f"No new deployment appeared within {timeout} seconds. "
-            f"Baseline: {baseline_timestamp or 'none'}"
-        )
-
-        if deployments:
-            latest = deployments[0]
-            error_msg += (
-                f"\n  Latest deployment in API: {latest['deploymentId']} "
-                f"(created: {latest.get('createdAt')})"
-            )
-
-        error_msg += (
-            "\n\nPossible causes:"
-            "\n  1. Deployment is queued and taking longer than expected"
-            "\n  2. Dokploy is under heavy load"
-            "\n  3. Application ID might be incorrect"
-            "\n  4. Clock skew between systems"
-        )
-
-        raise DeploymentNotFoundError(error_msg)
+        raise self._not_found_error(timeout, baseline, deployments)
 
     def wait_for_completion(
         self,
         service_id: str,
         deployment_type: str,
         deployment_id: str,
-        timeout: int = 600
+        timeout: int = 600,
+        durations: Optional[BuildDurations] = None
     ) -> Dict[str, Any]:
         """
         Wait for a specific deployment to complete.
 
-        Polls the deployment status with smart backoff and detects:
+        Polls the deployment status with smart backoff (timed from the app's
+        past build durations when given) and detects:
         - Instant "done" (race condition - deployment never started)
         - Stuck in "idle" (queued but not processing)
         - Failed deployments
@@ -203,6 +841,7 @@ class DeploymentTracker:
             deployment_type: "application" or "compose"
             deployment_id: Specific deployment ID to track
             timeout: Max seconds to wait (default 10 minutes for builds)
+            durations: Past build durations of this service, if known
 
         Returns:
             Final deployment object
@@ -211,115 +850,35 @@ class DeploymentTracker:
             DeploymentFailedError: If deployment fails
             DeploymentTimeoutError: If deployment times out
         """
-        self.logger.info(f"Tracking deployment: {deployment_id}")
-        self.logger.info(f"Timeout: {timeout}s (~{timeout//60} minutes)")
-
         start_time = time.time()
-        last_status = None
-        seen_running = False
-        poll_count = 0
-
-        # Exponential backoff: 3s, 5s, 5s, 10s, 10s, 15s, 15s, 20s, 20s...
-        def get_poll_interval(count: int) -> int:
-            if count < 2:
-                return 3
-            elif count < 4:
-                return 5
-            elif count < 6:
-                return 10
-            elif count < 8:
-                return 15
-            else:
-                return 20
-
-        while True:
-            elapsed = int(time.time() - start_time)
-
-            # Check timeout
-            if elapsed >= timeout:
-                raise DeploymentTimeoutError(
-                    f"Deployment {deployment_id} timed out after {timeout}s. "
-                    f"Last status: {last_status}"
-                )
-
-            # Get all deployments and find ours (use correct method for type)
-            if deployment_type == 'application':
-                deployments = self.client.get_deployments(service_id)
-            elif deployment_type == 'compose':
-                deployments = self.client.get_compose_deployments(service_id)
-            deployment = next(
-                (d for d in deployments if d['deploymentId'] == deployment_id),
-                None
-            )
-
-            if not deployment:
-                raise DeploymentNotFoundError(
-                    f"Deployment {deployment_id} disappeared from deployment list"
-                )
-
-            status = deployment['status']
-            error_message = deployment.get('errorMessage')
-
-            # Log status change
-            if status != last_status:
-                self.logger.info(f"[{elapsed}s] Status: {status}")
-                last_status = status
-
-            # Track if we've seen the deployment actually running
-            if status == 'running':
-                seen_running = True
-
-            # Check for terminal states
-            if status == 'done':
-                # CRITICAL FIX: Detect race condition
-                # If deployment shows "done" very quickly without ever being "running",
-                # we might be looking at a stale status from before the deployment started
-                if elapsed < 5 and not seen_running:
-                    self.logger.warning(
-                        f"Deployment marked 'done' after only {elapsed}s without "
-                        "entering 'running' state. This might be a race condition."
-                    )
-
-                finished_at = deployment.get('finishedAt')
-                self.logger.success(
-                    f"Deployment completed successfully in {elapsed}s "
-                    f"(finished: {finished_at})"
-                )
-                return deployment
-
-            elif status == 'error':
-                error_detail = f": {error_message}" if error_message else ""
-                raise DeploymentFailedError(
-                    f"Deployment {deployment_id} failed{error_detail}",
-                    deployment=deployment
-                )
+        progress = self._start_completion(deployment_id, timeout)
 
-            elif status == 'cancelled':
-                raise DeploymentFailedError(
-                    f"Deployment {deployment_id} was cancelled",
-                    deployment=deployment
+        try:
+            while True:
+                elapsed = int(time.time() - start_time)
+                if elapsed >= timeout:
+                    raise self._completion_timeout_error(progress, timeout)
+
+                # Read the list only up to our deployment (use correct method for type)
+                deployments = self._poll(
+                    service_id,
+                    deployment_type,
+                    until=lambda d: d['deploymentId'] == deployment_id
                 )
+                if deployments is not None:
+                    deployment = self._check_completion(deployments, progress, elapsed)
+                    if deployment:
+                        return deployment
 
-            # Check for stuck states
-            if status == 'idle' and elapsed > 120:
-                self.logger.warning(
-                    f"Deployment stuck in 'idle' state for {elapsed}s. "
-                    "It might be queued behind other deployments."
-                )
-
-            # Wait before next poll
-            poll_count += 1
-            interval = get_poll_interval(poll_count)
-            self.logger.debug(
-                f"[{elapsed}s] Status: {status}, next poll in {interval}s"
-            )
-            time.sleep(interval)
+                time.sleep(self._completion_wait(progress, durations, elapsed))
+        finally:
+            self._stop_logs(progress)
 
     def track_deployment(
         self,
         service_id: str,
         deployment_type: str,
-        baseline_timestamp: Optional[str],
+        baseline: Optional[DeploymentBaseline],
         timeout: int = 600
     ) -> Dict[str, Any]:
         """
@@ -332,7 +891,7 @@ class DeploymentTracker:
         Args:
             service_id: Application ID or Compose ID
             deployment_type: "application" or "compose"
-            baseline_timestamp: Timestamp of latest deployment before trigger
+            baseline: Deployments that existed before the trigger
             timeout: Total timeout in seconds (default 10 minutes)
 
         Returns:
@@ -343,24 +902,600 @@ class DeploymentTracker:
             DeploymentFailedError: If deployment fails
             DeploymentTimeoutError: If deployment times out
         """
-        to = 240
+        to = CREATION_TIMEOUT
 
         # Phase 1: Wait for deployment to be created (max 240s for queued deployments)
         new_deployment = self.wait_for_new_deployment(
             service_id,
             deployment_type,
-            baseline_timestamp,
+            baseline,
             timeout=to,
         )
 
         deployment_id = new_deployment['deploymentId']
 
         # Phase 2: Wait for completion (remaining timeout)
-        remaining_timeout = max(timeout - to, 300)  # At least 5 minutes for build
+        remaining_timeout = completion_timeout(timeout)
 
         return self.wait_for_completion(
             service_id,
             deployment_type,
             deployment_id,
-            timeout=remaining_timeout
+            timeout=remaining_timeout,
+            durations=baseline.durations if baseline else None
         )
+
+    def service_status(self, service_id: str, deployment_type: str) -> str:
+        """Current applicationStatus/composeStatus of a service, bypassing the cache."""
+        if deployment_type == 'compose':
+            service = self.client.get_compose(service_id, refresh=True)
+        else:
+            service = self.client.get_application(service_id, refresh=True)
+        return self._status_of(service, deployment_type)
+
+    def wait_for_service_status(
+        self,
+        service_id: str,
+        deployment_type: str,
+        targets: tuple,
+        timeout: float = RESTART_TIMEOUT
+    ) -> str:
+        """
+        Poll the service until its status is one of `targets`.
+
+        Polls start every 0.5s and slow down to 5s (get_restart_poll_interval),
+        so a service that settles in a second or two is noticed right away.
+
+        Returns:
+            The status that was reached
+
+        Raises:
+            DeploymentFailedError: If the service status turns to 'error'
+            DeploymentTimeoutError: If no target status is reached in time
+        """
+        deadline = time.monotonic() + timeout
+        status = 'unknown'
+        count = 0
+
+        while True:
+            try:
+                status = self.service_status(service_id, deployment_type)
+            except DokployAPIError as e:
+                if not e.retryable:
+                    raise
+                self.logger.warning("Status check failed, will try again: %s", e)
+            else:
+                if self._service_status_reached(service_id, status, targets):
+                    return status
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._service_timeout_error(service_id, targets, timeout, status)
+            time.sleep(min(get_restart_poll_interval(count), remaining))
+            count += 1
+
+    def restart_service(
+        self,
+        service_id: str,
+        deployment_type: str,
+        timeout: float = RESTART_TIMEOUT
+    ) -> str:
+        """
+        Stop and start a service, waiting for each step to take effect.
+
+        Waits for status 'idle' after stopping and 'done' after starting, each
+        for at most `timeout` seconds.
+
+        Returns:
+            The service status after starting
+
+        Raises:
+            DokployAPIError: If a stop/start request fails
+            DeploymentFailedError: If the service status turns to 'error'
+            DeploymentTimeoutError: If the service does not settle in time
+        """
+        started = time.monotonic()
+
+        if deployment_type == 'compose':
+            self.client.stop_compose(service_id)
+        else:
+            self.client.stop(service_id)
+        self.wait_for_service_status(service_id, deployment_type, ('idle',), timeout)
+        self.logger.info("Service stopped after %.1fs", time.monotonic() - started)
+
+        if deployment_type == 'compose':
+            self.client.start_compose(service_id)
+        else:
+            self.client.start(service_id)
+        status = self.wait_for_service_status(service_id, deployment_type, ('done',), timeout)
+        self.logger.info("Service started after %.1fs", time.monotonic() - started)
+        return status
+
+    def cancel_build(
+        self,
+        service_id: str,
+        deployment_type: str,
+        baseline: Optional[DeploymentBaseline] = None,
+        deployment_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Stop a deployment we gave up on, so it does not hold a build slot.
+
+        The deployment is `deployment_id`, or else the one deployment that is
+        not in `baseline` (the one the trigger created); with several, which
+        one is ours is unknown and nothing is cancelled. A running deployment is
+        cancelled (cancelDeployment, or killBuild on servers without it). A
+        queued one is dropped with cleanQueues, but only while no other
+        deployment is queued: that call empties the whole queue. Deployments
+        that finished or cannot be found are left alone. Failures are logged,
+        not raised: this runs on the way out.
+
+        Returns:
+            'cancelled', 'killed', 'dequeued', or None if nothing was done
+        """
+        found: List[Dict[str, Any]] = []
+
+        def until(deployment: Dict[str, Any]) -> bool:
+            # Past ours, read on to the end of the queue
+            if found:
+                return deployment.get('status') != 'idle'
+            if deployment_id:
+                if deployment['deploymentId'] != deployment_id:
+                    return False
+            elif baseline is None or deployment['deploymentId'] not in baseline:
+                # Read every deployment the baseline lacks: only one may be ours
+                return False
+            found.append(deployment)
+            return deployment.get('status') != 'idle'
+
+        compose = deployment_type == 'compose'
+        try:
+            deployments = self._fetch_deployments(service_id, deployment_type, until)
+            deployment, queued = self._cancel_target(service_id, deployments, baseline, deployment_id)
+            step = self._cancel_step(service_id, deployment, queued)
+
+            if step == 'cancel':
+                try:
+                    if compose:
+                        self.client.cancel_compose_deployment(service_id)
+                    else:
+                        self.client.cancel_deployment(service_id)
+                    return 'cancelled'
+                except DokployAPIError as e:
+                    if e.retryable:
+                        raise
+                    self.logger.debug("cancelDeployment failed (%s), killing the build instead", e)
+                if compose:
+                    self.client.kill_compose_build(service_id)
+                else:
+                    self.client.kill_build(service_id)
+                return 'killed'
+
+            if step == 'dequeue':
+                if compose:
+                    self.client.clean_compose_queues(service_id)
+                else:
+                    self.client.clean_queues(service_id)
+                return 'dequeued'
+
+            return None
+
+        except DokployAPIError as e:
+            self.logger.warning("Could not cancel the deployment: %s", e)
+            return None
+
+
+class _TrackedEntry:
+    """One deployment registered with a MultiDeploymentTracker."""
+
+    def __init__(
+        self,
+        tracker: DeploymentTracker,
+        service_id: str,
+        deployment_type: str,
+        baseline: Optional[DeploymentBaseline],
+        timeout: int,
+        future: 'Future'
+    ):
+        self.tracker = tracker
+        self.service_id = service_id
+        self.deployment_type = deployment_type
+        self.baseline = baseline
+        self.timeout = timeout
+        self.future = future
+        self.started_at = time.time()
+        # Set once the new deployment has been found
+        self.progress: Optional[DeploymentProgress] = None
+        self.tracking_started_at: Optional[float] = None
+        self.last_deployments: List[Dict[str, Any]] = []
+
+    @property
+    def durations(self) -> Optional[BuildDurations]:
+        return self.baseline.durations if self.baseline else None
+
+    @property
+    def key(self):
+        return (self.deployment_type, self.service_id)
+
+
+class MultiDeploymentTracker:
+    """
+    Tracks many in-flight deployments from a single scheduler thread.
+
+    Instead of one sleeping loop per deployment, every tracked deployment is an
+    entry in a heap keyed by its next poll time. The scheduler wakes up for the
+    earliest due entry, collects every other entry due within a short batching
+    window, fetches each service's deployment list once (entries on the same
+    service share the response) and advances all of them together.
+
+    Thread count is fixed (one scheduler plus a small fetch pool) no matter how
+    many deployments are tracked. Each entry follows the same creation and
+    completion rules, poll ladder and timeouts as DeploymentTracker.
+    """
+
+    # Threads fetching deployment lists for one batch of due polls
+    FETCH_WORKERS = 4
+
+    def __init__(
+        self,
+        client: DokployClient,
+        logger: DeployLogger,
+        batch_window: float = 1.0,
+        fetch_workers: int = FETCH_WORKERS,
+        stream_logs: bool = False
+    ):
+        self.client = client
+        self.logger = logger
+        self.batch_window = batch_window
+        self.fetch_workers = fetch_workers
+        self.stream_logs = stream_logs
+        self.requests_made = 0
+
+        self._heap: List = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pool = None
+        self._closed = False
+        # Unresolved entries by (deployment_type, service_id)
+        self._tracking: Dict[tuple, _TrackedEntry] = {}
+
+    @property
+    def active_count(self) -> int:
+        """Number of deployments currently being tracked."""
+        with self._cond:
+            return len(self._heap)
+
+    def tracked_deployment_id(self, service_id: str, deployment_type: str) -> Optional[str]:
+        """ID of the deployment being tracked for a service, once it has been found."""
+        with self._cond:
+            entry = self._tracking.get((deployment_type, service_id))
+        return entry.tracker.deployment_id if entry else None
+
+    def track(
+        self,
+        service_id: str,
+        deployment_type: str,
+        baseline: Optional[DeploymentBaseline],
+        timeout: int = 600,
+        logger: Optional[DeployLogger] = None,
+        stream_logs: Optional[bool] = None
+    ) -> 'Future':
+        """
+        Register a triggered deployment and return a Future for its final state.
+
+        The future resolves to the final deployment object, or raises the same
+        errors as DeploymentTracker.track_deployment. stream_logs overrides
+        the tracker-wide setting for this deployment.
+        """
+        from concurrent.futures import Future
+
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        if stream_logs is None:
+            stream_logs = self.stream_logs
+        tracker = DeploymentTracker(self.client, logger or self.logger, stream_logs=stream_logs)
+        tracker.wait_for_logs = False
+        entry = _TrackedEntry(
+            tracker,
+            service_id,
+            deployment_type,
+            baseline,
+            timeout,
+            future
+        )
+        entry.tracker.logger.info("Waiting for deployment to be created...")
+        entry.tracker.logger.debug("Baseline: %s", baseline)
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MultiDeploymentTracker is closed")
+            # First poll right away, same as the single tracker
+            self._tracking[entry.key] = entry
+            self._schedule(entry, time.time())
+            self._ensure_running()
+            self._cond.notify()
+
+        return future
+
+    def track_deployment(
+        self,
+        service_id: str,
+        deployment_type: str,
+        baseline: Optional[DeploymentBaseline],
+        timeout: int = 600,
+        logger: Optional[DeployLogger] = None,
+        stream_logs: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Blocking drop-in for DeploymentTracker.track_deployment."""
+        return self.track(
+            service_id,
+            deployment_type,
+            baseline,
+            timeout=timeout,
+            logger=logger,
+            stream_logs=stream_logs
+        ).result()
+
+    def close(self) -> None:
+        """
+        Stop the scheduler.
+
+        Deployments still tracked resolve with DeploymentTimeoutError, so
+        nobody waits forever on their futures. The deployments themselves
+        keep building on the server.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        for entry in self._drain():
+            self._abandon(entry)
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _drain(self) -> List[_TrackedEntry]:
+        """Remove and return every scheduled entry."""
+        with self._cond:
+            entries = [entry for _, _, entry in self._heap]
+            self._heap = []
+        return entries
+
+    def _abandon(self, entry: _TrackedEntry) -> None:
+        """Resolve an entry whose tracking stopped because the tracker was closed."""
+        deployment_id = entry.progress.deployment_id if entry.progress else None
+        entry.tracker._stop_logs(entry.progress)
+        self._resolve(entry, error=DeploymentTimeoutError(
+            f"Stopped tracking deployment {deployment_id or 'of ' + entry.service_id} "
+            f"before it finished",
+            deployment_id=deployment_id
+        ))
+
+    def _schedule(self, entry: _TrackedEntry, due: float) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, entry))
+
+    def _ensure_running(self) -> None:
+        if self._thread is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.fetch_workers,
+                thread_name_prefix='dokdeploy-poll'
+            )
+            self._thread = threading.Thread(
+                target=self._run,
+                name='dokdeploy-tracker',
+                daemon=True
+            )
+            self._thread.start()
+
+    def _take_due(self) -> List[_TrackedEntry]:
+        """Block until at least one entry is due, then pop all due in the window."""
+        with self._cond:
+            while not self._closed:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                wait = self._heap[0][0] - time.time()
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+
+                cutoff = time.time() + self.batch_window
+                due = []
+                while self._heap and self._heap[0][0] <= cutoff:
+                    due.append(heapq.heappop(self._heap)[2])
+                return due
+
+        return []
+
+    def _run(self) -> None:
+        try:
+            self._loop()
+        finally:
+            # Entries rescheduled while close() was running
+            for entry in self._drain():
+                self._abandon(entry)
+
+    def _loop(self) -> None:
+        while True:
+            due = self._take_due()
+            if not due:
+                return
+
+            # One request per service, shared by every entry on that service
+            groups: Dict[Any, List[_TrackedEntry]] = {}
+            for entry in due:
+                groups.setdefault(entry.key, []).append(entry)
+
+            # Submitted under the lock: close() sets _closed before it shuts
+            # the pool down, so a submit never hits a closed pool
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    fetches = {
+                        key: self._pool.submit(
+                            entries[0].tracker._fetch_deployments,
+                            key[1],
+                            key[0],
+                            self._stop_condition(entries)
+                        )
+                        for key, entries in groups.items()
+                    }
+            if closed:
+                for entry in due:
+                    self._abandon(entry)
+                return
+            self.requests_made += len(fetches)
+            self.logger.debug(
+                "Polling %d service(s) for %d deployment(s)", len(fetches), len(due)
+            )
+
+            for key, entries in groups.items():
+                if fetches[key].cancelled():
+                    # close() dropped the fetch before it started
+                    for entry in entries:
+                        self._abandon(entry)
+                    continue
+                try:
+                    deployments = fetches[key].result()
+                except Exception as e:
+                    retryable = isinstance(e, DokployAPIError) and e.retryable
+                    for entry in entries:
+                        if retryable and not self._expired(entry):
+                            entry.tracker.logger.warning("Poll failed, will try again: %s", e)
+                            self._reschedule(entry)
+                        else:
+                            entry.tracker._stop_logs(entry.progress)
+                            self._resolve(entry, error=e)
+                    continue
+
+                for entry in entries:
+                    self._advance(entry, deployments)
+
+    @staticmethod
+    def _stop_condition(entries: List[_TrackedEntry]) -> Callable[[Dict[str, Any]], bool]:
+        """
+        Stop reading a shared deployment list once every entry has what it needs.
+
+        Entries still waiting for creation only need the newest deployment;
+        entries being tracked need their own deployment.
+        """
+        pending = {
+            entry.progress.deployment_id
+            for entry in entries
+            if entry.progress is not None
+        }
+
+        def until(deployment: Dict[str, Any]) -> bool:
+            pending.discard(deployment['deploymentId'])
+            return not pending
+
+        return until
+
+    def _resolve(
+        self,
+        entry: _TrackedEntry,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Complete an entry's future.
+
+        If its build log is still being printed, the future is completed once
+        that finishes, without holding up the scheduler thread.
+        """
+        with self._cond:
+            if self._tracking.get(entry.key) is entry:
+                del self._tracking[entry.key]
+
+        def finish():
+            if error is not None:
+                entry.future.set_exception(error)
+            else:
+                entry.future.set_result(result)
+
+        streamer = entry.progress.log_streamer if entry.progress else None
+        if streamer is None:
+            finish()
+            return
+
+        def finish_after_logs():
+            streamer.join()
+            finish()
+
+        threading.Thread(target=finish_after_logs, name='dokdeploy-logs-wait', daemon=True).start()
+
+    def _expired(self, entry: _TrackedEntry) -> bool:
+        """True once the entry's current phase has run out of time."""
+        now = time.time()
+        if entry.progress is None:
+            return now - entry.started_at >= CREATION_TIMEOUT
+        return now - entry.tracking_started_at >= completion_timeout(entry.timeout)
+
+    def _reschedule(self, entry: _TrackedEntry) -> None:
+        """Schedule the next poll after a failed one, following the poll schedule."""
+        if entry.progress is None:
+            interval = get_poll_interval(0)
+        else:
+            entry.progress.poll_count += 1
+            interval = entry.tracker.next_poll_interval(entry.progress, entry.durations)
+        with self._cond:
+            self._schedule(entry, time.time() + interval)
+
+    def _advance(self, entry: _TrackedEntry, deployments: List[Dict[str, Any]]) -> None:
+        """Apply one poll result to an entry and reschedule or resolve it."""
+        tracker = entry.tracker
+        now = time.time()
+
+        try:
+            if entry.progress is None:
+                elapsed = int(now - entry.started_at)
+                entry.last_deployments = deployments
+                new_deployment = tracker._find_deployment_after(
+                    deployments, entry.baseline
+                )
+
+                if not new_deployment:
+                    if now - entry.started_at >= CREATION_TIMEOUT:
+                        raise tracker._not_found_error(
+                            CREATION_TIMEOUT, entry.baseline, deployments
+                        )
+                    tracker.logger.debug("[%ds] No new deployment yet", elapsed)
+                    due = now + get_poll_interval(0)
+                else:
+                    deployment_id = new_deployment['deploymentId']
+                    tracker.logger.info(
+                        "✓ Found new deployment: %s (detected after %ds)", deployment_id, elapsed,
+                        deployment_id=deployment_id
+                    )
+                    entry.progress = tracker._start_completion(deployment_id, completion_timeout(entry.timeout))
+                    entry.tracking_started_at = now
+                    # Evaluate the same response right away
+                    self._advance(entry, deployments)
+                    return
+            else:
+                progress = entry.progress
+                elapsed = int(now - entry.tracking_started_at)
+                timeout = completion_timeout(entry.timeout)
+
+                if elapsed >= timeout:
+                    raise tracker._completion_timeout_error(progress, timeout)
+
+                deployment = tracker._check_completion(deployments, progress, elapsed)
+                if deployment:
+                    self._resolve(entry, result=deployment)
+                    return
+
+                due = now + tracker._completion_wait(progress, entry.durations, elapsed)
+
+        except Exception as e:
+            tracker._stop_logs(entry.progress)
+            self._resolve(entry, error=e)
+            return
+
+        with self._cond:
+            self._schedule(entry, due)
@@ -2,61 +2,681 @@
 Dokploy API client for triggering and monitoring deployments.
 """
 
-import requests
-from typing import Dict, List, Optional, Any
+import codecs
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Set, Tuple
 from .logger import DeployLogger
+from .metrics import Metrics
+
+# The GitHub Action runs without installing packages: fall back to the
+# standard-library transport when requests is missing (or when asked to)
+STDLIB_HTTP = os.environ.get('DOKDEPLOY_HTTP') == 'stdlib'
+if not STDLIB_HTTP:
+    try:
+        import requests
+    except ImportError:
+        STDLIB_HTTP = True
+if STDLIB_HTTP:
+    from . import http_stdlib as requests
+
+
+# Responses that usually mean "try again later" rather than "your request is wrong"
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+# Read size for streamed responses
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# After stopping early, read (and discard) at most this much of the rest of a
+# streamed body so the connection can go back to the pool; beyond that it is
+# cheaper to drop the connection
+STREAM_DRAIN_LIMIT = 256 * 1024
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Incrementally parse a top-level JSON array, yielding one element at a time.
+
+    Only the element being parsed is buffered, so memory stays constant however
+    long the array is, and the caller can stop consuming as soon as it has what
+    it needs.
+
+    Raises:
+        ValueError: If the input is not a JSON array or ends early
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    started = False
+
+    for chunk in chunks:
+        buf = buf[pos:] + text.decode(chunk)
+        pos = 0
+
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buf):
+                break
+
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+
+            if buf[pos] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Element continues in the next chunk
+                break
+            yield item
+            pos = end
+
+    raise ValueError("JSON array ended unexpectedly")
 
 
 class DokployAPIError(Exception):
     """Raised when Dokploy API returns an error."""
-    pass
 
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        # True for network errors and 429/502/503/504: the same call may succeed later
+        self.retryable = retryable
+
+
+class CircuitOpenError(DokployAPIError):
+    """Raised without contacting the server while its circuit breaker is open."""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=True)
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a Dokploy instance that keeps failing.
+
+    After `failure_threshold` consecutive transient failures the circuit opens
+    and every request fails fast with CircuitOpenError for `reset_timeout`
+    seconds. Then a single trial request is let through (half-open): success
+    closes the circuit, failure opens it again.
+
+    One breaker is shared by every client talking to the same base URL (see
+    get_circuit_breaker), so many concurrent trackers back off together.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: let exactly one trial request through
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial request is allowed."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Record a transient failure. Returns True if this opened the circuit."""
+        with self._lock:
+            self._failures += 1
+            was_trial = self._trial_in_flight
+            self._trial_in_flight = False
+            if was_trial or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    """Get the process-wide circuit breaker for a Dokploy instance."""
+    key = base_url.rstrip('/')
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker()
+        return _breakers[key]
+
+
+# Default request rate per Dokploy instance (requests per second, 0: no
+# limit; a 429 or Retry-After still pauses everyone) and burst
+DEFAULT_RATE_LIMIT = 0.0
+DEFAULT_RATE_BURST = 40
+
+# Longest Retry-After we wait for before retrying; a server asking for more
+# is treated as if it had asked for this long
+RETRY_AFTER_MAX = 60.0
+
+
+class RateLimiter:
+    """
+    Token-bucket limit on the requests sent to one Dokploy instance.
+
+    Tokens refill at `rate` per second up to `burst`. Each request reserves
+    the next token and waits until it is due, so callers that arrive together
+    (a poll round over many deployments) are spread out at the configured
+    rate instead of hitting the server at once, in arrival order.
+
+    After a 429 (or a Retry-After header) the server is given a pause:
+    hold() stops refilling until then and everyone waits it out.
+
+    One limiter is shared by every client talking to the same base URL (see
+    get_rate_limiter), sync and async alike.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_LIMIT, burst: int = DEFAULT_RATE_BURST):
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self.configure(rate, burst)
+        self._tokens = float(self.burst)
+        # Tokens were last refilled at this time; a later time is a pause
+        self._updated = time.monotonic()
+        # When hold() was last called; reservations made before it are void
+        self.held_at = float('-inf')
+        self.waited = 0.0
+
+    def configure(self, rate: float, burst: int) -> None:
+        """Change the rate (requests/second, 0 = unlimited) and burst size."""
+        with self._lock:
+            self.rate = max(0.0, float(rate))
+            self.burst = max(1, int(burst))
+            self._tokens = min(self._tokens, float(self.burst))
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last refill (none during a pause)."""
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before sending the request."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._updated - now)
+            if self.enabled:
+                self._refill(now)
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay += -self._tokens / self.rate
+            self.waited += delay
+            return delay
+
+    def hold(self, seconds: float) -> None:
+        """
+        Send nothing for `seconds`, then resume at the configured rate.
 
-class DokployClient:
-    """Client for interacting with Dokploy API."""
+        Callers already waiting reserve again (see acquire), so they are
+        spread out after the pause rather than all sent when it ends.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            until = now + seconds
+            if until > self._updated:
+                self._updated = until
+                self._tokens = 0.0
+                self.held_at = now
+
+    def paused_for(self) -> float:
+        """Seconds left of a pause requested by the server (0 if none)."""
+        with self._lock:
+            return max(0.0, self._updated - time.monotonic())
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            reserved_at = time.monotonic()
+            delay = self.reserve()
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+            # Queue again if a 429 paused the server while we slept
+            if self.held_at < reserved_at:
+                return waited
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(base_url: str) -> RateLimiter:
+    """Get the process-wide rate limiter for a Dokploy instance."""
+    key = base_url.rstrip('/')
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter()
+        return _limiters[key]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), capped."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        from email.utils import parsedate_to_datetime
+
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when is None:
+            return None
+        seconds = when.timestamp() - time.time()
+    return min(RETRY_AFTER_MAX, max(0.0, seconds))
+
+
+class ResponseCache:
+    """
+    Bounded in-memory TTL + LRU cache for read endpoints.
+
+    Entries are keyed by request path and tagged with the service ID they
+    describe, so a mutating call (deploy, stop, start, reload) can drop
+    everything cached for that service. Safe to share between threads.
+    """
+
+    MISS = object()
+
+    def __init__(self, ttl: float = 10.0, max_entries: int = 256):
+        from collections import OrderedDict
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[float, str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or ResponseCache.MISS if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return self.MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: str, value: Any, service_id: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, service_id, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, service_id: str) -> None:
+        """Drop every cached response about the given service."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e[1] == service_id]:
+                del self._entries[key]
+
+
+def create_session(api_key: str, pool_size: int = 10) -> requests.Session:
+    """
+    Create a keep-alive HTTP session for the Dokploy API.
+
+    The connection pool holds up to `pool_size` connections per host, so that
+    many threads can share one session without opening a new TCP/TLS
+    connection for every request.
+    """
+    if STDLIB_HTTP:
+        session = requests.Session(pool_maxsize=pool_size)
+    else:
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    session.headers.update({
+        'accept': 'application/json',
+        'Content-Type': 'application/json',
+        'x-api-key': api_key
+    })
+    return session
+
+
+def _deploy_payload(payload: Dict[str, Any], title: Optional[str], description: Optional[str]) -> Dict[str, Any]:
+    """Add the optional deployment title and description to a deploy request body."""
+    if title:
+        payload['title'] = title
+    if description:
+        payload['description'] = description
+    return payload
 
-    def __init__(self, base_url: str, api_key: str, logger: DeployLogger):
+
+class DokployClient:
+    """
+    Client for interacting with Dokploy API.
+
+    Idempotent GET requests are retried on network errors and 429/502/503/504
+    with jittered exponential backoff. Deploy triggers are retried only after
+    checking that the failed attempt did not create a deployment anyway.
+    Every request waits for the instance's shared RateLimiter; a 429 or a
+    Retry-After header pauses all clients of the instance.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        logger: DeployLogger,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 20.0,
+        timeout: float = 30.0,
+        session: Optional[requests.Session] = None,
+        cache: Optional[ResponseCache] = None,
+        metrics: Optional[Metrics] = None
+    ):
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.logger = logger
-        self.session = requests.Session()
-        self.session.headers.update({
-            'accept': 'application/json',
-            'Content-Type': 'application/json',
-            'x-api-key': api_key
-        })
-
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
-        """Make HTTP request to Dokploy API with error handling."""
-        url = f"{self.base_url}{endpoint}"
-
-        self.logger.debug(f"{method} {url}")
-        if 'json' in kwargs:
-            self.logger.debug(f"Request body: {kwargs['json']}")
-
-        try:
-            response = self.session.request(method, url, **kwargs)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.breaker = get_circuit_breaker(self.base_url)
+        # Shared with every other client of this instance (see get_rate_limiter)
+        self.limiter = get_rate_limiter(self.base_url)
+        # Deployment IDs seen in the latest listing per (type, service id),
+        # used to detect whether a failed trigger went through anyway
+        self._known_deployment_ids: Dict[Tuple[str, str], Set[str]] = {}
+        # Optional read cache; None disables caching
+        self.cache = cache
+        # Clients created by a DokployClientFactory share its pooled session
+        self.session = session or create_session(api_key)
+        # Optional request metrics; None disables recording
+        self.metrics = metrics
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for the given attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        retry: Optional[bool] = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Make HTTP request to Dokploy API with error handling.
 
-            self.logger.debug(f"Response status: {response.status_code}")
-            if response.text:
-                self.logger.debug(f"Response body: {response.text[:500]}")
+        Args:
+            method: HTTP method
+            endpoint: Path starting with /api/
+            retry: Retry transient failures; defaults to True for GET only.
+                An explicit False means the caller retries on its own, so a
+                transient failure is logged at info rather than as a warning
 
-            response.raise_for_status()
-            return response
+        Raises:
+            DokployAPIError: If the request fails (after retries, if enabled)
+            CircuitOpenError: If the server's circuit breaker is open
+        """
+        url = f"{self.base_url}{endpoint}"
+        caller_retries = retry is False
+        if retry is None:
+            retry = method == 'GET'
+        attempts = self.max_retries + 1 if retry else 1
+        kwargs.setdefault('timeout', self.timeout)
 
-        except requests.exceptions.HTTPError as e:
-            error_msg = f"API request failed: {e}"
-            if e.response is not None and e.response.text:
-                error_msg += f" - {e.response.text}"
-            self.logger.error(error_msg)
-            raise DokployAPIError(error_msg) from e
+        self.logger.debug("%s %s", method, url)
+        if 'json' in kwargs:
+            self.logger.debug("Request body: %s", kwargs['json'])
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    f"Circuit breaker open for {self.base_url} after repeated failures, "
+                    f"not sending {method} {endpoint} (retry in {self.breaker.retry_after():.0f}s)"
+                )
+
+            waited = self.limiter.acquire()
+            if waited:
+                self.logger.debug("Rate limited: waited %.2fs before %s %s", waited, method, endpoint)
+                if self.metrics:
+                    self.metrics.record_throttle(endpoint, waited)
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+
+                if self.metrics:
+                    self.metrics.record_request(
+                        method,
+                        endpoint,
+                        response.status_code,
+                        time.perf_counter() - started,
+                        # Streamed bodies are counted as they are read
+                        0 if kwargs.get('stream') else len(response.content)
+                    )
+
+                # Only decode the body when it is going to be printed; reading
+                # .text would also consume a streamed body
+                if self.logger.debug_enabled:
+                    self.logger.debug("Response status: %s", response.status_code)
+                    if not kwargs.get('stream') and response.content:
+                        self.logger.debug("Response body: %.500s", response.text)
+
+                response.raise_for_status()
+                self.breaker.record_success()
+                return response
+
+            except requests.exceptions.HTTPError as e:
+                cause = e
+                status = e.response.status_code if e.response is not None else None
+                retry_after = parse_retry_after(
+                    e.response.headers.get('Retry-After') if e.response is not None else None
+                )
+                error_msg = f"API request failed: {e}"
+                if e.response is not None and e.response.text:
+                    error_msg += f" - {e.response.text}"
+                error = DokployAPIError(
+                    error_msg,
+                    status_code=status,
+                    retryable=status in RETRYABLE_STATUS_CODES
+                )
+                if error.retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The server answered; it is up even if the request was wrong
+                    self.breaker.record_success()
+                if status == 429 or retry_after is not None:
+                    # Slow down every client of this instance, not just this request
+                    pause = retry_after if retry_after is not None else self._backoff(attempt)
+                    self.limiter.hold(pause)
+                    self.logger.debug("Server asked to slow down, pausing requests for %.1fs", pause)
+
+            except requests.exceptions.RequestException as e:
+                cause = e
+                error = DokployAPIError(f"Network error: {e}", retryable=True)
+                self.breaker.record_failure()
+                if self.metrics:
+                    self.metrics.record_request(method, endpoint, 'error', time.perf_counter() - started)
+
+            if error.retryable and attempt + 1 < attempts:
+                if self.metrics:
+                    self.metrics.record_retry(endpoint)
+                # The limiter is held after a 429/Retry-After, so the next
+                # attempt waits for the pause on its own
+                paused = self.limiter.paused_for()
+                delay = paused or self._backoff(attempt)
+                # Only the final failure is worth an annotation
+                self.logger.info(
+                    "%s %s failed (%s), retrying in %.1fs (attempt %d/%d)",
+                    method, endpoint, error, delay, attempt + 2, attempts
+                )
+                if not paused:
+                    time.sleep(delay)
+                continue
+
+            if error.retryable:
+                if caller_retries:
+                    self.logger.info(str(error))
+                else:
+                    self.logger.warning(str(error))
+            else:
+                self.logger.error(str(error))
+            raise error from cause
+
+    def _get_json(self, endpoint: str, service_id: str, refresh: bool = False) -> Any:
+        """
+        GET a read endpoint, going through the response cache if one is set.
 
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Network error: {e}"
-            self.logger.error(error_msg)
-            raise DokployAPIError(error_msg) from e
+        Args:
+            endpoint: Path including query string (also the cache key)
+            service_id: Service the response describes, for invalidation
+            refresh: Skip the cached value (the fresh response is still stored)
+        """
+        if self.cache is not None and not refresh:
+            cached = self.cache.get(endpoint)
+            if cached is not ResponseCache.MISS:
+                self.logger.debug("Cache hit: %s", endpoint)
+                return cached
+
+        data = self._make_request('GET', endpoint).json()
+        if self.cache is not None:
+            self.cache.put(endpoint, data, service_id)
+        return data
+
+    def _invalidate(self, service_id: str) -> None:
+        """Forget cached reads for a service after a mutating call."""
+        if self.cache is not None:
+            self.cache.invalidate(service_id)
+
+    def _remember_deployments(
+        self,
+        deployment_type: str,
+        service_id: str,
+        deployments: List[Dict[str, Any]]
+    ) -> None:
+        """Record the deployment IDs from a listing for duplicate-trigger checks."""
+        ids = self._known_deployment_ids.setdefault((deployment_type, service_id), set())
+        ids.update(d['deploymentId'] for d in deployments)
+
+    def _list_deployments(self, deployment_type: str, service_id: str) -> List[Dict[str, Any]]:
+        """Newest deployment only; enough to tell whether a trigger went through."""
+        if deployment_type == 'compose':
+            return self.get_compose_deployments(service_id, limit=1)
+        return self.get_deployments(service_id, limit=1)
+
+    def _trigger(
+        self,
+        endpoint: str,
+        payload: Dict[str, Any],
+        deployment_type: str,
+        service_id: str
+    ) -> None:
+        """
+        POST a deploy trigger, retrying transient failures without duplicating builds.
 
-    def deploy(self, application_id: str) -> None:
+        A deploy POST is not idempotent: if the connection drops after the server
+        accepted it, blindly retrying queues a second build. So before each retry
+        the newest deployment is compared with the ones seen before the trigger;
+        an unknown deployment ID means the failed attempt went through.
+        """
+        key = (deployment_type, service_id)
+        if self.max_retries and key not in self._known_deployment_ids:
+            # Callers normally fetched a baseline already; this is the fallback
+            self._list_deployments(deployment_type, service_id)
+        # A copy: the re-list below records the new ID in the shared set too
+        known = set(self._known_deployment_ids.get(key, ()))
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._make_request('POST', endpoint, json=payload, retry=False)
+                self._invalidate(service_id)
+                return
+            except CircuitOpenError:
+                raise
+            except DokployAPIError as e:
+                if not e.retryable:
+                    raise
+                if attempt >= self.max_retries:
+                    self.logger.warning(str(e))
+                    raise
+
+            time.sleep(self._backoff(attempt))
+
+            try:
+                current = self._list_deployments(deployment_type, service_id)
+            except DokployAPIError:
+                # Cannot tell whether it went through; do not risk a duplicate
+                raise DokployAPIError(
+                    f"Deploy trigger for {service_id} failed and the deployment list "
+                    "could not be checked for a duplicate",
+                    retryable=True
+                )
+
+            if current and current[0]['deploymentId'] not in known:
+                self.logger.info("Deploy trigger failed but a new deployment was created, not retrying")
+                self._invalidate(service_id)
+                return
+
+            self.logger.info(
+                "Deploy trigger failed and no new deployment appeared, retrying (attempt %d/%d)",
+                attempt + 2, self.max_retries + 1
+            )
+
+    def deploy(
+        self,
+        application_id: str,
+        title: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> None:
         """
         Trigger deployment for an application.
 
@@ -65,21 +685,29 @@ class DokployClient:
 
         Args:
             application_id: The Dokploy application ID
+            title: Title shown for the deployment in Dokploy (optional)
+            description: Description of the deployment, e.g. the commit (optional)
 
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.info(f"Triggering deployment for application: {application_id}")
+        self.logger.info("Triggering deployment for application: %s", application_id)
 
-        self._make_request(
-            'POST',
+        self._trigger(
             '/api/application.deploy',
-            json={'applicationId': application_id}
+            _deploy_payload({'applicationId': application_id}, title, description),
+            'application',
+            application_id
         )
 
         self.logger.info("Deployment triggered successfully")
 
-    def deploy_compose(self, compose_id: str) -> None:
+    def deploy_compose(
+        self,
+        compose_id: str,
+        title: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> None:
         """
         Trigger deployment for a compose service.
 
@@ -88,26 +716,142 @@ class DokployClient:
 
         Args:
             compose_id: The Dokploy compose ID
+            title: Title shown for the deployment in Dokploy (optional)
+            description: Description of the deployment, e.g. the commit (optional)
 
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.info(f"Triggering deployment for compose: {compose_id}")
+        self.logger.info("Triggering deployment for compose: %s", compose_id)
 
-        self._make_request(
-            'POST',
+        self._trigger(
             '/api/compose.deploy',
-            json={'composeId': compose_id}
+            _deploy_payload({'composeId': compose_id}, title, description),
+            'compose',
+            compose_id
         )
 
         self.logger.info("Compose deployment triggered successfully")
 
-    def get_deployments(self, application_id: str) -> List[Dict[str, Any]]:
+    def iter_deployments(
+        self,
+        service_id: str,
+        deployment_type: str = 'application'
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream deployments for a service, newest first, one at a time.
+
+        The response is parsed incrementally, so stopping early (break, or
+        closing the generator) skips downloading and decoding the rest of the
+        list. Always bypasses the response cache.
+
+        Args:
+            service_id: The Dokploy application or compose ID
+            deployment_type: 'application' or 'compose'
+
+        Yields:
+            Deployment objects (see get_deployments)
+
+        Raises:
+            DokployAPIError: If the API request fails or the body is not a JSON array
+        """
+        if deployment_type == 'compose':
+            endpoint = f'/api/deployment.allByCompose?composeId={service_id}'
+        else:
+            endpoint = f'/api/deployment.all?applicationId={service_id}'
+
+        response = self._make_request('GET', endpoint, stream=True)
+        received = 0
+
+        def read_chunks() -> Iterator[bytes]:
+            nonlocal received
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                received += len(chunk)
+                yield chunk
+
+        chunks = read_chunks()
+        count = 0
+        try:
+            for deployment in iter_json_array(chunks):
+                count += 1
+                yield deployment
+        except ValueError as e:
+            raise DokployAPIError(f"Invalid deployment list from {endpoint}: {e}") from e
+        except requests.exceptions.RequestException as e:
+            raise DokployAPIError(f"Network error: {e}", retryable=True) from e
+        finally:
+            self._release_stream(response, chunks)
+            if self.metrics:
+                self.metrics.record_bytes(endpoint, received)
+            self.logger.debug("Read %d deployments from stream", count)
+
+    def _release_stream(self, response: requests.Response, chunks: Iterator[bytes]) -> None:
+        """Finish a streamed response, keeping the connection if the rest is small."""
+        drained = 0
+        try:
+            for chunk in chunks:
+                drained += len(chunk)
+                if drained > STREAM_DRAIN_LIMIT:
+                    break
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+        # Fully-read responses release the connection to the pool, otherwise
+        # the socket is closed
+        response.close()
+
+    def _read_deployments(
+        self,
+        service_id: str,
+        deployment_type: str,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        stream = self.iter_deployments(service_id, deployment_type)
+        try:
+            return list(itertools.islice(stream, limit))
+        finally:
+            stream.close()
+
+    def find_deployment(
+        self,
+        service_id: str,
+        deployment_id: str,
+        deployment_type: str = 'application'
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a single deployment by ID.
+
+        Stops reading the deployment list as soon as the match is found, which
+        for a deployment being tracked is usually the first entry.
+
+        Returns:
+            The deployment, or None if it is not in the list
+
+        Raises:
+            DokployAPIError: If the API request fails
+        """
+        stream = self.iter_deployments(service_id, deployment_type)
+        try:
+            for deployment in stream:
+                if deployment['deploymentId'] == deployment_id:
+                    return deployment
+            return None
+        finally:
+            stream.close()
+
+    def get_deployments(
+        self,
+        application_id: str,
+        refresh: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Get all deployments for an application, sorted by creation time (newest first).
 
         Args:
             application_id: The Dokploy application ID
+            refresh: Bypass the response cache (always fetch from the server)
+            limit: Only return the newest N deployments. The response is streamed
+                and parsing stops after N entries; the cache is not used.
 
         Returns:
             List of deployment objects with fields:
@@ -122,24 +866,34 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.debug(f"Fetching deployments for application: {application_id}")
-
-        response = self._make_request(
-            'GET',
-            f'/api/deployment.all?applicationId={application_id}'
-        )
-
-        deployments = response.json()
-        self.logger.debug(f"Found {len(deployments)} deployments")
+        self.logger.debug("Fetching deployments for application: %s", application_id)
+
+        if limit is not None:
+            deployments = self._read_deployments(application_id, 'application', limit)
+        else:
+            deployments = self._get_json(
+                f'/api/deployment.all?applicationId={application_id}',
+                application_id,
+                refresh=refresh
+            )
+        self._remember_deployments('application', application_id, deployments)
+        self.logger.debug("Found %d deployments", len(deployments))
 
         return deployments
 
-    def get_compose_deployments(self, compose_id: str) -> List[Dict[str, Any]]:
+    def get_compose_deployments(
+        self,
+        compose_id: str,
+        refresh: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Get all deployments for a compose service, sorted by creation time (newest first).
 
         Args:
             compose_id: The Dokploy compose ID
+            refresh: Bypass the response cache (always fetch from the server)
+            limit: Only return the newest N deployments (see get_deployments)
 
         Returns:
             List of deployment objects with same structure as application deployments
@@ -147,24 +901,28 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.debug(f"Fetching deployments for compose: {compose_id}")
-
-        response = self._make_request(
-            'GET',
-            f'/api/deployment.allByCompose?composeId={compose_id}'
-        )
-
-        deployments = response.json()
-        self.logger.debug(f"Found {len(deployments)} compose deployments")
+        self.logger.debug("Fetching deployments for compose: %s", compose_id)
+
+        if limit is not None:
+            deployments = self._read_deployments(compose_id, 'compose', limit)
+        else:
+            deployments = self._get_json(
+                f'/api/deployment.allByCompose?composeId={compose_id}',
+                compose_id,
+                refresh=refresh
+            )
+        self._remember_deployments('compose', compose_id, deployments)
+        self.logger.debug("Found %d compose deployments", len(deployments))
 
         return deployments
 
-    def get_application(self, application_id: str) -> Dict[str, Any]:
+    def get_application(self, application_id: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Get application details.
 
         Args:
             application_id: The Dokploy application ID
+            refresh: Bypass the response cache (always fetch from the server)
 
         Returns:
             Application object with fields like:
@@ -174,21 +932,21 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.debug(f"Fetching application details: {application_id}")
+        self.logger.debug("Fetching application details: %s", application_id)
 
-        response = self._make_request(
-            'GET',
-            f'/api/application.one?applicationId={application_id}'
+        return self._get_json(
+            f'/api/application.one?applicationId={application_id}',
+            application_id,
+            refresh=refresh
         )
 
-        return response.json()
-
-    def get_compose(self, compose_id: str) -> Dict[str, Any]:
+    def get_compose(self, compose_id: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Get compose service details.
 
         Args:
             compose_id: The Dokploy compose ID
+            refresh: Bypass the response cache (always fetch from the server)
 
         Returns:
             Compose object with fields like:
@@ -198,15 +956,14 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.debug(f"Fetching compose details: {compose_id}")
+        self.logger.debug("Fetching compose details: %s", compose_id)
 
-        response = self._make_request(
-            'GET',
-            f'/api/compose.one?composeId={compose_id}'
+        return self._get_json(
+            f'/api/compose.one?composeId={compose_id}',
+            compose_id,
+            refresh=refresh
         )
 
-        return response.json()
-
     def reload(self, application_id: str, app_name: str) -> None:
         """
         Reload an application.
@@ -218,7 +975,7 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.info(f"Triggering reload for application: {app_name}")
+        self.logger.info("Triggering reload for application: %s", app_name)
 
         self._make_request(
             'POST',
@@ -228,6 +985,7 @@ class DokployClient:
                 'appName': app_name
             }
         )
+        self._invalidate(application_id)
 
         self.logger.info("Reload triggered successfully")
 
@@ -241,13 +999,14 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.info(f"Stopping application: {application_id}")
+        self.logger.info("Stopping application: %s", application_id)
 
         self._make_request(
             'POST',
             '/api/application.stop',
             json={'applicationId': application_id}
         )
+        self._invalidate(application_id)
 
         self.logger.info("Application stopped successfully")
 
@@ -261,13 +1020,14 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.info(f"Starting application: {application_id}")
+        self.logger.info("Starting application: %s", application_id)
 
         self._make_request(
             'POST',
             '/api/application.start',
             json={'applicationId': application_id}
         )
+        self._invalidate(application_id)
 
         self.logger.info("Application started successfully")
 
@@ -281,13 +1041,14 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.info(f"Stopping compose: {compose_id}")
+        self.logger.info("Stopping compose: %s", compose_id)
 
         self._make_request(
             'POST',
             '/api/compose.stop',
             json={'composeId': compose_id}
         )
+        self._invalidate(compose_id)
 
         self.logger.info("Compose stopped successfully")
 
@@ -301,12 +1062,239 @@ class DokployClient:
         Raises:
             DokployAPIError: If the API request fails
         """
-        self.logger.info(f"Starting compose: {compose_id}")
+        self.logger.info("Starting compose: %s", compose_id)
 
         self._make_request(
             'POST',
             '/api/compose.start',
             json={'composeId': compose_id}
         )
+        self._invalidate(compose_id)
 
         self.logger.info("Compose started successfully")
+
+    def cancel_deployment(self, application_id: str) -> None:
+        """
+        Cancel the deployment an application is building right now.
+
+        Args:
+            application_id: The Dokploy application ID
+
+        Raises:
+            DokployAPIError: If the API request fails
+        """
+        self.logger.info("Cancelling deployment of application: %s", application_id)
+
+        self._make_request(
+            'POST',
+            '/api/application.cancelDeployment',
+            json={'applicationId': application_id}
+        )
+        self._invalidate(application_id)
+
+        self.logger.info("Deployment cancelled")
+
+    def cancel_compose_deployment(self, compose_id: str) -> None:
+        """
+        Cancel the deployment a compose service is building right now.
+
+        Args:
+            compose_id: The Dokploy compose ID
+
+        Raises:
+            DokployAPIError: If the API request fails
+        """
+        self.logger.info("Cancelling deployment of compose: %s", compose_id)
+
+        self._make_request(
+            'POST',
+            '/api/compose.cancelDeployment',
+            json={'composeId': compose_id}
+        )
+        self._invalidate(compose_id)
+
+        self.logger.info("Compose deployment cancelled")
+
+    def kill_build(self, application_id: str) -> None:
+        """
+        Kill the build process of an application (for servers without cancelDeployment).
+
+        Args:
+            application_id: The Dokploy application ID
+
+        Raises:
+            DokployAPIError: If the API request fails
+        """
+        self.logger.info("Killing build of application: %s", application_id)
+
+        self._make_request(
+            'POST',
+            '/api/application.killBuild',
+            json={'applicationId': application_id}
+        )
+        self._invalidate(application_id)
+
+        self.logger.info("Build killed")
+
+    def kill_compose_build(self, compose_id: str) -> None:
+        """
+        Kill the build process of a compose service (for servers without cancelDeployment).
+
+        Args:
+            compose_id: The Dokploy compose ID
+
+        Raises:
+            DokployAPIError: If the API request fails
+        """
+        self.logger.info("Killing build of compose: %s", compose_id)
+
+        self._make_request(
+            'POST',
+            '/api/compose.killBuild',
+            json={'composeId': compose_id}
+        )
+        self._invalidate(compose_id)
+
+        self.logger.info("Compose build killed")
+
+    def clean_queues(self, application_id: str) -> None:
+        """
+        Drop every queued deployment of an application that has not started building.
+
+        Args:
+            application_id: The Dokploy application ID
+
+        Raises:
+            DokployAPIError: If the API request fails
+        """
+        self.logger.info("Clearing deployment queue of application: %s", application_id)
+
+        self._make_request(
+            'POST',
+            '/api/application.cleanQueues',
+            json={'applicationId': application_id}
+        )
+        self._invalidate(application_id)
+
+        self.logger.info("Deployment queue cleared")
+
+    def clean_compose_queues(self, compose_id: str) -> None:
+        """
+        Drop every queued deployment of a compose service that has not started building.
+
+        Args:
+            compose_id: The Dokploy compose ID
+
+        Raises:
+            DokployAPIError: If the API request fails
+        """
+        self.logger.info("Clearing deployment queue of compose: %s", compose_id)
+
+        self._make_request(
+            'POST',
+            '/api/compose.cleanQueues',
+            json={'composeId': compose_id}
+        )
+        self._invalidate(compose_id)
+
+        self.logger.info("Compose deployment queue cleared")
+
+
+class DokployClientFactory:
+    """
+    Creates DokployClients for one Dokploy instance that share a single pooled
+    HTTP session (and, if enabled, one response cache).
+
+    Use one factory per CLI invocation: every app gets its own client (and
+    logger), but all of them reuse the same keep-alive connections instead of
+    paying a fresh TCP and TLS handshake each.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        cache_ttl: float = 0,
+        metrics: Optional[Metrics] = None,
+        rate_limit: Optional[float] = None,
+        rate_burst: Optional[int] = None
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self.session = create_session(api_key, pool_size)
+        # Read cache shared by all clients; disabled unless cache_ttl > 0
+        self.cache = ResponseCache(ttl=cache_ttl) if cache_ttl > 0 else None
+        # The instance's process-wide limiter, configured from these settings
+        self.limiter = get_rate_limiter(base_url)
+        self.set_rate_limit(rate_limit, rate_burst)
+
+    def set_rate_limit(self, rate_limit: Optional[float] = None, rate_burst: Optional[int] = None) -> None:
+        """Configure the instance's rate limiter; None means the default."""
+        self.limiter.configure(
+            DEFAULT_RATE_LIMIT if rate_limit is None else rate_limit,
+            DEFAULT_RATE_BURST if rate_burst is None else rate_burst
+        )
+
+    def client(self, logger: DeployLogger) -> DokployClient:
+        """Create a client that logs through `logger` and uses the shared pool."""
+        return DokployClient(
+            self.base_url,
+            self.api_key,
+            logger,
+            max_retries=self.max_retries,
+            session=self.session,
+            cache=self.cache,
+            metrics=self.metrics
+        )
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Connection pool statistics.
+
+        Returns:
+            Dict with 'connections' (opened), 'requests' (sent) and 'reused'
+            (requests that went over an already open connection)
+        """
+        connections = requests_sent = 0
+        if STDLIB_HTTP:
+            # The standard-library transport keeps the counters on the session
+            connections = self.session.num_connections
+            requests_sent = self.session.num_requests
+        for adapter in set(getattr(self.session, 'adapters', {}).values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                requests_sent += pool.num_requests
+
+        return {
+            'connections': connections,
+            'requests': requests_sent,
+            'reused': max(0, requests_sent - connections),
+        }
+
+    def log_pool_stats(self, logger: DeployLogger) -> None:
+        """Write pool statistics to the debug log."""
+        stats = self.pool_stats()
+        logger.debug(
+            "HTTP pool: %d request(s) over %d connection(s) (%d reused, pool size %d)",
+            stats['requests'], stats['connections'], stats['reused'], self.pool_size
+        )
+        if self.cache is not None:
+            logger.debug("Response cache: %d hit(s), %d miss(es)", self.cache.hits, self.cache.misses)
+        if self.limiter.waited:
+            logger.debug(
+                "Rate limit: requests waited %.1fs in total (%g/s, burst %d)",
+                self.limiter.waited, self.limiter.rate, self.limiter.burst
+            )
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
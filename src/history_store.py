@@ -0,0 +1,277 @@
+"""
+Local deployment history database.
+
+Keeps a copy of every deployment seen for each app in SQLite (next to the
+config file, ~/.dokploy/history.db by default) so `dokdeploy history` can
+filter and page through it without downloading the whole deployment list
+every time. Syncing is incremental: the deployment list is streamed newest
+first and reading stops at the first deployment already stored in a final
+state.
+"""
+
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .dokploy_client import DokployClient
+
+
+# Deployments in these states never change again
+TERMINAL_STATUSES = ('done', 'error', 'cancelled')
+
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deployments (
+    deployment_id   TEXT PRIMARY KEY,
+    service_id      TEXT NOT NULL,
+    deployment_type TEXT NOT NULL,
+    status          TEXT,
+    created_at      TEXT,
+    started_at      TEXT,
+    finished_at     TEXT,
+    data            TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deployments_service_created
+    ON deployments (service_id, created_at DESC);
+CREATE TABLE IF NOT EXISTS sync_state (
+    service_id TEXT PRIMARY KEY,
+    synced_at  TEXT NOT NULL
+);
+"""
+
+_RELATIVE_TIME = re.compile(r'^(\d+)([mhdw])$')
+_RELATIVE_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def normalize_timestamp(value: Optional[str]) -> Optional[str]:
+    """
+    Convert an API timestamp to UTC 'YYYY-MM-DDTHH:MM:SS.ffffffZ'.
+
+    All stored timestamps use this one format, so they sort and compare
+    correctly as plain strings. Unparseable values are kept as they are.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def parse_time_filter(value: str) -> str:
+    """
+    Parse a --since/--until value into a normalized UTC timestamp.
+
+    Accepts a relative age ('30m', '12h', '7d', '2w') or an ISO date or
+    datetime ('2024-05-01', '2024-05-01T12:00'). Dates without a timezone are
+    taken as UTC.
+
+    Raises:
+        ValueError: If the value is not in a supported format
+    """
+    match = _RELATIVE_TIME.match(value.strip())
+    if match:
+        amount, unit = match.groups()
+        moment = datetime.now(timezone.utc) - timedelta(**{_RELATIVE_UNITS[unit]: int(amount)})
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(
+            f"Invalid time '{value}': use a date (2024-05-01), a datetime "
+            f"(2024-05-01T12:00) or an age such as 12h or 7d"
+        )
+    return normalize_timestamp(value)
+
+
+class HistoryStore:
+    """SQLite store of deployment history, synced incrementally from Dokploy."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.row_factory = sqlite3.Row
+        self._migrate()
+
+    def __enter__(self) -> 'HistoryStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database."""
+        self._db.close()
+
+    def _migrate(self) -> None:
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        if version < _SCHEMA_VERSION:
+            with self._db:
+                self._db.executescript(_SCHEMA)
+                self._db.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
+
+    def sync(
+        self,
+        client: DokployClient,
+        service_id: str,
+        deployment_type: str = 'application'
+    ) -> int:
+        """
+        Fetch deployments newer than what is stored.
+
+        Reading stops at the first deployment already stored in a final state,
+        unless deployments stored while still in progress remain to be
+        refreshed; those are read up to as well.
+
+        Returns:
+            Number of deployments that were not stored before
+
+        Raises:
+            DokployAPIError: If the API request fails
+        """
+        unfinished = {
+            row['deployment_id']: row['created_at']
+            for row in self._db.execute(
+                'SELECT deployment_id, created_at FROM deployments '
+                'WHERE service_id = ? AND status NOT IN (?, ?, ?)',
+                (service_id, *TERMINAL_STATUSES)
+            )
+        }
+        oldest_unfinished = min(filter(None, unfinished.values()), default=None)
+
+        fetched: List[Dict[str, Any]] = []
+        new_count = 0
+        stream = client.iter_deployments(service_id, deployment_type)
+        try:
+            for deployment in stream:
+                deployment_id = deployment['deploymentId']
+                stored = self._db.execute(
+                    'SELECT status FROM deployments WHERE deployment_id = ?',
+                    (deployment_id,)
+                ).fetchone()
+
+                if stored is not None and stored['status'] in TERMINAL_STATUSES:
+                    created_at = normalize_timestamp(deployment.get('createdAt'))
+                    if not unfinished or (
+                        oldest_unfinished and created_at and created_at < oldest_unfinished
+                    ):
+                        break
+
+                unfinished.pop(deployment_id, None)
+                if stored is None:
+                    new_count += 1
+                fetched.append(deployment)
+        finally:
+            stream.close()
+
+        self._store(service_id, deployment_type, fetched)
+        return new_count
+
+    def _store(
+        self,
+        service_id: str,
+        deployment_type: str,
+        deployments: Iterable[Dict[str, Any]]
+    ) -> None:
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO deployments '
+                '(deployment_id, service_id, deployment_type, status, '
+                ' created_at, started_at, finished_at, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        d['deploymentId'],
+                        service_id,
+                        deployment_type,
+                        d.get('status'),
+                        normalize_timestamp(d.get('createdAt')),
+                        normalize_timestamp(d.get('startedAt')),
+                        normalize_timestamp(d.get('finishedAt')),
+                        json.dumps(d),
+                    )
+                    for d in deployments
+                ]
+            )
+            self._db.execute(
+                'INSERT OR REPLACE INTO sync_state (service_id, synced_at) VALUES (?, ?)',
+                (service_id, datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ'))
+            )
+
+    def last_synced(self, service_id: str) -> Optional[str]:
+        """When the service was last synced (UTC timestamp), or None if never."""
+        row = self._db.execute(
+            'SELECT synced_at FROM sync_state WHERE service_id = ?',
+            (service_id,)
+        ).fetchone()
+        return row['synced_at'] if row else None
+
+    def _where(
+        self,
+        service_id: str,
+        since: Optional[str],
+        until: Optional[str],
+        statuses: Optional[List[str]]
+    ) -> tuple:
+        clauses = ['service_id = ?']
+        params: List[Any] = [service_id]
+        if since:
+            clauses.append('created_at >= ?')
+            params.append(since)
+        if until:
+            clauses.append('created_at < ?')
+            params.append(until)
+        if statuses:
+            clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        return ' AND '.join(clauses), params
+
+    def query(
+        self,
+        service_id: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Stored deployments of a service, newest first.
+
+        Args:
+            service_id: Application or compose ID
+            since: Only deployments created at or after this (normalized) time
+            until: Only deployments created before this (normalized) time
+            statuses: Only deployments in one of these statuses
+            limit: Return at most this many
+            offset: Skip this many first
+
+        Returns:
+            Deployment objects as returned by the API
+        """
+        where, params = self._where(service_id, since, until, statuses)
+        sql = f'SELECT data FROM deployments WHERE {where} ORDER BY created_at DESC'
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend([limit, offset])
+        return [json.loads(row['data']) for row in self._db.execute(sql, params)]
+
+    def count(
+        self,
+        service_id: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        statuses: Optional[List[str]] = None
+    ) -> int:
+        """Number of stored deployments matching the same filters as query()."""
+        where, params = self._where(service_id, since, until, statuses)
+        return self._db.execute(f'SELECT COUNT(*) FROM deployments WHERE {where}', params).fetchone()[0]
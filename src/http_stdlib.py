@@ -0,0 +1,308 @@
+"""
+Standard-library HTTP transport with the subset of the `requests` API that
+DokployClient uses.
+
+The GitHub Action runs on whatever Python the runner has, without installing
+packages, so DokployClient falls back to this module when `requests` is not
+importable (or when DOKDEPLOY_HTTP=stdlib). It keeps connections alive per
+host like a requests.Session with an HTTPAdapter pool, and honors the
+HTTP(S)_PROXY / NO_PROXY environment variables, including user:pass@
+credentials in the proxy URL.
+"""
+
+import base64
+import http.client
+import json as jsonlib
+import os
+import select
+import ssl
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urlencode, urlsplit
+
+
+class RequestException(IOError):
+    """Base class for transport errors, like requests.exceptions.RequestException."""
+
+    def __init__(self, *args, response: Optional['Response'] = None):
+        super().__init__(*args)
+        self.response = response
+
+
+class ConnectionError(RequestException):
+    """The connection could not be made or was lost."""
+
+
+class Timeout(RequestException):
+    """The server did not answer in time."""
+
+
+class HTTPError(RequestException):
+    """The server answered with a 4xx or 5xx status."""
+
+
+# Mirrors requests.exceptions, so callers can write `requests.exceptions.HTTPError`
+exceptions = SimpleNamespace(
+    RequestException=RequestException,
+    ConnectionError=ConnectionError,
+    Timeout=Timeout,
+    HTTPError=HTTPError,
+)
+
+_HostKey = Tuple[str, str, int]
+
+# Methods that may be sent again when a reused connection drops mid-request
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class Response:
+    """An HTTP response; the body is read lazily when streamed."""
+
+    def __init__(
+        self,
+        session: 'Session',
+        key: _HostKey,
+        conn: http.client.HTTPConnection,
+        raw: http.client.HTTPResponse,
+        url: str
+    ):
+        self._session = session
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self.raw = raw
+        self.url = url
+        self.status_code = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers
+        self._content: Optional[bytes] = None
+
+    def _release(self) -> None:
+        """Return the connection to the pool once the body has been read."""
+        if self._conn is not None:
+            self._session._release(self._key, self._conn, reusable=not self.raw.will_close)
+            self._conn = None
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """Yield the body in chunks of at most chunk_size bytes."""
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start:start + chunk_size]
+            return
+        try:
+            while True:
+                chunk = self.raw.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            raise ConnectionError(f"Error reading response from {self.url}: {e}") from e
+        self._release()
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = b''.join(self.iter_content(64 * 1024))
+        return self._content
+
+    @property
+    def text(self) -> str:
+        charset = self.headers.get_content_charset() or 'utf-8'
+        return self.content.decode(charset, errors='replace')
+
+    def json(self) -> Any:
+        return jsonlib.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if 400 <= self.status_code < 600:
+            kind = 'Client' if self.status_code < 500 else 'Server'
+            raise HTTPError(
+                f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}",
+                response=self
+            )
+
+    def close(self) -> None:
+        """Close the response; an unread body means the connection is dropped."""
+        if self._conn is not None:
+            self._session._release(self._key, self._conn, reusable=False)
+            self._conn = None
+        self.raw.close()
+
+
+class Session:
+    """Keep-alive connection pool with a requests.Session-like request() method."""
+
+    def __init__(self, pool_maxsize: int = 10):
+        self.headers: Dict[str, str] = {'User-Agent': 'dokdeploy'}
+        self.pool_maxsize = pool_maxsize
+        self._idle: Dict[_HostKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        # Same counters as urllib3's pools, for DokployClientFactory.pool_stats()
+        self.num_connections = 0
+        self.num_requests = 0
+
+    def _connect(self, key: _HostKey, timeout: Optional[float]) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        proxy = _proxy_for(scheme, host)
+        if scheme == 'https':
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            if proxy:
+                # CONNECT through the proxy, then TLS to the server
+                conn = http.client.HTTPSConnection(
+                    proxy.hostname, proxy.port or 80, timeout=timeout, context=self._ssl_context
+                )
+                conn.set_tunnel(host, port, headers=_proxy_headers(proxy))
+            else:
+                conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        elif proxy:
+            conn = http.client.HTTPConnection(proxy.hostname, proxy.port or 80, timeout=timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        with self._lock:
+            self.num_connections += 1
+        return conn
+
+    def _acquire(self, key: _HostKey) -> Optional[http.client.HTTPConnection]:
+        """An idle pooled connection that the server has not closed, if any."""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                conn = idle.pop()
+            if conn.sock is not None and not _is_dropped(conn.sock):
+                return conn
+            conn.close()
+
+    def _release(self, key: _HostKey, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable and conn.sock is not None:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.pool_maxsize:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[bytes] = None,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Any = None,
+        stream: bool = False
+    ) -> Response:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise RequestException(f"Unsupported URL scheme: {url}")
+        key = (scheme, parts.hostname or '', parts.port or (443 if scheme == 'https' else 80))
+
+        path = parts.path or '/'
+        query = parts.query
+        if params:
+            query = f"{query}&{urlencode(params)}" if query else urlencode(params)
+        if query:
+            path = f"{path}?{query}"
+
+        request_headers = dict(self.headers)
+        request_headers.update(headers or {})
+        if json is not None:
+            data = jsonlib.dumps(json).encode('utf-8')
+            request_headers['Content-Type'] = 'application/json'
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        # Plain HTTP goes through a proxy with absolute request URLs
+        proxy = _proxy_for(scheme, key[1]) if scheme == 'http' else None
+        target = url if proxy else path
+        if proxy:
+            request_headers.update(_proxy_headers(proxy))
+
+        if isinstance(timeout, tuple):
+            timeout = max(t for t in timeout if t is not None) if any(timeout) else None
+
+        conn = self._acquire(key)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self._connect(key, timeout)
+            else:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+            sent = False
+            try:
+                conn.request(method, target, body=data, headers=request_headers)
+                sent = True
+                raw = conn.getresponse()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                # The server may close an idle keep-alive connection just as we
+                # use it. Retry once on a new connection if sending failed, or
+                # if repeating the request is harmless: once sent, a POST may
+                # have been processed (a deploy trigger would build twice).
+                if reused and (not sent or method in IDEMPOTENT_METHODS):
+                    conn, reused = None, False
+                    continue
+                raise ConnectionError(f"Connection to {parts.netloc} failed: {e}") from e
+            except TimeoutError as e:
+                conn.close()
+                raise Timeout(f"Request to {url} timed out ({timeout}s)") from e
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise ConnectionError(f"Connection to {parts.netloc} failed: {e}") from e
+
+        with self._lock:
+            self.num_requests += 1
+
+        response = Response(self, key, conn, raw, url)
+        if not stream:
+            # Read the body now, which also frees the connection
+            response.content
+        return response
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+def _is_dropped(sock) -> bool:
+    """An idle keep-alive socket that is readable has been closed by the server."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def _proxy_headers(proxy) -> Dict[str, str]:
+    """Proxy-Authorization for credentials in the proxy URL (user:pass@host), like requests."""
+    if proxy.username is None:
+        return {}
+    credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+    return {'Proxy-Authorization': 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')}
+
+
+def _proxy_for(scheme: str, host: str):
+    """Parsed proxy URL from the environment for this scheme and host, or None."""
+    proxy = os.environ.get(f'{scheme}_proxy') or os.environ.get(f'{scheme.upper()}_PROXY')
+    if not proxy:
+        return None
+    no_proxy = os.environ.get('no_proxy') or os.environ.get('NO_PROXY') or ''
+    for entry in (e.strip().lstrip('.') for e in no_proxy.split(',')):
+        if entry == '*' or (entry and (host == entry or host.endswith('.' + entry))):
+            return None
+    if '://' not in proxy:
+        proxy = f'http://{proxy}'
+    return urlsplit(proxy)
@@ -0,0 +1,430 @@
+"""
+Live build-log streaming for tracked deployments.
+
+Dokploy serves a deployment's build log over a websocket at
+/listen-deployment?logPath=<logPath>: it tails the log file and sends new output
+as text messages. This module implements the small part of the websocket
+protocol needed to read that stream with the standard library, plus a local
+file source used when the log file is readable from this machine (a runner on
+the Dokploy host, or a local stand-in for testing).
+
+Lines are printed in fixed-size chunks, each as its own collapsible group, so
+status lines from the tracker never end up in the middle of a chunk.
+"""
+
+import base64
+import codecs
+import hashlib
+import os
+import secrets
+import socket
+import ssl
+import struct
+import threading
+import time
+from typing import List, Optional
+from urllib.parse import quote, urlsplit
+
+from .logger import DeployLogger
+
+
+class LogStreamError(Exception):
+    """Raised when the log stream cannot be opened or breaks."""
+    pass
+
+
+# Websocket opcodes (RFC 6455)
+_OP_CONTINUATION = 0x0
+_OP_TEXT = 0x1
+_OP_BINARY = 0x2
+_OP_CLOSE = 0x8
+_OP_PING = 0x9
+_OP_PONG = 0xA
+
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# Bytes read from the socket or file at a time
+READ_SIZE = 64 * 1024
+
+
+class WebSocketLogSource:
+    """
+    Reads a deployment log from Dokploy's /listen-deployment websocket.
+
+    Frame payloads are handed out as they arrive rather than reassembled, so
+    memory use does not depend on how much the server sends in one message.
+    The socket is only read when the consumer asks for more data, which lets
+    TCP flow control slow the server down if output cannot keep up.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        log_path: str,
+        server_id: Optional[str] = None,
+        connect_timeout: float = 10
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.log_path = log_path
+        self.server_id = server_id
+        self.connect_timeout = connect_timeout
+
+        self._sock: Optional[socket.socket] = None
+        self._buf = b''
+        self._remaining = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._closed = False
+
+    def _connect(self) -> None:
+        parts = urlsplit(self.base_url)
+        secure = parts.scheme == 'https'
+        host = parts.hostname
+        port = parts.port or (443 if secure else 80)
+
+        path = f"{parts.path}/listen-deployment?logPath={quote(self.log_path, safe='')}"
+        if self.server_id:
+            path += f"&serverId={quote(self.server_id, safe='')}"
+
+        try:
+            sock = socket.create_connection((host, port), timeout=self.connect_timeout)
+            if secure:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        except OSError as e:
+            raise LogStreamError(f"Cannot connect to log stream at {host}:{port}: {e}") from e
+
+        key = base64.b64encode(secrets.token_bytes(16)).decode()
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+            f"x-api-key: {self.api_key}\r\n"
+            "\r\n"
+        )
+
+        try:
+            sock.sendall(request.encode())
+            response = b''
+            while b'\r\n\r\n' not in response:
+                data = sock.recv(4096)
+                if not data:
+                    raise LogStreamError("Log stream closed during handshake")
+                response += data
+                if len(response) > 65536:
+                    raise LogStreamError("Log stream handshake response too large")
+        except OSError as e:
+            sock.close()
+            raise LogStreamError(f"Log stream handshake failed: {e}") from e
+
+        head, self._buf = response.split(b'\r\n\r\n', 1)
+        lines = head.decode('latin-1').split('\r\n')
+        status_line = lines[0]
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        expected = base64.b64encode(
+            hashlib.sha1((key + _WS_GUID).encode()).digest()
+        ).decode()
+        if ' 101 ' not in f"{status_line} " or headers.get('sec-websocket-accept') != expected:
+            sock.close()
+            raise LogStreamError(f"Log stream rejected: {status_line}")
+
+        self._sock = sock
+
+    def _send(self, opcode: int, payload: bytes = b'') -> None:
+        """Send one (masked, as clients must) control frame."""
+        mask = secrets.token_bytes(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        frame = bytes([0x80 | opcode, 0x80 | len(payload)]) + mask + masked
+        try:
+            self._sock.sendall(frame)
+        except OSError:
+            pass
+
+    def _parse_header(self):
+        """Return (opcode, payload length, header length), or None if incomplete."""
+        buf = self._buf
+        if len(buf) < 2:
+            return None
+        opcode = buf[0] & 0x0F
+        if buf[1] & 0x80:
+            raise LogStreamError("Server sent a masked frame")
+        length = buf[1] & 0x7F
+        offset = 2
+        if length == 126:
+            if len(buf) < 4:
+                return None
+            length = struct.unpack('!H', buf[2:4])[0]
+            offset = 4
+        elif length == 127:
+            if len(buf) < 10:
+                return None
+            length = struct.unpack('!Q', buf[2:10])[0]
+            offset = 10
+        return opcode, length, offset
+
+    def _fill(self, timeout: float) -> Optional[bool]:
+        """Read more bytes. Returns False on timeout, None if the peer closed."""
+        self._sock.settimeout(timeout)
+        try:
+            data = self._sock.recv(READ_SIZE)
+        except socket.timeout:
+            return False
+        except OSError as e:
+            raise LogStreamError(f"Log stream broke: {e}") from e
+        if not data:
+            return None
+        self._buf += data
+        return True
+
+    def read(self, timeout: float) -> Optional[str]:
+        """
+        Return the next piece of log text.
+
+        Returns '' if nothing arrived within timeout, and None once the server
+        has closed the stream.
+
+        Raises:
+            LogStreamError: If the connection cannot be opened or breaks
+        """
+        if self._closed:
+            return None
+        if self._sock is None:
+            self._connect()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._remaining and self._buf:
+                payload = self._buf[:self._remaining]
+                self._buf = self._buf[len(payload):]
+                self._remaining -= len(payload)
+                text = self._decoder.decode(payload)
+                if text:
+                    return text
+                continue
+
+            header = None if self._remaining else self._parse_header()
+            if header is not None:
+                opcode, length, offset = header
+
+                if opcode in (_OP_TEXT, _OP_BINARY, _OP_CONTINUATION):
+                    self._buf = self._buf[offset:]
+                    self._remaining = length
+                    continue
+
+                # Control frames are at most 125 bytes; wait for the whole one
+                if len(self._buf) >= offset + length:
+                    payload = self._buf[offset:offset + length]
+                    self._buf = self._buf[offset + length:]
+                    if opcode == _OP_PING:
+                        self._send(_OP_PONG, payload)
+                    elif opcode == _OP_CLOSE:
+                        self._send(_OP_CLOSE, payload[:2])
+                        self.close()
+                        return None
+                    continue
+
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return ''
+            filled = self._fill(left)
+            if filled is None:
+                self.close()
+                return None
+            if not filled:
+                return ''
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._closed = True
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+class FileLogSource:
+    """
+    Follows a log file on the local filesystem, like tail -f.
+
+    Used when the deployment's logPath exists on this machine, and as a local
+    stand-in for the websocket when testing.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.25):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._file = None
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def read(self, timeout: float) -> Optional[str]:
+        """Return new text from the file, or '' if nothing was appended within timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._file is None and os.path.exists(self.path):
+                self._file = open(self.path, 'rb')
+            if self._file is not None:
+                data = self._file.read(READ_SIZE)
+                if data:
+                    text = self._decoder.decode(data)
+                    if text:
+                        return text
+                    continue
+
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return ''
+            time.sleep(min(self.poll_interval, left))
+
+    def close(self) -> None:
+        """Close the file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_log_source(
+    base_url: str,
+    api_key: str,
+    log_path: str,
+    server_id: Optional[str] = None
+):
+    """Pick the log source for a deployment: the local file if readable, else the websocket."""
+    if os.path.isfile(log_path) and os.access(log_path, os.R_OK):
+        return FileLogSource(log_path)
+    return WebSocketLogSource(base_url, api_key, log_path, server_id=server_id)
+
+
+class LogStreamer:
+    """
+    Prints a log source in fixed-size chunks from a background thread.
+
+    Each chunk of up to chunk_lines lines is written as one collapsible group,
+    or earlier if output pauses for flush_interval seconds. Memory is bounded:
+    only the current chunk is held, overlong lines are cut at max_line_length,
+    and after max_lines lines the rest is counted but not printed. The source
+    is not read while a chunk is being written, so a slow consumer slows the
+    stream down rather than buffering it.
+    """
+
+    def __init__(
+        self,
+        source,
+        logger: DeployLogger,
+        title: str,
+        chunk_lines: int = 200,
+        flush_interval: float = 5.0,
+        max_line_length: int = 4096,
+        max_lines: int = 20000,
+        read_timeout: float = 0.5
+    ):
+        self.source = source
+        self.logger = logger
+        self.title = title
+        self.chunk_lines = chunk_lines
+        self.flush_interval = flush_interval
+        self.max_line_length = max_line_length
+        self.max_lines = max_lines
+        self.read_timeout = read_timeout
+
+        self.lines_printed = 0
+        self.lines_dropped = 0
+
+        self._chunk: List[str] = []
+        self._partial = ''
+        self._stop = threading.Event()
+        self._drain_until = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'LogStreamer':
+        """Start following the source in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name='dokdeploy-logs', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, drain: float = 2.0, wait: bool = True) -> None:
+        """
+        Stop following the source.
+
+        Output that arrives within `drain` seconds is still printed; reading
+        ends earlier once the source goes quiet.
+        """
+        self._drain_until = time.monotonic() + drain
+        self._stop.set()
+        if wait:
+            self.join(timeout=drain + 5)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for the streaming thread to finish printing."""
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _add_text(self, text: str) -> None:
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        if len(self._partial) > self.max_line_length:
+            lines.append(self._partial)
+            self._partial = ''
+
+        for line in lines:
+            if self.lines_printed + len(self._chunk) >= self.max_lines:
+                self.lines_dropped += 1
+                continue
+            line = line.rstrip('\r')
+            if len(line) > self.max_line_length:
+                line = line[:self.max_line_length] + ' [...]'
+            self._chunk.append(line)
+            if len(self._chunk) >= self.chunk_lines:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._chunk:
+            return
+        first = self.lines_printed + 1
+        self.lines_printed += len(self._chunk)
+        self.logger.block(f"{self.title} (lines {first}-{self.lines_printed})", self._chunk)
+        self._chunk = []
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        try:
+            while True:
+                stopping = self._stop.is_set()
+                if stopping and time.monotonic() >= self._drain_until:
+                    break
+
+                text = self.source.read(self.read_timeout)
+                if text is None:
+                    break
+                if text:
+                    self._add_text(text)
+                elif stopping:
+                    # Source went quiet after the deployment finished
+                    break
+
+                if self._chunk and time.monotonic() - last_flush >= self.flush_interval:
+                    self._flush()
+                if not self._chunk:
+                    last_flush = time.monotonic()
+        except LogStreamError as e:
+            self.logger.warning(f"Build log streaming stopped: {e}")
+        except Exception as e:
+            self.logger.warning(f"Build log streaming stopped unexpectedly: {e!r}")
+        finally:
+            if self._partial:
+                self._add_text('\n')
+            self._flush()
+            self.source.close()
+            if self.lines_dropped:
+                self.logger.warning(
+                    f"{self.lines_dropped} build log line(s) not shown "
+                    f"(limit: {self.max_lines} lines)"
+                )
@@ -1,63 +1,243 @@
 """
 Logging configuration for Dokploy deployment action.
 Provides structured logging with GitHub Actions integration.
+
+Messages use %-style arguments that are only formatted when the line is
+actually written, so a disabled debug call costs a level check:
+
+    logger.debug("Response body: %.500s", body)
+
+Keyword arguments are structured fields. They are ignored in text output and
+written as keys in JSON output (one object per line), together with the
+fields bound with bind()/phase() and the seconds since the run started:
+
+    logger.info("[%ds] Status: %s", elapsed, status, deployment_id=deployment_id)
 """
 
+import json
 import os
 import sys
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, TextIO
 
 
-class DeployLogger:
-    """Logger with GitHub Actions annotations support."""
+# Serializes writes so lines from concurrent deployments never interleave
+_output_lock = threading.Lock()
 
-    def __init__(self, debug: bool = False):
-        self.debug_mode = debug
+LOG_FORMATS = ('text', 'json')
+
+
+def _emit(line: str, stream: Optional[TextIO] = None) -> None:
+    """Write a single line to stdout (or the given stream) atomically."""
+    with _output_lock:
+        print(line, file=stream or sys.stdout, flush=True)
 
-    def debug(self, message: str) -> None:
+
+class DeployLogger:
+    """Logger with GitHub Actions annotations support and an optional JSON-lines output."""
+
+    def __init__(
+        self,
+        debug: bool = False,
+        prefix: Optional[str] = None,
+        json_output: bool = False,
+        fields: Optional[Dict[str, Any]] = None,
+        started_at: Optional[float] = None,
+        stdout: Optional[TextIO] = None,
+        stderr: Optional[TextIO] = None
+    ):
+        self.debug_mode = debug
+        self.prefix = prefix
+        self.json_output = json_output
+        self.fields: Dict[str, Any] = dict(fields or {})
+        if prefix:
+            self.fields.setdefault('app', prefix)
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        # Where lines go instead of sys.stdout / sys.stderr (e.g. a daemon client)
+        self.stdout = stdout
+        self.stderr = stderr
+
+    @property
+    def debug_enabled(self) -> bool:
+        """Whether debug lines are written; check it before building costly debug arguments."""
+        return self.debug_mode
+
+    def _format(self, message: str) -> str:
+        """Prepend the per-app prefix, if any."""
+        if self.prefix:
+            return f"[{self.prefix}] {message}"
+        return message
+
+    def _record(self, level: str, message: str, args: tuple, fields: Dict[str, Any]) -> str:
+        """Render one JSON log line."""
+        record = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'level': level,
+            'message': message % args if args else message,
+            'elapsed': round(time.monotonic() - self.started_at, 3),
+        }
+        record.update(self.fields)
+        record.update(fields)
+        return json.dumps(record, default=str, ensure_ascii=False)
+
+    def _log(self, level: str, tag: str, message: str, args: tuple, fields: Dict[str, Any], stream=None) -> None:
+        if self.json_output:
+            _emit(self._record(level, message, args, fields), self.stdout)
+        else:
+            _emit(f"{tag} {self._format(message % args if args else message)}", stream or self.stdout)
+
+    def child(self, prefix: str, debug: Optional[bool] = None) -> 'DeployLogger':
+        """Create a logger whose lines are tagged with the given prefix."""
+        fields = dict(self.fields)
+        fields['app'] = prefix
+        return DeployLogger(
+            debug=self.debug_mode if debug is None else debug,
+            prefix=prefix,
+            json_output=self.json_output,
+            fields=fields,
+            started_at=self.started_at,
+            stdout=self.stdout,
+            stderr=self.stderr
+        )
+
+    def bind(self, **fields: Any) -> 'DeployLogger':
+        """Create a logger that adds `fields` to every JSON line."""
+        return DeployLogger(
+            debug=self.debug_mode,
+            prefix=self.prefix,
+            json_output=self.json_output,
+            fields={**self.fields, **fields},
+            started_at=self.started_at,
+            stdout=self.stdout,
+            stderr=self.stderr
+        )
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Tag the lines logged within the block with phase=name."""
+        previous = self.fields
+        self.fields = {**previous, 'phase': name}
+        try:
+            yield
+        finally:
+            self.fields = previous
+
+    def debug(self, message: str, *args: Any, **fields: Any) -> None:
         """Log debug message (only if debug mode enabled)."""
         if self.debug_mode:
-            print(f"[DEBUG] {message}", file=sys.stderr)
+            self._log('debug', '[DEBUG]', message, args, fields, self.stderr or sys.stderr)
 
-    def info(self, message: str) -> None:
+    def info(self, message: str, *args: Any, **fields: Any) -> None:
         """Log info message."""
-        print(f"[INFO] {message}")
+        self._log('info', '[INFO]', message, args, fields)
 
-    def warning(self, message: str) -> None:
+    def warning(self, message: str, *args: Any, **fields: Any) -> None:
         """Log warning message with GitHub Actions annotation."""
-        print(f"::warning::{message}")
-        print(f"[WARNING] {message}", file=sys.stderr)
-
-    def error(self, message: str) -> None:
+        if self.json_output:
+            _emit(self._record('warning', message, args, fields), self.stdout)
+            return
+        text = self._format(message % args if args else message)
+        _emit(f"::warning::{text}", self.stdout)
+        _emit(f"[WARNING] {text}", self.stderr or sys.stderr)
+
+    def error(self, message: str, *args: Any, **fields: Any) -> None:
         """Log error message with GitHub Actions annotation."""
-        print(f"::error::{message}")
-        print(f"[ERROR] {message}", file=sys.stderr)
+        if self.json_output:
+            _emit(self._record('error', message, args, fields), self.stdout)
+            return
+        text = self._format(message % args if args else message)
+        _emit(f"::error::{text}", self.stdout)
+        _emit(f"[ERROR] {text}", self.stderr or sys.stderr)
 
     def group(self, title: str) -> 'LogGroup':
         """Create a collapsible group in GitHub Actions logs."""
-        return LogGroup(title)
-
-    def success(self, message: str) -> None:
+        if self.json_output:
+            return JsonLogGroup(self, title)
+        if self.prefix:
+            # Groups cannot interleave, so prefixed (parallel) loggers
+            # fall back to plain section markers
+            return PrefixedLogGroup(self._format(title), self.stdout)
+        return LogGroup(title, self.stdout)
+
+    def block(self, title: str, lines: List[str]) -> None:
+        """
+        Write raw output lines (e.g. build logs) as one uninterrupted group.
+
+        Workflow commands are disabled inside the group, so a line that happens
+        to start with '::' is printed instead of being run by GitHub Actions.
+        """
+        if self.json_output:
+            _emit(self._record('info', title, (), {'lines': lines}), self.stdout)
+            return
+        if self.prefix:
+            text = "\n".join(
+                [f"[INFO] {self._format(title)}"] + [self._format(line) for line in lines]
+            )
+        else:
+            token = os.urandom(8).hex()
+            text = "\n".join(
+                [f"::group::{title}", f"::stop-commands::{token}"]
+                + lines
+                + [f"::{token}::", "::endgroup::"]
+            )
+        _emit(text, self.stdout)
+
+    def echo(self, text: str = '') -> None:
+        """Write plain text (banners, summaries) to this logger's output."""
+        _emit(text, self.stdout)
+
+    def success(self, message: str, *args: Any, **fields: Any) -> None:
         """Log success message."""
-        print(f"[SUCCESS] ✓ {message}")
+        self._log('success', '[SUCCESS] ✓', message, args, fields)
 
 
 class LogGroup:
     """Context manager for GitHub Actions log groups."""
 
-    def __init__(self, title: str):
+    def __init__(self, title: str, stream: Optional[TextIO] = None):
         self.title = title
+        self.stream = stream
+
+    def __enter__(self):
+        _emit(f"::group::{self.title}", self.stream)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _emit("::endgroup::", self.stream)
+        return False
+
+
+class PrefixedLogGroup(LogGroup):
+    """Section marker used instead of a real group when output is interleaved."""
+
+    def __enter__(self):
+        _emit(f"[INFO] {self.title}", self.stream)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class JsonLogGroup(LogGroup):
+    """Group title written as an ordinary info record in JSON output."""
+
+    def __init__(self, logger: DeployLogger, title: str):
+        super().__init__(title, logger.stdout)
+        self.logger = logger
 
     def __enter__(self):
-        print(f"::group::{self.title}")
+        self.logger.info(self.title)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        print("::endgroup::")
         return False
 
 
 def create_logger() -> DeployLogger:
     """Create logger instance from environment."""
     debug = os.getenv('INPUT_DEBUG', 'false').lower() == 'true'
-    return DeployLogger(debug=debug)
+    json_output = os.getenv('INPUT_LOG_FORMAT', 'text').lower() == 'json'
+    return DeployLogger(debug=debug, json_output=json_output)
@@ -0,0 +1,279 @@
+"""
+Request and phase metrics for a deploy run.
+
+Collects per-endpoint API latency histograms, status codes, response bytes and
+retries, plus how long each deploy phase took and how a deployment's time
+split into queueing, building and our own detection lag. Exported as a JSON
+report or a Prometheus textfile (for node-exporter's textfile collector).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def endpoint_name(endpoint: str) -> str:
+    """'/api/deployment.all?applicationId=x' -> 'deployment.all'."""
+    return endpoint.split('?', 1)[0].rsplit('/', 1)[-1]
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class _Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'buckets': {str(bound): n for bound, n in zip(LATENCY_BUCKETS, self.counts)},
+        }
+
+
+class Metrics:
+    """
+    Thread-safe metrics collector for one dokdeploy run.
+
+    Pass it to DokployClient (or DokployClientFactory) to record API requests,
+    and time phases with `with metrics.phase('track', app='api'):`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.latency: Dict[Tuple[str, str], _Histogram] = {}
+        self.statuses: Dict[Tuple[str, str, str], int] = {}
+        self.bytes_received: Dict[str, int] = {}
+        self.retries: Dict[str, int] = {}
+        # Seconds requests spent waiting for the rate limiter, per endpoint
+        self.throttled: Dict[str, float] = {}
+        self.phases: Dict[Tuple[str, str], float] = {}
+        self.deployments: Dict[str, Dict[str, Optional[float]]] = {}
+
+    def record_request(
+        self,
+        method: str,
+        endpoint: str,
+        status: Any,
+        seconds: float,
+        bytes_received: int = 0
+    ) -> None:
+        """Record one HTTP attempt. status is the HTTP code, or 'error' for network errors."""
+        name = endpoint_name(endpoint)
+        with self._lock:
+            self.latency.setdefault((method, name), _Histogram()).observe(seconds)
+            key = (method, name, str(status))
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            if bytes_received:
+                self.bytes_received[name] = self.bytes_received.get(name, 0) + bytes_received
+
+    def record_bytes(self, endpoint: str, count: int) -> None:
+        """Add response bytes read after the request was recorded (streamed bodies)."""
+        name = endpoint_name(endpoint)
+        with self._lock:
+            self.bytes_received[name] = self.bytes_received.get(name, 0) + count
+
+    def record_retry(self, endpoint: str) -> None:
+        name = endpoint_name(endpoint)
+        with self._lock:
+            self.retries[name] = self.retries.get(name, 0) + 1
+
+    def record_throttle(self, endpoint: str, seconds: float) -> None:
+        """Record time a request waited for the client-side rate limiter."""
+        name = endpoint_name(endpoint)
+        with self._lock:
+            self.throttled[name] = self.throttled.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str, app: str = '') -> Iterator[None]:
+        """Time a deploy phase (baseline, trigger, track, restart)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[(name, app)] = time.perf_counter() - started
+
+    def record_deployment(self, deployment: Dict[str, Any], app: str = '', seen_at: Optional[float] = None) -> None:
+        """
+        Split a finished deployment's time into queue, build and detection lag.
+
+        queue: createdAt -> startedAt, build: startedAt -> finishedAt (server
+        clock), lag: finishedAt -> when we saw it finish (local clock, so it
+        includes any clock skew between the two machines).
+        """
+        created = _parse_time(deployment.get('createdAt'))
+        started = _parse_time(deployment.get('startedAt'))
+        finished = _parse_time(deployment.get('finishedAt'))
+        seen_at = seen_at or time.time()
+
+        with self._lock:
+            self.deployments[app] = {
+                'queue_seconds': (started - created).total_seconds() if created and started else None,
+                'build_seconds': (finished - started).total_seconds() if started and finished else None,
+                'detection_lag_seconds': seen_at - finished.timestamp() if finished else None,
+            }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable report."""
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'duration_seconds': round(time.time() - self.started_at, 3),
+                'requests': [
+                    {
+                        'method': method,
+                        'endpoint': name,
+                        'latency': histogram.to_dict(),
+                        'statuses': {
+                            status: n
+                            for (m, e, status), n in self.statuses.items()
+                            if (m, e) == (method, name)
+                        },
+                    }
+                    for (method, name), histogram in sorted(self.latency.items())
+                ],
+                'bytes_received': dict(self.bytes_received),
+                'retries': dict(self.retries),
+                'throttled_seconds': {name: round(seconds, 3) for name, seconds in self.throttled.items()},
+                'phases': [
+                    {'phase': phase, 'app': app, 'seconds': round(seconds, 3)}
+                    for (phase, app), seconds in self.phases.items()
+                ],
+                'deployments': {app: dict(values) for app, values in self.deployments.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(**values: Any) -> str:
+            pairs = ','.join(f'{key}="{_label_value(value)}"' for key, value in values.items())
+            return '{' + pairs + '}'
+
+        with self._lock:
+            metric('dokdeploy_http_request_duration_seconds', 'histogram', 'Dokploy API request latency')
+            for (method, name), histogram in sorted(self.latency.items()):
+                for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                    lines.append(
+                        f"dokdeploy_http_request_duration_seconds_bucket"
+                        f"{labels(method=method, endpoint=name, le=bound)} {count}"
+                    )
+                lines.append(
+                    f"dokdeploy_http_request_duration_seconds_bucket"
+                    f"{labels(method=method, endpoint=name, le='+Inf')} {histogram.count}"
+                )
+                lines.append(
+                    f"dokdeploy_http_request_duration_seconds_sum"
+                    f"{labels(method=method, endpoint=name)} {histogram.sum:.6f}"
+                )
+                lines.append(
+                    f"dokdeploy_http_request_duration_seconds_count"
+                    f"{labels(method=method, endpoint=name)} {histogram.count}"
+                )
+
+            metric('dokdeploy_http_requests_total', 'counter', 'Dokploy API requests by status code')
+            for (method, name, status), count in sorted(self.statuses.items()):
+                lines.append(
+                    f"dokdeploy_http_requests_total{labels(method=method, endpoint=name, status=status)} {count}"
+                )
+
+            metric('dokdeploy_http_response_bytes_total', 'counter', 'Response bytes received')
+            for name, count in sorted(self.bytes_received.items()):
+                lines.append(f"dokdeploy_http_response_bytes_total{labels(endpoint=name)} {count}")
+
+            metric('dokdeploy_http_retries_total', 'counter', 'Retried API requests')
+            for name, count in sorted(self.retries.items()):
+                lines.append(f"dokdeploy_http_retries_total{labels(endpoint=name)} {count}")
+
+            metric(
+                'dokdeploy_http_throttled_seconds_total', 'counter',
+                'Time requests waited for the client-side rate limiter'
+            )
+            for name, seconds in sorted(self.throttled.items()):
+                lines.append(f"dokdeploy_http_throttled_seconds_total{labels(endpoint=name)} {seconds:.3f}")
+
+            metric('dokdeploy_phase_duration_seconds', 'gauge', 'Duration of each deploy phase')
+            for (phase, app), seconds in self.phases.items():
+                lines.append(f"dokdeploy_phase_duration_seconds{labels(phase=phase, app=app)} {seconds:.3f}")
+
+            for key, help_text in (
+                ('queue_seconds', 'Time the deployment waited in the Dokploy queue'),
+                ('build_seconds', 'Time the deployment spent building'),
+                ('detection_lag_seconds', 'Time between the build finishing and dokdeploy noticing'),
+            ):
+                metric(f'dokdeploy_deployment_{key}', 'gauge', help_text)
+                for app, values in self.deployments.items():
+                    if values.get(key) is not None:
+                        lines.append(f"dokdeploy_deployment_{key}{labels(app=app)} {values[key]:.3f}")
+
+            metric('dokdeploy_last_run_timestamp_seconds', 'gauge', 'When this dokdeploy run started')
+            lines.append(f"dokdeploy_last_run_timestamp_seconds {self.started_at:.0f}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: str) -> None:
+        """Write the JSON report."""
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2) + '\n')
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write a Prometheus textfile.
+
+        Written to a temporary file and renamed, so node-exporter never reads
+        a half-written file.
+        """
+        _write_atomic(path, self.to_prometheus())
+
+
+def _label_value(value: Any) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path: str, content: str) -> None:
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.dokdeploy-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise